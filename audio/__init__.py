@@ -1,7 +1,30 @@
 """
 Пакет для работы с аудио: запись с микрофона и воспроизведение.
+
+Модули, которым нужны sounddevice и config (запись, воспроизведение, отладочная
+запись), импортируются при первом обращении, поэтому обработка аудио в памяти
+и сегментация на фразы доступны без них.
 """
 
-from audio.handler import AudioHandler
+import importlib
+from audio.vad import UtteranceSegmenter, frame_rms
+from audio.processing import resample_audio, to_mono_float32, StreamingResampler, AudioBufferPool
+
+_LAZY_EXPORTS = {
+    'AudioHandler': 'audio.handler',
+    'CaptureEngine': 'audio.capture',
+    'PlaybackEngine': 'audio.playback',
+    'DebugAudioSink': 'audio.sink',
+}
+
+__all__ = ['AudioHandler', 'CaptureEngine', 'PlaybackEngine', 'UtteranceSegmenter', 'frame_rms', 'DebugAudioSink',
+           'resample_audio', 'to_mono_float32', 'StreamingResampler', 'AudioBufferPool']
+
 
-__all__ = ['AudioHandler']
\ No newline at end of file
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'audio' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
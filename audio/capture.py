@@ -0,0 +1,155 @@
+"""
+Захват аудио с микрофона в заранее выделенные буферы на частоте распознавателя.
+"""
+
+import threading
+import numpy as np
+import sounddevice as sd
+from audio.processing import AudioBufferPool, StreamingResampler
+from config import SAMPLE_RATE, CAPTURE_DEVICE_RATE, CAPTURE_BUFFERS
+from utils.metrics import REGISTRY
+
+CAPTURE_XRUNS = REGISTRY.counter(
+    "audio_capture_xruns_total", "Переполнения и опустошения буфера устройства записи", ("kind",)
+)
+
+
+class CaptureEngine:
+    """Захват моно float32 на целевой частоте без выделения памяти в callback.
+
+    Устройство по возможности открывается сразу на целевой частоте (16 кГц
+    для Whisper). Если устройство ее не поддерживает, оно открывается на
+    своей частоте, а блоки передискретизируются потоковым полифазным
+    фильтром в заранее выделенный буфер. Записи фиксированной длины
+    пишутся в буферы пула, которые переиспользуются между фразами.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, device_rate: int = CAPTURE_DEVICE_RATE,
+                 block_ms: int = 30, buffers: int = CAPTURE_BUFFERS):
+        """Инициализирует захват.
+
+        Args:
+            sample_rate: Частота дискретизации выдаваемого аудио.
+            device_rate: Частота, на которой открывается устройство (0 - подобрать автоматически).
+            block_ms: Размер блока callback в миллисекундах.
+            buffers: Число буферов пула для записей фиксированной длины.
+        """
+        self.sample_rate = sample_rate
+        self.device_rate = device_rate or self._negotiate_rate(sample_rate)
+        self.block_ms = block_ms
+        self.device_block = max(1, int(self.device_rate * block_ms / 1000))
+        self.buffers = max(1, buffers)
+        self.stats = {"callbacks": 0, "overruns": 0, "underruns": 0}
+        self._pool = None
+
+        self.resampler = None
+        if self.device_rate != sample_rate:
+            self.resampler = StreamingResampler(self.device_rate, sample_rate, self.device_block)
+            self._scratch = np.zeros(self.resampler.max_output(), dtype=np.float32)
+            print(f"ℹ Устройство записи: {self.device_rate} Гц, потоковая передискретизация в {sample_rate} Гц")
+
+    @staticmethod
+    def _negotiate_rate(sample_rate: int) -> int:
+        """Возвращает sample_rate, если устройство записи его поддерживает, иначе его частоту по умолчанию."""
+        try:
+            sd.check_input_settings(samplerate=sample_rate, channels=1, dtype="float32")
+            return sample_rate
+        except Exception:
+            try:
+                return int(sd.query_devices(kind="input")["default_samplerate"])
+            except Exception:
+                return sample_rate
+
+    def open_stream(self, consumer, blocksize: int = None) -> sd.InputStream:
+        """Открывает поток записи, передающий блоки на целевой частоте в consumer.
+
+        Блок, переданный в consumer, действителен только во время вызова:
+        он ссылается на переиспользуемый буфер и должен быть скопирован,
+        если нужен позже.
+
+        Args:
+            consumer: Функция consumer(block), вызываемая из потока аудио.
+                Может вернуть True, чтобы остановить поток.
+            blocksize: Размер блока устройства в сэмплах (по умолчанию из block_ms).
+                Если блок больше того, под который создан фильтр передискретизации,
+                фильтр и буфер его выхода пересоздаются под новый размер.
+
+        Returns:
+            sd.InputStream: Поток (запускается через with или start()).
+
+        Raises:
+            RuntimeError: Если не удалось открыть поток записи.
+        """
+        blocksize = blocksize or self.device_block
+        if self.resampler is not None:
+            if blocksize > self.resampler.max_block:
+                self.resampler = StreamingResampler(self.device_rate, self.sample_rate, blocksize)
+                self._scratch = np.zeros(self.resampler.max_output(), dtype=np.float32)
+            else:
+                self.resampler.reset()
+
+        def callback(indata, frames, time_info, status):
+            self.stats["callbacks"] += 1
+            if status.input_overflow:
+                self.stats["overruns"] += 1
+                CAPTURE_XRUNS.inc(kind="overrun")
+            if status.input_underflow:
+                self.stats["underruns"] += 1
+                CAPTURE_XRUNS.inc(kind="underrun")
+            block = indata[:, 0]
+            if self.resampler is not None:
+                block = self._scratch[:self.resampler.process(block, self._scratch)]
+            if consumer(block):
+                raise sd.CallbackStop
+
+        try:
+            return sd.InputStream(
+                samplerate=self.device_rate,
+                channels=1,
+                dtype="float32",
+                blocksize=blocksize,
+                callback=callback
+            )
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при открытии потока записи: {e}")
+
+    def record(self, duration: float) -> np.ndarray:
+        """Записывает фрагмент фиксированной длины в буфер пула.
+
+        Args:
+            duration: Длительность записи в секундах.
+
+        Returns:
+            np.ndarray: Моно-сигнал float32 с частотой sample_rate. Буфер вернется
+                в пул, когда на него не останется ссылок.
+
+        Raises:
+            RuntimeError: Если запись аудио не удалась.
+        """
+        length = int(duration * self.sample_rate)
+        if self._pool is None or self._pool.capacity < length:
+            self._pool = AudioBufferPool(length, self.buffers)
+        out = self._pool.acquire(length)
+        state = {"filled": 0}
+        done = threading.Event()
+
+        def consume(block):
+            filled = state["filled"]
+            take = min(len(block), length - filled)
+            out[filled:filled + take] = block[:take]
+            state["filled"] = filled + take
+            if state["filled"] >= length:
+                done.set()
+                return True
+            return False
+
+        try:
+            with self.open_stream(consume):
+                done.wait(duration + 1.0)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Ошибка при записи аудио: {e}")
+        if state["filled"] < length:
+            out[state["filled"]:] = 0.0
+        return out
@@ -1,11 +1,17 @@
 """
-Модуль для работы с аудио: запись, воспроизведение, сохранение.
+Модуль для работы с аудио: запись и воспроизведение.
 """
 
-import os
-import sounddevice as sd
-import soundfile as sf
-from config import SAMPLE_RATE, OUTPUT_DIR
+import queue
+import threading
+import numpy as np
+from audio.capture import CaptureEngine
+from audio.playback import PlaybackEngine
+from audio.vad import UtteranceSegmenter
+from config import (
+    SAMPLE_RATE, VAD_ENERGY_THRESHOLD, VAD_SILENCE_MS,
+    VAD_MIN_SPEECH_MS, VAD_PRE_ROLL_MS, VAD_MAX_UTTERANCE_S, CAPTURE_BUFFERS, CAPTURE_DURING_PLAYBACK
+)
 
 
 class AudioHandler:
@@ -15,19 +21,27 @@ class AudioHandler:
         """Инициализирует обработчик аудио.
 
         Args:
-            sample_rate: Частота дискретизации для записи и воспроизведения.
+            sample_rate: Частота дискретизации записанного аудио.
         """
         self.sample_rate = sample_rate
+        self.capture = CaptureEngine(sample_rate)
+        self.playback = PlaybackEngine()
+        self.capture_during_playback = CAPTURE_DURING_PLAYBACK
+        self._capture_paused = threading.Event()
 
-    def record_audio(self, duration: float, output_filename: str = "recorded_audio.wav") -> str:
+    @property
+    def input_overflows(self) -> int:
+        """Число переполнений буфера устройства записи."""
+        return self.capture.stats["overruns"]
+
+    def record_audio(self, duration: float) -> np.ndarray:
         """Записывает аудио с микрофона.
 
         Args:
             duration: Длительность записи в секундах.
-            output_filename: Имя файла для сохранения.
 
         Returns:
-            str: Путь к сохраненному аудиофайлу.
+            np.ndarray: Записанный моно-сигнал float32 с частотой sample_rate.
 
         Raises:
             RuntimeError: Если запись аудио не удалась.
@@ -35,41 +49,141 @@ class AudioHandler:
         print(f"\nЗапись аудио ({duration} секунд)...")
         print("Говорите на русском языке...")
 
-        try:
-            audio = sd.rec(
-                int(duration * self.sample_rate),
-                samplerate=self.sample_rate,
-                channels=1,
-                dtype='float32'
-            )
-            sd.wait()
-
-            output_path = os.path.join(OUTPUT_DIR, output_filename)
-            sf.write(output_path, audio, self.sample_rate, subtype='PCM_24')
-            print(f"Аудио сохранено: {output_path}")
-
-            return output_path
-        except Exception as e:
-            raise RuntimeError(f"Ошибка при записи аудио: {e}")
+        return self.capture.record(duration)
+
+    def create_segmenter(self) -> UtteranceSegmenter:
+        """Создает сегментатор фраз с параметрами VAD из конфигурации.
+
+        Returns:
+            UtteranceSegmenter: Сегментатор для частоты дискретизации обработчика.
+        """
+        return UtteranceSegmenter(
+            self.sample_rate,
+            energy_threshold=VAD_ENERGY_THRESHOLD,
+            min_speech_ms=VAD_MIN_SPEECH_MS,
+            silence_ms=VAD_SILENCE_MS,
+            pre_roll_ms=VAD_PRE_ROLL_MS,
+            max_utterance_s=VAD_MAX_UTTERANCE_S,
+            buffers=CAPTURE_BUFFERS
+        )
+
+    def stream_utterances(self, segmenter: UtteranceSegmenter = None,
+                          stop_event: threading.Event = None, block_ms: int = 30, on_speech_start=None):
+        """Непрерывно захватывает аудио с микрофона и отдает фразы по мере их завершения.
+
+        Захват идет через callback InputStream, который подает блоки (уже на частоте
+        sample_rate) в сегментатор. Генератор держит поток открытым, пока его не
+        закроют или не будет выставлен stop_event. Если захват во время
+        воспроизведения выключен, сегментация приостанавливается, пока играет звук.
+
+        Args:
+            segmenter: Сегментатор фраз (по умолчанию создается из конфигурации).
+            stop_event: Событие для остановки захвата.
+            block_ms: Размер блока callback в миллисекундах.
+            on_speech_start: Функция без аргументов, вызываемая из потока аудио в начале
+                каждой фразы (например, для прерывания воспроизведения).
 
-    def play_audio(self, audio_path: str):
-        """Воспроизводит аудиофайл через колонки.
+        Yields:
+            np.ndarray: Завершенная фраза (float32, моно).
+
+        Raises:
+            RuntimeError: Если не удалось открыть поток записи.
+        """
+        if segmenter is None:
+            segmenter = self.create_segmenter()
+        utterances = queue.Queue()
+
+        def consume(block):
+            if self._capture_paused.is_set() or (not self.capture_during_playback and self.playback.active):
+                if segmenter.in_speech:
+                    segmenter.reset()
+                return
+            was_in_speech = segmenter.in_speech
+            for utterance in segmenter.feed(block):
+                utterances.put(utterance)
+            if on_speech_start is not None and segmenter.in_speech and not was_in_speech:
+                on_speech_start()
+
+        stream = self.capture.open_stream(consume, blocksize=int(self.capture.device_rate * block_ms / 1000))
+
+        with stream:
+            while stop_event is None or not stop_event.is_set():
+                try:
+                    yield utterances.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+    def pause_capture(self):
+        """Приостанавливает сегментацию непрерывного захвата (например, на время воспроизведения)."""
+        self._capture_paused.set()
+
+    def resume_capture(self):
+        """Возобновляет сегментацию непрерывного захвата."""
+        self._capture_paused.clear()
+
+    def play_audio(self, audio: np.ndarray, sample_rate: int):
+        """Воспроизводит аудиобуфер через колонки и ждет окончания воспроизведения.
 
         Args:
-            audio_path: Путь к аудиофайлу.
+            audio: Аудиосигнал (float32).
+            sample_rate: Частота дискретизации сигнала.
 
         Raises:
-            FileNotFoundError: Если файл не найден.
             RuntimeError: Если воспроизведение аудио не удалось.
         """
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Файл не найден: {audio_path}")
+        print("\nВоспроизведение аудио...")
+        turn = self.playback.begin_turn()
+        try:
+            self.playback.enqueue(audio, sample_rate, turn)
+            self.playback.end_turn(turn)
+            self.playback.wait_turn(turn)
+        except BaseException:
+            self.playback.cancel()
+            raise
+        print("Воспроизведение завершено")
+
+    def play_stream(self, chunks):
+        """Воспроизводит аудио по фрагментам, пока следующие фрагменты еще генерируются.
+
+        Фрагменты ставятся в очередь движка воспроизведения без ожидания, поэтому
+        генерация следующего фрагмента идет во время воспроизведения предыдущего,
+        а соседние фрагменты звучат без пауз. Метод возвращается, когда
+        воспроизведение закончено.
+
+        Args:
+            chunks: Итерируемый источник пар (аудиосигнал float32, частота дискретизации).
 
+        Returns:
+            float: Момент начала воспроизведения первого фрагмента (time.time())
+                или None, если фрагментов не было.
+
+        Raises:
+            RuntimeError: Если генерация или воспроизведение аудио не удались.
+        """
+        playback = self.playback
+        turn = playback.begin_turn()
         try:
-            print("\nВоспроизведение аудио...")
-            data, sample_rate = sf.read(audio_path)
-            sd.play(data, sample_rate)
-            sd.wait()
-            print("Воспроизведение завершено")
+            for index, (audio, sample_rate) in enumerate(chunks):
+                if index == 0:
+                    print("\nВоспроизведение аудио...")
+                playback.enqueue(audio, sample_rate, turn)
+        except RuntimeError:
+            playback.cancel()
+            raise
         except Exception as e:
-            raise RuntimeError(f"Ошибка при воспроизведении аудио: {e}")
+            playback.cancel()
+            raise RuntimeError(f"Ошибка при генерации аудио: {e}")
+        except BaseException:
+            playback.cancel()
+            raise
+
+        playback.end_turn(turn)
+        try:
+            playback.wait_turn(turn)
+        except BaseException:
+            playback.cancel()
+            raise
+        first_audio_time = playback.first_audio_time(turn)
+        if first_audio_time is not None:
+            print("Воспроизведение завершено")
+        return first_audio_time
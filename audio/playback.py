@@ -0,0 +1,285 @@
+"""
+Неблокирующее воспроизведение: постоянный поток вывода, очередь фрагментов и прерывание.
+"""
+
+import collections
+import queue
+import threading
+import time
+import numpy as np
+import sounddevice as sd
+from audio.processing import resample_audio, to_mono_float32
+from config import PLAYBACK_JITTER_MS, PLAYBACK_BLOCK_MS
+from utils.metrics import REGISTRY
+
+PLAYBACK_UNDERRUNS = REGISTRY.counter(
+    "playback_underruns_total", "Опустошения очереди воспроизведения посреди фразы", ("kind",)
+)
+PLAYBACK_CANCELLED = REGISTRY.counter("playback_cancelled_total", "Прерванные воспроизведения")
+
+# Сколько последних фраз хранить в журналах начала и конца воспроизведения
+_TURN_HISTORY = 64
+
+
+class PlaybackEngine:
+    """Воспроизведение через постоянный OutputStream, питаемый очередью фрагментов.
+
+    Фрагменты ставятся в очередь без ожидания (enqueue) и воспроизводятся
+    подряд без пауз. Перед началом фразы и после опустошения очереди
+    накапливается буфер джиттера, поэтому неравномерно поступающие фрагменты
+    не прерываются тишиной на каждом блоке. Когда фраза завершена (end_turn),
+    остаток играется без ожидания буфера.
+
+    Фрагменты относятся к фразам (turn); cancel прерывает воспроизведение и
+    отбрасывает все уже поставленные фразы, а фрагменты этих фраз, пришедшие
+    позже, игнорируются. События начала и конца воспроизведения фраз
+    передаются слушателям из отдельного потока, не из callback аудио.
+    """
+
+    def __init__(self, sample_rate: int = None, jitter_ms: float = PLAYBACK_JITTER_MS,
+                 block_ms: float = PLAYBACK_BLOCK_MS):
+        """Инициализирует движок (поток вывода открывается при первом фрагменте).
+
+        Args:
+            sample_rate: Частота потока вывода (по умолчанию частота первого фрагмента).
+            jitter_ms: Объем аудио, накапливаемый перед началом воспроизведения.
+            block_ms: Размер блока callback в миллисекундах.
+        """
+        self.sample_rate = sample_rate
+        self.jitter_ms = jitter_ms
+        self.block_ms = block_ms
+        self.stats = {"chunks": 0, "underruns": 0, "device_underflows": 0, "cancelled": 0}
+
+        self._chunks = collections.deque()
+        self._condition = threading.Condition()
+        self._buffered = 0
+        self._prebuffering = True
+        self._open_turn = None
+        self._queued = collections.Counter()
+        self._last_turn = 0
+        self._cancelled_through = 0
+        self._started = {}
+        self._finished = {}
+        self._stream = None
+        self._listeners = []
+        self._events = queue.SimpleQueue()
+        self._notifier = threading.Thread(target=self._notify, name="playback-events", daemon=True)
+        self._notifier.start()
+
+    @property
+    def active(self) -> bool:
+        """Есть ли аудио в очереди или незавершенная фраза."""
+        with self._condition:
+            return bool(self._chunks) or self._open_turn is not None
+
+    def add_listener(self, listener):
+        """Добавляет слушателя событий listener(event, turn, timestamp).
+
+        События: 'first_audio' - начало воспроизведения фразы, 'done' - фраза
+        доиграна до конца, 'cancelled' - фраза прервана.
+        """
+        self._listeners.append(listener)
+
+    def begin_turn(self) -> int:
+        """Возвращает номер новой фразы, больший всех уже использованных."""
+        with self._condition:
+            return max(self._last_turn, self._cancelled_through) + 1
+
+    def enqueue(self, audio: np.ndarray, sample_rate: int, turn: int) -> bool:
+        """Ставит фрагмент в очередь воспроизведения без ожидания.
+
+        Args:
+            audio: Аудиосигнал (float32, моно).
+            sample_rate: Частота дискретизации фрагмента.
+            turn: Номер фразы, к которой относится фрагмент.
+
+        Returns:
+            bool: False, если фраза уже прервана и фрагмент отброшен.
+
+        Raises:
+            RuntimeError: Если не удалось открыть поток вывода.
+        """
+        if self.is_cancelled(turn):
+            return False
+        self._ensure_stream(sample_rate)
+        audio = to_mono_float32(audio)
+        if sample_rate != self.sample_rate:
+            audio = resample_audio(audio, sample_rate, self.sample_rate)
+        if len(audio) == 0:
+            return True
+
+        with self._condition:
+            if turn <= self._cancelled_through:
+                return False
+            self._chunks.append([audio, 0, turn])
+            self._buffered += len(audio)
+            self._queued[turn] += 1
+            self._open_turn = turn
+            self._last_turn = max(self._last_turn, turn)
+            self.stats["chunks"] += 1
+        return True
+
+    def end_turn(self, turn: int):
+        """Отмечает, что фрагментов фразы больше не будет.
+
+        Args:
+            turn: Номер фразы.
+        """
+        with self._condition:
+            if self._open_turn == turn:
+                self._open_turn = None
+            self._last_turn = max(self._last_turn, turn)
+            if turn <= self._cancelled_through or self._queued[turn]:
+                return
+            # Фраза без фрагментов или уже доигранная целиком
+            self._finish_turn(turn, time.time())
+
+    def cancel(self, through: int = 0) -> bool:
+        """Прерывает воспроизведение и отбрасывает все поставленные фразы.
+
+        Отменяются фразы, фрагменты которых уже ставились в очередь (включая
+        незавершенную); фразы с большими номерами, еще не дошедшие до
+        воспроизведения, не затрагиваются.
+
+        Args:
+            through: Номер фразы, до которого включительно отбрасываются и фрагменты,
+                которые еще не поставлены; по умолчанию только поставленные фразы.
+
+        Returns:
+            bool: True, если было что прерывать.
+        """
+        with self._condition:
+            turns = {turn for _, _, turn in self._chunks}
+            if self._open_turn is not None:
+                turns.add(self._open_turn)
+            self._cancelled_through = max(self._cancelled_through, self._last_turn, through)
+            self._chunks.clear()
+            self._queued.clear()
+            self._buffered = 0
+            self._open_turn = None
+            self._prebuffering = True
+            if not turns:
+                return False
+            now = time.time()
+            for turn in sorted(turns):
+                self._finished[turn] = now
+                self._events.put(("cancelled", turn, now))
+            self.stats["cancelled"] += 1
+            PLAYBACK_CANCELLED.inc()
+            self._condition.notify_all()
+        return True
+
+    def is_cancelled(self, turn: int) -> bool:
+        """Прервана ли фраза (ее фрагменты больше не воспроизводятся)."""
+        return turn <= self._cancelled_through
+
+    def wait_turn(self, turn: int, timeout: float = None) -> bool:
+        """Ждет, пока фраза доиграет или будет прервана.
+
+        Args:
+            turn: Номер фразы.
+            timeout: Максимальное время ожидания в секундах.
+
+        Returns:
+            bool: True, если фраза завершилась за отведенное время.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: turn in self._finished or turn <= self._cancelled_through, timeout
+            )
+
+    def first_audio_time(self, turn: int):
+        """Момент начала воспроизведения фразы (time.time()) или None."""
+        with self._condition:
+            return self._started.get(turn)
+
+    def close(self):
+        """Останавливает поток вывода и поток событий."""
+        self.cancel()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self._events.put(None)
+
+    def _ensure_stream(self, sample_rate: int):
+        if self._stream is not None:
+            return
+        with self._condition:
+            if self._stream is not None:
+                return
+            self.sample_rate = self.sample_rate or sample_rate
+            self._jitter_samples = int(self.sample_rate * self.jitter_ms / 1000)
+            try:
+                self._stream = sd.OutputStream(
+                    samplerate=self.sample_rate,
+                    channels=1,
+                    dtype="float32",
+                    blocksize=max(1, int(self.sample_rate * self.block_ms / 1000)),
+                    latency="low",
+                    callback=self._callback
+                )
+                self._stream.start()
+            except Exception as e:
+                self._stream = None
+                raise RuntimeError(f"Ошибка при открытии потока воспроизведения: {e}")
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self.stats["device_underflows"] += 1
+            PLAYBACK_UNDERRUNS.inc(kind="device")
+        out = outdata[:, 0]
+        with self._condition:
+            if self._prebuffering:
+                if not self._chunks or (self._buffered < self._jitter_samples and self._open_turn is not None):
+                    out.fill(0.0)
+                    return
+                self._prebuffering = False
+
+            now = time.time()
+            written = 0
+            while written < frames and self._chunks:
+                entry = self._chunks[0]
+                audio, offset, turn = entry
+                if offset == 0 and turn not in self._started:
+                    self._started[turn] = now
+                    self._events.put(("first_audio", turn, now))
+                take = min(frames - written, len(audio) - offset)
+                out[written:written + take] = audio[offset:offset + take]
+                written += take
+                entry[1] += take
+                self._buffered -= take
+                if entry[1] >= len(audio):
+                    self._chunks.popleft()
+                    self._queued[turn] -= 1
+                    if self._queued[turn] <= 0:
+                        del self._queued[turn]
+                        if turn != self._open_turn:
+                            self._finish_turn(turn, now)
+
+            if written < frames:
+                out[written:].fill(0.0)
+                self._prebuffering = True
+                if self._open_turn is not None:
+                    # Фраза не завершена, а фрагменты кончились: синтез не успевает
+                    self.stats["underruns"] += 1
+                    PLAYBACK_UNDERRUNS.inc(kind="queue")
+
+    def _finish_turn(self, turn: int, timestamp: float):
+        """Отмечает фразу доигранной. Вызывается под блокировкой."""
+        self._finished[turn] = timestamp
+        self._events.put(("done", turn, timestamp))
+        for log in (self._started, self._finished):
+            for old_turn in [key for key in log if key <= turn - _TURN_HISTORY]:
+                del log[old_turn]
+        self._condition.notify_all()
+
+    def _notify(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            for listener in list(self._listeners):
+                try:
+                    listener(*event)
+                except Exception as e:
+                    print(f"⚠ Ошибка обработчика событий воспроизведения: {e}")
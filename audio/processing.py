@@ -0,0 +1,168 @@
+"""
+Вспомогательные функции обработки аудиобуферов в памяти.
+"""
+
+import weakref
+from math import gcd
+import numpy as np
+from scipy import signal
+
+
+def to_mono_float32(audio: np.ndarray) -> np.ndarray:
+    """Приводит аудио к моно float32.
+
+    Args:
+        audio: Аудиосигнал формы (samples,) или (samples, channels).
+
+    Returns:
+        np.ndarray: Одномерный сигнал float32.
+    """
+    audio = np.asarray(audio)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    return audio.astype(np.float32, copy=False)
+
+
+def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Передискретизирует сигнал полифазным фильтром.
+
+    Args:
+        audio: Моно-сигнал.
+        orig_sr: Исходная частота дискретизации.
+        target_sr: Целевая частота дискретизации.
+
+    Returns:
+        np.ndarray: Сигнал float32 с частотой target_sr.
+    """
+    if orig_sr == target_sr:
+        return audio.astype(np.float32, copy=False)
+    divisor = gcd(orig_sr, target_sr)
+    resampled = signal.resample_poly(audio, target_sr // divisor, orig_sr // divisor)
+    return resampled.astype(np.float32, copy=False)
+
+
+class StreamingResampler:
+    """Потоковый полифазный передискретизатор для блоков с микрофона.
+
+    Использует тот же КИХ-фильтр, что и resample_poly, но хранит хвост
+    предыдущего блока, поэтому блоки стыкуются без разрывов. Все буферы
+    выделяются при создании: process пишет результат в переданный массив.
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int, max_block: int):
+        """Инициализирует передискретизатор.
+
+        Args:
+            orig_sr: Частота дискретизации входных блоков.
+            target_sr: Целевая частота дискретизации.
+            max_block: Максимальная длина входного блока в сэмплах.
+        """
+        divisor = gcd(orig_sr, target_sr)
+        self.up = target_sr // divisor
+        self.down = orig_sr // divisor
+        self.max_block = max_block
+
+        max_rate = max(self.up, self.down)
+        taps = signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+        self.taps_per_phase = -(-len(taps) // self.up)
+        padded = np.zeros(self.taps_per_phase * self.up)
+        padded[:len(taps)] = taps
+        # Фаза p использует коэффициенты taps[p], taps[p + up], ...; порядок обращен под окно входа
+        phases = padded.reshape(self.taps_per_phase, self.up).T
+        self._phases = np.ascontiguousarray(phases[:, ::-1], dtype=np.float32)
+
+        self._history = self.taps_per_phase - 1
+        self._work = np.zeros(self._history + max_block, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает историю (например, при открытии нового потока)."""
+        self._work[:self._history] = 0.0
+        self._time = 0
+
+    def max_output(self, block_length: int = None) -> int:
+        """Возвращает максимальное число выходных сэмплов для блока заданной длины."""
+        block_length = self.max_block if block_length is None else block_length
+        return -(-block_length * self.up // self.down) + 1
+
+    def process(self, block: np.ndarray, out: np.ndarray) -> int:
+        """Передискретизирует очередной блок.
+
+        Args:
+            block: Моно-блок сэмплов длиной не более max_block.
+            out: Выходной массив float32 длиной не менее max_output(len(block)).
+
+        Returns:
+            int: Число записанных в out сэмплов.
+        """
+        length = len(block)
+        if length > self.max_block:
+            raise ValueError(f"Блок из {length} сэмплов длиннее max_block={self.max_block}")
+        history = self._history
+        self._work[history:history + length] = block
+
+        # Выходной сэмпл n соответствует моменту time + n * down на повышенной частоте
+        last_time = length * self.up - 1
+        count = (last_time - self._time) // self.down + 1 if self._time <= last_time else 0
+        windows = np.lib.stride_tricks.sliding_window_view(self._work[:history + length], self.taps_per_phase)
+        for offset in range(min(self.up, count)):
+            moment = self._time + offset * self.down
+            start = moment // self.up
+            outputs = out[offset:count:self.up]
+            rows = windows[start:start + self.down * (len(outputs) - 1) + 1:self.down]
+            np.matmul(rows, self._phases[moment % self.up], out=outputs)
+
+        self._work[:history] = self._work[length:length + history]
+        self._time += count * self.down - length * self.up
+        return count
+
+
+class AudioBufferPool:
+    """Пул заранее выделенных буферов для аудио, передаваемого между потоками.
+
+    acquire возвращает массив поверх свободного буфера. Пул следит за
+    выданным массивом через weakref: буфер освобождается, когда удалены сам
+    массив и все производные от него срезы (они ссылаются на выданный
+    массив как на base), поэтому получателям не нужно возвращать буферы
+    явно. Если все буферы заняты, пул выделяет еще один.
+    """
+
+    def __init__(self, capacity: int, count: int = 2):
+        """Выделяет буферы.
+
+        Args:
+            capacity: Емкость буфера в сэмплах.
+            count: Число буферов, выделяемых сразу.
+        """
+        self.capacity = capacity
+        self._buffers = [np.zeros(capacity, dtype=np.float32) for _ in range(count)]
+        self._free = [True] * count
+        self.allocations = count
+
+    def acquire(self, length: int) -> np.ndarray:
+        """Возвращает буфер float32 длиной length (содержимое не очищается).
+
+        Args:
+            length: Нужная длина в сэмплах (не больше capacity).
+
+        Returns:
+            np.ndarray: Массив поверх свободного буфера.
+        """
+        if length > self.capacity:
+            raise ValueError(f"Запрошено {length} сэмплов при емкости буфера {self.capacity}")
+        try:
+            index = self._free.index(True)
+        except ValueError:
+            index = len(self._buffers)
+            self._buffers.append(np.zeros(self.capacity, dtype=np.float32))
+            self._free.append(True)
+            self.allocations += 1
+        self._free[index] = False
+        # Массив поверх memoryview, а не срез буфера: срезы выданного массива ссылаются
+        # на него самого, а не на буфер пула, и weakref срабатывает только после них
+        view = np.frombuffer(memoryview(self._buffers[index]), dtype=np.float32, count=length)
+        weakref.finalize(view, self._release, index)
+        return view
+
+    def _release(self, index: int):
+        self._free[index] = True
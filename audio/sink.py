@@ -0,0 +1,59 @@
+"""
+Отладочное сохранение аудио на диск (по умолчанию выключено).
+"""
+
+import os
+import threading
+import uuid
+import numpy as np
+import soundfile as sf
+from config import OUTPUT_DIR, DEBUG_AUDIO
+
+
+class DebugAudioSink:
+    """Сохраняет промежуточное аудио конвейера в WAV-файлы, если это включено.
+
+    Имена файлов содержат идентификатор сессии и номер записи, поэтому
+    параллельные сессии не перезаписывают файлы друг друга.
+    """
+
+    def __init__(self, enabled: bool = DEBUG_AUDIO, output_dir: str = OUTPUT_DIR):
+        """Инициализирует отладочный приемник аудио.
+
+        Args:
+            enabled: Сохранять ли аудио на диск.
+            output_dir: Папка для сохранения файлов.
+        """
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.session_id = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def write(self, audio: np.ndarray, sample_rate: int, name: str) -> str:
+        """Сохраняет аудио, если приемник включен.
+
+        Args:
+            audio: Аудиосигнал (float32).
+            sample_rate: Частота дискретизации.
+            name: Метка файла (например, 'recorded' или 'synthesized_fr').
+
+        Returns:
+            str: Путь к сохраненному файлу или None, если сохранение выключено.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._counter += 1
+            index = self._counter
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        output_path = os.path.join(self.output_dir, f"{self.session_id}_{index:04d}_{name}.wav")
+        try:
+            sf.write(output_path, audio, sample_rate, subtype='PCM_16')
+            print(f"Аудио сохранено: {output_path}")
+            return output_path
+        except Exception as e:
+            print(f"⚠ Не удалось сохранить отладочное аудио: {e}")
+            return None
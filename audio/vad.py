@@ -0,0 +1,182 @@
+"""
+Модуль для детекции речевой активности (VAD) и сегментации потока на фразы.
+"""
+
+import numpy as np
+from audio.processing import AudioBufferPool
+from utils.metrics import TRUNCATIONS
+
+
+def frame_rms(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """Вычисляет RMS-энергию аудио по кадрам фиксированной длины.
+
+    Args:
+        audio: Моно-сигнал (float32).
+        frame_length: Длина кадра в сэмплах. Неполный последний кадр отбрасывается.
+
+    Returns:
+        np.ndarray: Массив RMS-значений по кадрам.
+    """
+    n_frames = len(audio) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_length].reshape(n_frames, frame_length)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+class UtteranceSegmenter:
+    """Сегментатор непрерывного аудиопотока на отдельные фразы по энергии сигнала.
+
+    Сэмплы складываются в заранее выделенный кольцевой буфер, каждый кадр
+    классифицируется как речь или тишина. Фраза отдается сразу, как только
+    после речи накопилось достаточно тишины, либо при достижении
+    максимальной длины фразы.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = 30, energy_threshold: float = 0.01,
+                 min_speech_ms: int = 250, silence_ms: int = 700, pre_roll_ms: int = 300,
+                 max_utterance_s: float = 15.0, buffers: int = 0):
+        """Инициализирует сегментатор.
+
+        Args:
+            sample_rate: Частота дискретизации входного потока.
+            frame_ms: Длина кадра анализа в миллисекундах.
+            energy_threshold: Порог RMS, выше которого кадр считается речью.
+            min_speech_ms: Минимальная длительность речи во фразе, более короткие фразы отбрасываются.
+            silence_ms: Длительность тишины после речи, завершающая фразу.
+            pre_roll_ms: Сколько аудио до начала речи (и после ее конца) включать во фразу.
+            max_utterance_s: Максимальная длина фразы, после которой она отдается принудительно.
+            buffers: Число заранее выделенных буферов для фраз (0 - новый массив на каждую фразу).
+                Буфер переиспользуется, когда на отданную фразу не осталось ссылок.
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.energy_threshold = energy_threshold
+        self.min_speech_samples = int(sample_rate * min_speech_ms / 1000)
+        self.silence_samples = int(sample_rate * silence_ms / 1000)
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+        self.max_utterance_samples = int(sample_rate * max_utterance_s)
+
+        capacity = self.pre_roll_samples + self.max_utterance_samples + self.frame_length
+        self._ring = np.zeros(capacity, dtype=np.float32)
+        self._pending = np.zeros(self.frame_length, dtype=np.float32)
+        self._pool = AudioBufferPool(capacity, buffers) if buffers else None
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает состояние сегментатора без перевыделения буферов."""
+        self._written = 0
+        self._pending_len = 0
+        self._in_speech = False
+        self._start = 0
+        self._last_speech_end = 0
+        self._voiced_samples = 0
+
+    @property
+    def in_speech(self) -> bool:
+        """Идет ли сейчас фраза."""
+        return self._in_speech
+
+    def feed(self, block: np.ndarray) -> list:
+        """Подает очередной блок аудио в сегментатор.
+
+        Args:
+            block: Моно-блок сэмплов (float32).
+
+        Returns:
+            list: Список завершенных фраз (np.ndarray float32), возможно пустой.
+        """
+        utterances = []
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        pos = 0
+
+        if self._pending_len:
+            take = min(self.frame_length - self._pending_len, len(block))
+            self._pending[self._pending_len:self._pending_len + take] = block[:take]
+            self._pending_len += take
+            pos = take
+            if self._pending_len < self.frame_length:
+                return utterances
+            self._process_frame(self._pending, utterances)
+            self._pending_len = 0
+
+        while len(block) - pos >= self.frame_length:
+            self._process_frame(block[pos:pos + self.frame_length], utterances)
+            pos += self.frame_length
+
+        rest = len(block) - pos
+        if rest:
+            self._pending[:rest] = block[pos:]
+            self._pending_len = rest
+
+        return utterances
+
+    def flush(self):
+        """Завершает текущую фразу (например, при остановке записи).
+
+        Returns:
+            np.ndarray: Незавершенная фраза или None, если речи не было.
+        """
+        utterance = None
+        if self._in_speech:
+            utterance = self._finish(self._written)
+        self.reset()
+        return utterance
+
+    def _process_frame(self, frame: np.ndarray, utterances: list):
+        self._write(frame)
+        rms = float(np.sqrt(np.mean(np.square(frame))))
+        is_speech = rms >= self.energy_threshold
+
+        if not self._in_speech:
+            if is_speech:
+                self._in_speech = True
+                frame_start = self._written - self.frame_length
+                self._start = max(0, frame_start - self.pre_roll_samples)
+                self._last_speech_end = self._written
+                self._voiced_samples = self.frame_length
+            return
+
+        if is_speech:
+            self._last_speech_end = self._written
+            self._voiced_samples += self.frame_length
+
+        if self._written - self._last_speech_end >= self.silence_samples:
+            end = min(self._written, self._last_speech_end + self.pre_roll_samples)
+            utterance = self._finish(end)
+            if utterance is not None:
+                utterances.append(utterance)
+        elif self._written - self._start >= self.max_utterance_samples:
+            TRUNCATIONS.inc(component="vad")
+            utterance = self._finish(self._written)
+            if utterance is not None:
+                utterances.append(utterance)
+
+    def _finish(self, end: int):
+        utterance = None
+        if self._voiced_samples >= self.min_speech_samples:
+            utterance = self._read(self._start, end)
+        self._in_speech = False
+        self._voiced_samples = 0
+        return utterance
+
+    def _write(self, frame: np.ndarray):
+        capacity = len(self._ring)
+        offset = self._written % capacity
+        first = min(len(frame), capacity - offset)
+        self._ring[offset:offset + first] = frame[:first]
+        if first < len(frame):
+            self._ring[:len(frame) - first] = frame[first:]
+        self._written += len(frame)
+
+    def _read(self, start: int, end: int) -> np.ndarray:
+        capacity = len(self._ring)
+        start = max(start, end - capacity)
+        length = end - start
+        out = self._pool.acquire(length) if self._pool else np.empty(length, dtype=np.float32)
+        offset = start % capacity
+        first = min(length, capacity - offset)
+        out[:first] = self._ring[offset:offset + first]
+        if first < length:
+            out[first:] = self._ring[:length - first]
+        return out
@@ -0,0 +1,60 @@
+"""
+Пакетный перевод аудиофайлов: папка или манифест -> транскрипты, переводы и озвучка.
+
+Пример:
+    python batch_translate.py calls/ -o results/ --lang en --workers 4 --synthesize
+"""
+
+import argparse
+from core import BatchTranslator, discover_inputs
+from config import DEVICE, BATCH_WORKERS, print_gpu_info
+
+
+def parse_args():
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(description="Пакетный перевод русской речи из аудиофайлов")
+    parser.add_argument("source", help="Папка с аудиофайлами или файл-манифест (по одному пути на строку)")
+    parser.add_argument("-o", "--output", default="batch_output", help="Папка для результатов")
+    parser.add_argument("--lang", choices=["en", "fr"], default="en", help="Целевой язык")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Число параллельных обработчиков")
+    parser.add_argument("--synthesize", action="store_true", help="Также синтезировать речь на целевом языке")
+    return parser.parse_args()
+
+
+def main():
+    """Главная функция пакетного режима."""
+    args = parse_args()
+    print(f"Используется устройство: {DEVICE}")
+    print_gpu_info()
+
+    items = discover_inputs(args.source)
+    print(f"Найдено аудиофайлов: {len(items)}")
+    if not items:
+        return
+
+    from recognition import SpeechRecognizer
+    from translation import TextTranslator
+
+    recognizer = SpeechRecognizer()
+    translator = TextTranslator()
+    synthesizer = None
+    if args.synthesize:
+        from synthesis import SpeechSynthesizer
+        synthesizer = SpeechSynthesizer()
+
+    batch = BatchTranslator(
+        recognizer,
+        translator,
+        output_dir=args.output,
+        target_lang=args.lang,
+        synthesizer=synthesizer,
+        workers=args.workers
+    )
+    try:
+        batch.run(items)
+    except KeyboardInterrupt:
+        print("\n\nОбработка прервана. Повторный запуск продолжит с необработанных файлов.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Пакет бенчмарков производительности этапов перевода речи.
+"""
\ No newline at end of file
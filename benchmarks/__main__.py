@@ -0,0 +1,56 @@
+"""
+Бенчмарк этапов перевода речи.
+
+Примеры:
+    python -m benchmarks --backend stub --output bench/stub.json
+    python -m benchmarks --backend real --runs 5 --output bench/current.json --baseline bench/baseline.json
+"""
+
+import argparse
+import sys
+from benchmarks.runner import (
+    STAGES, run_benchmark, save_results, load_results, compare_results, print_results, print_comparison
+)
+
+
+def main() -> int:
+    """Точка входа бенчмарка. Возвращает 1, если найдена регрессия относительно базовых результатов."""
+    parser = argparse.ArgumentParser(description="Воспроизводимый бенчмарк этапов перевода речи")
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub",
+                        help="stub - заглушки без моделей (для CI), real - настоящие модели")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--runs", type=int, default=3, help="Число замеряемых проходов по корпусу")
+    parser.add_argument("--warmup", type=int, default=1, help="Число прогревочных проходов")
+    parser.add_argument("--lang", choices=["en", "fr"], default="en", help="Целевой язык")
+    parser.add_argument("--corpus", help="Папка с реальным корпусом (<имя>.wav + <имя>.txt)")
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    parser.add_argument("--baseline", help="JSON с базовыми результатами для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Допустимое относительное ухудшение при сравнении (по умолчанию 0.1)")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        backend=args.backend,
+        stages=args.stages,
+        runs=args.runs,
+        warmup=args.warmup,
+        target_lang=args.lang,
+        corpus_dir=args.corpus
+    )
+    print_results(results)
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"Результаты сохранены: {args.output}")
+
+    if args.baseline:
+        rows = compare_results(results, load_results(args.baseline), args.tolerance)
+        print_comparison(rows, args.tolerance)
+        if any(row[-1] for row in rows):
+            print("⚠ Обнаружена регрессия производительности")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
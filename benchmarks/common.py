@@ -0,0 +1,60 @@
+"""
+Общие функции бенчмарков: перцентили задержек и замер памяти.
+"""
+
+import sys
+
+
+def percentile(values: list, q: float) -> float:
+    """Вычисляет перцентиль с линейной интерполяцией.
+
+    Args:
+        values: Значения (например, задержки в секундах).
+        q: Перцентиль от 0 до 100.
+
+    Returns:
+        float: Значение перцентиля (0.0 для пустого списка).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_latencies(latencies: list) -> dict:
+    """Сводная статистика задержек: среднее, p50, p95, p99, минимум и максимум."""
+    if not latencies:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "min": 0.0, "max": 0.0}
+    return {
+        "count": len(latencies),
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "min": min(latencies),
+        "max": max(latencies),
+    }
+
+
+def peak_rss_mb():
+    """Возвращает пиковое потребление оперативной памяти процессом в MB.
+
+    Returns:
+        float: Пиковый RSS в MB или None, если его не удалось определить.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        return getattr(memory, "peak_wset", memory.rss) / 1024 ** 2
+    except ImportError:
+        return None
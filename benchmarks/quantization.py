@@ -0,0 +1,167 @@
+"""
+Бенчмарк профилей инференса на CPU: задержка и память float32 против int8 (и PyTorch против CTranslate2 для перевода).
+
+Каждый вариант запускается в отдельном процессе, чтобы пиковое потребление
+памяти одного варианта не влияло на замер другого.
+
+Запуск:
+    python -m benchmarks.quantization --audio sample.wav --runs 5
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from benchmarks.common import peak_rss_mb, summarize_latencies
+
+SAMPLE_TEXTS = [
+    "Добрый день, проверка связи.",
+    "Пожалуйста, подтвердите получение груза на складе номер три.",
+    "Совещание переносится на завтра на десять часов утра, просьба всем участникам быть вовремя.",
+]
+
+VARIANTS = {
+    "recognizer": {
+        "float32": {"cpu_compute_type": "float32"},
+        "int8": {"cpu_compute_type": "int8"},
+        "int8_float32": {"cpu_compute_type": "int8_float32"},
+    },
+    "translator": {
+        "float32": {"backend": "torch", "quantize": False},
+        "int8": {"backend": "torch", "quantize": True},
+        "ct2_float32": {"backend": "ctranslate2", "compute_type": "float32"},
+        "ct2_int8": {"backend": "ctranslate2", "compute_type": "int8"},
+    },
+}
+
+
+def _run_variant(component: str, variant: str, audio_path: str, runs: int, threads: int, results):
+    """Загружает вариант компонента в дочернем процессе и замеряет задержку и память."""
+    os.environ["TRANSLATION_CACHE"] = "0"
+    os.environ["DEVICE"] = "cpu"
+
+    baseline_rss = peak_rss_mb()
+    params = dict(VARIANTS[component][variant])
+    load_start = time.time()
+
+    if component == "recognizer":
+        import numpy as np
+        from recognition import SpeechRecognizer
+        from recognition.recognizer import WHISPER_SAMPLE_RATE
+
+        model = SpeechRecognizer(cpu_threads=threads, device="cpu", **params)
+        if audio_path:
+            import soundfile as sf
+            from audio.processing import resample_audio, to_mono_float32
+            data, sample_rate = sf.read(audio_path, dtype="float32")
+            sample = resample_audio(to_mono_float32(data), sample_rate, WHISPER_SAMPLE_RATE)
+        else:
+            rng = np.random.default_rng(0)
+            sample = (0.05 * rng.standard_normal(5 * WHISPER_SAMPLE_RATE)).astype(np.float32)
+
+        def infer():
+            model.recognize(sample)
+    else:
+        from translation import TextTranslator
+
+        model = TextTranslator(num_threads=threads, device="cpu", **params)
+
+        def infer():
+            for text in SAMPLE_TEXTS:
+                model._generate_batch([text], model.nllb_languages["en"])
+
+    load_time = time.time() - load_start
+    loaded_rss = peak_rss_mb()
+
+    infer()
+    latencies = []
+    for _ in range(runs):
+        step_start = time.time()
+        infer()
+        latencies.append(time.time() - step_start)
+
+    results.put({
+        "component": component,
+        "variant": variant,
+        "load_time": load_time,
+        "latency": summarize_latencies(latencies),
+        "model_rss_mb": (loaded_rss - baseline_rss) if loaded_rss is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def run(components: list, audio_path: str = None, runs: int = 5, threads: int = 0) -> list:
+    """Запускает бенчмарк всех вариантов указанных компонентов.
+
+    Args:
+        components: Компоненты ('recognizer', 'translator').
+        audio_path: Путь к аудиофайлу с русской речью для распознавания.
+        runs: Число замеряемых прогонов на вариант (после одного прогревочного).
+        threads: Число потоков инференса (0 - по умолчанию).
+
+    Returns:
+        list: Результаты по вариантам.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for component in components:
+        for variant in VARIANTS[component]:
+            print(f"\n▶ {component} / {variant}...")
+            queue = context.Queue()
+            process = context.Process(
+                target=_run_variant, args=(component, variant, audio_path, runs, threads, queue)
+            )
+            process.start()
+            process.join()
+            if process.exitcode != 0 or queue.empty():
+                print(f"⚠ Вариант {component}/{variant} завершился с ошибкой (код {process.exitcode})")
+                continue
+            results.append(queue.get())
+    return results
+
+
+def print_results(results: list):
+    """Выводит сравнение вариантов с float32 по задержке и памяти."""
+    baselines = {r["component"]: r for r in results if r["variant"] == "float32"}
+    print("\n" + "=" * 78)
+    print("СРАВНЕНИЕ ПРОФИЛЕЙ ИНФЕРЕНСА НА CPU")
+    print("=" * 78)
+    print(f"{'Компонент':<12}{'Вариант':<14}{'p50, с':>9}{'p95, с':>9}{'Ускор.':>9}"
+          f"{'Модель, MB':>12}{'Пик RSS, MB':>13}")
+    for r in results:
+        baseline = baselines.get(r["component"])
+        speedup = ""
+        if baseline and r["latency"]["p50"] > 0:
+            speedup = f"{baseline['latency']['p50'] / r['latency']['p50']:.2f}x"
+        model_mb = f"{r['model_rss_mb']:.0f}" if r["model_rss_mb"] is not None else "-"
+        peak_mb = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['component']:<12}{r['variant']:<14}{r['latency']['p50']:>9.3f}{r['latency']['p95']:>9.3f}"
+              f"{speedup:>9}{model_mb:>12}{peak_mb:>13}")
+    print("=" * 78)
+
+
+def main():
+    """Точка входа бенчмарка профилей инференса."""
+    parser = argparse.ArgumentParser(description="Сравнение задержки и памяти float32 и int8 на CPU")
+    parser.add_argument("--components", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--audio", help="Аудиофайл с русской речью для распознавания")
+    parser.add_argument("--runs", type=int, default=5, help="Число замеряемых прогонов на вариант")
+    parser.add_argument("--threads", type=int, default=0, help="Число потоков инференса (0 - по умолчанию)")
+    parser.add_argument("--output", help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    if "recognizer" in args.components and not args.audio:
+        print("ℹ Аудиофайл не указан (--audio): распознавание замеряется на синтетическом шуме")
+
+    results = run(args.components, args.audio, args.runs, args.threads)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
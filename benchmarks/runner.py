@@ -0,0 +1,239 @@
+"""
+Запуск бенчмарка этапов и полного конвейера, сохранение и сравнение результатов.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from benchmarks.common import peak_rss_mb, summarize_latencies
+from benchmarks.corpus import load_corpus
+
+STAGES = ("recognize", "translate", "synthesize", "pipeline")
+
+# Метрики, по которым результат сравнивается с базовым (больше - хуже)
+COMPARED_METRICS = ("p50", "p95", "p99")
+
+
+def load_backends(backend: str, stages: list) -> dict:
+    """Создает компоненты для бенчмарка.
+
+    Args:
+        backend: 'stub' (заглушки без моделей) или 'real' (настоящие модели).
+        stages: Замеряемые этапы (загружаются только нужные компоненты).
+
+    Returns:
+        dict: Компоненты 'recognizer', 'translator', 'synthesizer' (None для ненужных).
+    """
+    need = {
+        "recognizer": any(stage in stages for stage in ("recognize", "pipeline")),
+        "translator": any(stage in stages for stage in ("translate", "synthesize", "pipeline")),
+        "synthesizer": any(stage in stages for stage in ("synthesize", "pipeline")),
+    }
+
+    if backend == "stub":
+        from benchmarks.stubs import StubRecognizer, StubTranslator, StubSynthesizer
+        factories = {"recognizer": StubRecognizer, "translator": StubTranslator, "synthesizer": StubSynthesizer}
+    elif backend == "real":
+        from recognition import SpeechRecognizer
+        from translation import TextTranslator
+        from synthesis import SpeechSynthesizer
+        # Кэши результатов отключаются явно (config к этому моменту уже мог быть импортирован
+        # загрузкой корпуса), иначе повторные прогоны замеряли бы попадания в кэш
+        factories = {
+            "recognizer": SpeechRecognizer,
+            "translator": lambda: TextTranslator(use_cache=False),
+            "synthesizer": lambda: SpeechSynthesizer(use_cache=False),
+        }
+    else:
+        raise ValueError(f"Неизвестный backend: {backend}. Используйте 'stub' или 'real'")
+
+    return {name: factories[name]() if needed else None for name, needed in need.items()}
+
+
+def _count_tokens(translator, text: str) -> int:
+    tokenizer = getattr(translator, "tokenizer", None)
+    if tokenizer is not None:
+        return len(tokenizer(text)["input_ids"])
+    return len(text.split())
+
+
+def _vram_peak_mb():
+    try:
+        import torch
+    except ImportError:
+        return None
+    if not torch.cuda.is_available():
+        return None
+    return torch.cuda.max_memory_allocated() / 1024 ** 2
+
+
+def _stage_result(latencies: list, audio_seconds: float = 0.0, output_seconds: float = 0.0,
+                  tokens: int = 0) -> dict:
+    total = sum(latencies)
+    result = {"latency": summarize_latencies(latencies)}
+    if audio_seconds:
+        result["real_time_factor"] = total / audio_seconds
+    if output_seconds:
+        result["real_time_factor"] = total / output_seconds
+    if tokens:
+        result["tokens_per_sec"] = tokens / total if total > 0 else 0.0
+    return result
+
+
+def run_benchmark(backend: str = "stub", stages: list = STAGES, runs: int = 3, warmup: int = 1,
+                  target_lang: str = "en", corpus_dir: str = None) -> dict:
+    """Выполняет бенчмарк выбранных этапов на фиксированном корпусе.
+
+    Для распознавания RTF считается относительно длительности входного аудио,
+    для синтеза - относительно длительности синтезированного аудио, для
+    конвейера - относительно входного аудио.
+
+    Args:
+        backend: 'stub' или 'real'.
+        stages: Замеряемые этапы из STAGES.
+        runs: Число замеряемых проходов по корпусу.
+        warmup: Число прогревочных проходов (не учитываются).
+        target_lang: Целевой язык перевода и синтеза.
+        corpus_dir: Папка с реальным корпусом (см. load_corpus).
+
+    Returns:
+        dict: Результаты с метаданными, метриками этапов и памятью.
+    """
+    corpus = load_corpus(corpus_dir)
+    components = load_backends(backend, stages)
+    recognizer = components["recognizer"]
+    translator = components["translator"]
+    synthesizer = components["synthesizer"]
+
+    texts = [item["text"] for item in corpus]
+    translations = None
+    if "synthesize" in stages:
+        translations = [translator.translate(text, target_lang=target_lang) for text in texts]
+
+    results = {}
+    for stage in stages:
+        latencies = []
+        audio_seconds = 0.0
+        output_seconds = 0.0
+        tokens = 0
+        for iteration in range(warmup + runs):
+            measured = iteration >= warmup
+            for index, item in enumerate(corpus):
+                step_start = time.perf_counter()
+                if stage == "recognize":
+                    recognizer.recognize(item["audio"], sample_rate=item["sample_rate"])
+                elif stage == "translate":
+                    output = translator.translate(item["text"], target_lang=target_lang)
+                elif stage == "synthesize":
+                    synthesized = synthesizer.synthesize(translations[index], target_lang=target_lang)
+                elif stage == "pipeline":
+                    text = recognizer.recognize(item["audio"], sample_rate=item["sample_rate"])
+                    output = translator.translate(text, target_lang=target_lang) if text else ""
+                    if output:
+                        synthesizer.synthesize(output, target_lang=target_lang)
+                elapsed = time.perf_counter() - step_start
+
+                if not measured:
+                    continue
+                latencies.append(elapsed)
+                if stage in ("recognize", "pipeline"):
+                    audio_seconds += len(item["audio"]) / item["sample_rate"]
+                elif stage == "translate":
+                    tokens += _count_tokens(translator, output)
+                elif stage == "synthesize" and synthesized is not None:
+                    output_seconds += len(synthesized[0]) / synthesized[1]
+
+        results[stage] = _stage_result(latencies, audio_seconds, output_seconds, tokens)
+        print(f"✓ {stage}: p50={results[stage]['latency']['p50']:.3f}с "
+              f"p95={results[stage]['latency']['p95']:.3f}с")
+
+    return {
+        "meta": {
+            "backend": backend,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "runs": runs,
+            "warmup": warmup,
+            "corpus_size": len(corpus),
+            "target_lang": target_lang,
+        },
+        "stages": results,
+        "memory": {"peak_rss_mb": peak_rss_mb(), "peak_vram_mb": _vram_peak_mb()},
+    }
+
+
+def save_results(results: dict, path: str):
+    """Сохраняет результаты бенчмарка в JSON."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> dict:
+    """Загружает результаты бенчмарка из JSON."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = 0.1) -> list:
+    """Сравнивает результаты с базовыми.
+
+    Args:
+        current: Текущие результаты.
+        baseline: Базовые результаты.
+        tolerance: Допустимое относительное ухудшение (0.1 = 10%).
+
+    Returns:
+        list: Строки сравнения (stage, metric, baseline, current, change, regressed).
+    """
+    rows = []
+    for stage, result in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            base_value = base["latency"].get(metric, 0.0)
+            value = result["latency"].get(metric, 0.0)
+            change = (value - base_value) / base_value if base_value > 0 else 0.0
+            rows.append((stage, metric, base_value, value, change, change > tolerance))
+
+    base_rss = baseline.get("memory", {}).get("peak_rss_mb")
+    rss = current.get("memory", {}).get("peak_rss_mb")
+    if base_rss and rss:
+        change = (rss - base_rss) / base_rss
+        rows.append(("memory", "peak_rss_mb", base_rss, rss, change, change > tolerance))
+    return rows
+
+
+def print_results(results: dict):
+    """Выводит таблицу результатов бенчмарка."""
+    print("\n" + "=" * 78)
+    print(f"РЕЗУЛЬТАТЫ БЕНЧМАРКА (backend: {results['meta']['backend']})")
+    print("=" * 78)
+    print(f"{'Этап':<12}{'p50, с':>9}{'p95, с':>9}{'p99, с':>9}{'RTF':>9}{'Токен/с':>10}")
+    for stage, result in results["stages"].items():
+        latency = result["latency"]
+        rtf = f"{result['real_time_factor']:.3f}" if "real_time_factor" in result else "-"
+        tps = f"{result['tokens_per_sec']:.1f}" if "tokens_per_sec" in result else "-"
+        print(f"{stage:<12}{latency['p50']:>9.3f}{latency['p95']:>9.3f}{latency['p99']:>9.3f}{rtf:>9}{tps:>10}")
+    memory = results["memory"]
+    rss = f"{memory['peak_rss_mb']:.0f} MB" if memory["peak_rss_mb"] is not None else "-"
+    vram = f"{memory['peak_vram_mb']:.0f} MB" if memory["peak_vram_mb"] is not None else "-"
+    print("-" * 78)
+    print(f"Пиковый RSS: {rss}, пиковая VRAM: {vram}")
+    print("=" * 78)
+
+
+def print_comparison(rows: list, tolerance: float):
+    """Выводит сравнение с базовыми результатами."""
+    print("\n" + "=" * 78)
+    print(f"СРАВНЕНИЕ С БАЗОВЫМИ РЕЗУЛЬТАТАМИ (допуск {tolerance:.0%})")
+    print("=" * 78)
+    print(f"{'Этап':<12}{'Метрика':<14}{'База':>10}{'Сейчас':>10}{'Изменение':>12}")
+    for stage, metric, base_value, value, change, regressed in rows:
+        mark = "  ⚠ регрессия" if regressed else ""
+        print(f"{stage:<12}{metric:<14}{base_value:>10.3f}{value:>10.3f}{change:>+11.1%}{mark}")
+    print("=" * 78)
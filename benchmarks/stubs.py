@@ -0,0 +1,97 @@
+"""
+Легкие заглушки распознавателя, переводчика и синтезатора для бенчмарков без моделей.
+
+Заглушки повторяют интерфейсы SpeechRecognizer, TextTranslator и SpeechSynthesizer
+и имитируют стоимость инференса детерминированными задержками, пропорциональными
+размеру входа, поэтому бенчмарк с ними воспроизводим и подходит для CI.
+"""
+
+import time
+import numpy as np
+
+
+class StubRecognizer:
+    """Заглушка распознавателя: задержка пропорциональна длительности аудио."""
+
+    def __init__(self, real_time_factor: float = 0.05, overhead: float = 0.005):
+        """Инициализирует заглушку.
+
+        Args:
+            real_time_factor: Время обработки на секунду аудио.
+            overhead: Постоянные накладные расходы на вызов в секундах.
+        """
+        self.real_time_factor = real_time_factor
+        self.overhead = overhead
+
+    def warmup(self):
+        """Прогрев не требуется."""
+
+    def recognize(self, audio, language: str = "ru", sample_rate: int = 16000) -> str:
+        """Возвращает детерминированный текст по длительности аудио."""
+        duration = len(audio) / sample_rate
+        time.sleep(self.overhead + self.real_time_factor * duration)
+        words = max(1, int(duration * 2.5))
+        return " ".join(f"слово{i}" for i in range(words))
+
+
+class StubTranslator:
+    """Заглушка переводчика: задержка пропорциональна числу слов."""
+
+    def __init__(self, seconds_per_token: float = 0.002, overhead: float = 0.005):
+        """Инициализирует заглушку.
+
+        Args:
+            seconds_per_token: Время генерации одного токена.
+            overhead: Постоянные накладные расходы на вызов в секундах.
+        """
+        self.seconds_per_token = seconds_per_token
+        self.overhead = overhead
+
+    def warmup(self):
+        """Прогрев не требуется."""
+
+    def translate(self, text: str, target_lang: str = "fr") -> str:
+        """Возвращает детерминированный «перевод» той же длины в словах."""
+        words = text.split()
+        time.sleep(self.overhead + self.seconds_per_token * len(words))
+        return " ".join(f"{target_lang}{i}" for i in range(len(words)))
+
+    def translate_batch(self, texts: list, target_lang: str = "fr", max_batch_tokens: int = 2048) -> list:
+        """Пакетный «перевод»: одна задержка на пакет по самому длинному тексту."""
+        longest = max((len(text.split()) for text in texts), default=0)
+        time.sleep(self.overhead + self.seconds_per_token * longest)
+        return [" ".join(f"{target_lang}{i}" for i in range(len(text.split()))) for text in texts]
+
+
+class StubSynthesizer:
+    """Заглушка синтезатора: тон длительностью по длине текста, задержка пропорциональна длительности."""
+
+    def __init__(self, real_time_factor: float = 0.1, overhead: float = 0.01, sample_rate: int = 24000):
+        """Инициализирует заглушку.
+
+        Args:
+            real_time_factor: Время генерации на секунду аудио.
+            overhead: Постоянные накладные расходы на вызов в секундах.
+            sample_rate: Частота дискретизации результата.
+        """
+        self.real_time_factor = real_time_factor
+        self.overhead = overhead
+        self.sample_rate = sample_rate
+
+    def warmup(self):
+        """Прогрев не требуется."""
+
+    def synthesize(self, text: str, target_lang: str = "fr"):
+        """Возвращает тон длительностью ~14 символов в секунду."""
+        if not text or not text.strip():
+            return None
+        duration = max(0.5, len(text) / 14.0)
+        time.sleep(self.overhead + self.real_time_factor * duration)
+        t = np.arange(int(duration * self.sample_rate)) / self.sample_rate
+        return (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), self.sample_rate
+
+    def synthesize_stream(self, text: str, target_lang: str = "fr", max_chunk_chars: int = 150):
+        """Отдает результат synthesize одним фрагментом."""
+        result = self.synthesize(text, target_lang)
+        if result is not None:
+            yield result
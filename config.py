@@ -13,9 +13,126 @@ HF_TOKEN = os.getenv("HF_TOKEN", None)
 if HF_TOKEN:
     os.environ["HF_TOKEN"] = HF_TOKEN
 
-SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "44100"))
+# Частота захвата с микрофона; по умолчанию родная частота Whisper, чтобы не передискретизировать
+SAMPLE_RATE = int(os.getenv("SAMPLE_RATE", "16000"))
+# Частота, на которой открывается устройство записи (0 - SAMPLE_RATE, если устройство ее
+# поддерживает, иначе частота устройства по умолчанию с потоковой передискретизацией)
+CAPTURE_DEVICE_RATE = int(os.getenv("CAPTURE_DEVICE_RATE", "0"))
+# Число заранее выделенных буферов для записанных фраз (пул растет, если все заняты)
+CAPTURE_BUFFERS = int(os.getenv("CAPTURE_BUFFERS", "4"))
 RECORD_DURATION = int(os.getenv("RECORD_DURATION", "5"))
 OUTPUT_DIR = "temp_audio"
+# Сохранять ли промежуточное аудио (запись и синтез) в OUTPUT_DIR для отладки
+DEBUG_AUDIO = os.getenv("DEBUG_AUDIO", "0") == "1"
+
+# Режим захвата: "fixed" - запись фиксированной длины по Enter, "vad" - непрерывный захват с сегментацией по речи
+CAPTURE_MODE = os.getenv("CAPTURE_MODE", "fixed").lower()
+VAD_ENERGY_THRESHOLD = float(os.getenv("VAD_ENERGY_THRESHOLD", "0.01"))
+VAD_SILENCE_MS = int(os.getenv("VAD_SILENCE_MS", "700"))
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+VAD_PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", "300"))
+VAD_MAX_UTTERANCE_S = float(os.getenv("VAD_MAX_UTTERANCE_S", "15"))
+
+# Шлюз тишины перед распознаванием: запись, в которой речи (кадров с RMS не ниже порога)
+# меньше SILENCE_GATE_MIN_SPEECH_MS, не распознается; тишина в начале и в конце обрезается
+# с запасом SILENCE_GATE_PAD_MS
+SILENCE_GATE = os.getenv("SILENCE_GATE", "1") == "1"
+SILENCE_GATE_THRESHOLD = float(os.getenv("SILENCE_GATE_THRESHOLD", str(VAD_ENERGY_THRESHOLD)))
+SILENCE_GATE_MIN_SPEECH_MS = int(os.getenv("SILENCE_GATE_MIN_SPEECH_MS", "150"))
+SILENCE_GATE_PAD_MS = int(os.getenv("SILENCE_GATE_PAD_MS", "200"))
+# Сегменты Whisper с вероятностью отсутствия речи выше RECOGNITION_NO_SPEECH_THRESHOLD
+# или средним log-prob токенов ниже RECOGNITION_LOGPROB_THRESHOLD отбрасываются
+# и не доходят до перевода и синтеза
+RECOGNITION_NO_SPEECH_THRESHOLD = float(os.getenv("RECOGNITION_NO_SPEECH_THRESHOLD", "0.6"))
+RECOGNITION_LOGPROB_THRESHOLD = float(os.getenv("RECOGNITION_LOGPROB_THRESHOLD", "-1.0"))
+
+# Конвейерный режим: этапы работают параллельно, соединенные ограниченными очередями
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "0") == "1"
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+# Продолжать ли захват во время воспроизведения (только с наушниками, иначе перевод попадет в микрофон)
+CAPTURE_DURING_PLAYBACK = os.getenv("CAPTURE_DURING_PLAYBACK", "0") == "1"
+
+# Потоковый синтез: текст делится на фрагменты, воспроизведение начинается после первого фрагмента
+STREAMING_SYNTHESIS = os.getenv("STREAMING_SYNTHESIS", "1") == "1"
+# Максимальная длина фрагмента для синтеза в символах (по умолчанию - из уровня SYNTHESIS_TIER)
+SYNTHESIS_CHUNK_CHARS = int(os.getenv("SYNTHESIS_CHUNK_CHARS", "0"))
+
+# Уровни синтеза Bark: бюджет семантических токенов (~50 токенов на секунду речи) ограничивает
+# длительность фрагмента, а с ней и время генерации всех трех стадий Bark; длина контекста
+# и окна грубой стадии, температуры выборки и максимальная длина фрагмента текста,
+# который укладывается в бюджет
+SYNTHESIS_TIERS = {
+    "fast": {
+        "semantic_max_new_tokens": 256,
+        "max_coarse_history": 315,
+        "sliding_window_len": 60,
+        "semantic_temperature": 0.6,
+        "coarse_temperature": 0.6,
+        "fine_temperature": 0.5,
+        "max_chunk_chars": 70,
+    },
+    "balanced": {
+        "semantic_max_new_tokens": 512,
+        "max_coarse_history": 630,
+        "sliding_window_len": 60,
+        "semantic_temperature": 0.7,
+        "coarse_temperature": 0.7,
+        "fine_temperature": 0.5,
+        "max_chunk_chars": 150,
+    },
+    "quality": {
+        "semantic_max_new_tokens": 768,
+        "max_coarse_history": 630,
+        "sliding_window_len": 60,
+        "semantic_temperature": 0.7,
+        "coarse_temperature": 0.7,
+        "fine_temperature": 0.5,
+        "max_chunk_chars": 220,
+    },
+}
+
+SYNTHESIS_TIER = os.getenv("SYNTHESIS_TIER", "balanced").lower()
+if SYNTHESIS_TIER not in SYNTHESIS_TIERS:
+    print(f"⚠ Неизвестный уровень синтеза: {SYNTHESIS_TIER}. Используется 'balanced'")
+    SYNTHESIS_TIER = "balanced"
+
+# Голоса Bark по языкам (history prompt), загружаются один раз при запуске.
+# Формат: "en=v2/en_speaker_6,fr=v2/fr_speaker_1"; "none" - без голоса (случайный голос)
+SYNTHESIS_VOICES = {}
+for _entry in os.getenv("SYNTHESIS_VOICES", "en=v2/en_speaker_6,fr=v2/fr_speaker_1").split(","):
+    if "=" in _entry:
+        _lang, _voice = (part.strip() for part in _entry.split("=", 1))
+        if _voice and _voice.lower() != "none":
+            SYNTHESIS_VOICES[_lang] = _voice
+
+# Постобработка синтезированной речи, выполняемая потоково по фрагментам: частота среза
+# фильтра высоких частот (Гц, 0 - без фильтра), целевой пик нормализации, максимальное
+# усиление тихой речи и упреждение нормализации (мс, на столько задерживается выход)
+SYNTHESIS_HIGHPASS_HZ = float(os.getenv("SYNTHESIS_HIGHPASS_HZ", "120"))
+SYNTHESIS_PEAK = float(os.getenv("SYNTHESIS_PEAK", "0.9"))
+SYNTHESIS_MAX_GAIN = float(os.getenv("SYNTHESIS_MAX_GAIN", "10"))
+SYNTHESIS_LOOKAHEAD_MS = float(os.getenv("SYNTHESIS_LOOKAHEAD_MS", "10"))
+# Частота, в которую передискретизируется синтезированная речь для воспроизведения
+# (0 - частота модели Bark, 24000)
+PLAYBACK_SAMPLE_RATE = int(os.getenv("PLAYBACK_SAMPLE_RATE", "0"))
+# Объем аудио, накапливаемый перед началом воспроизведения фразы и после опустошения очереди (мс)
+PLAYBACK_JITTER_MS = float(os.getenv("PLAYBACK_JITTER_MS", "60"))
+# Размер блока потока воспроизведения (мс)
+PLAYBACK_BLOCK_MS = float(os.getenv("PLAYBACK_BLOCK_MS", "20"))
+# Прерывать воспроизведение перевода, когда пользователь начинает говорить
+# (действует в конвейерном режиме вместе с CAPTURE_DURING_PLAYBACK=1).
+# Без эхоподавления (гарнитура или AEC в системе) микрофон слышит собственный
+# вывод переводчика, и воспроизведение будет прерывать само себя.
+BARGE_IN = os.getenv("BARGE_IN", "1") == "1"
+
+# Потоковое распознавание (вместе с STREAMING_SYNTHESIS): сегменты faster-whisper
+# фиксируются по завершенным предложениям и переводятся, пока распознается остальная речь.
+# STREAMING_COMMIT_MIN_CHARS - минимальная длина фиксируемого фрагмента,
+# STREAMING_COMMIT_MAX_PENDING_CHARS - длина незавершенного предложения, после которой
+# оно фиксируется по границам клауз
+STREAMING_RECOGNITION = os.getenv("STREAMING_RECOGNITION", "1") == "1"
+STREAMING_COMMIT_MIN_CHARS = int(os.getenv("STREAMING_COMMIT_MIN_CHARS", "20"))
+STREAMING_COMMIT_MAX_PENDING_CHARS = int(os.getenv("STREAMING_COMMIT_MAX_PENDING_CHARS", "200"))
 
 MODELS_DIR = os.getenv("MODELS_DIR", "models")
 os.makedirs(MODELS_DIR, exist_ok=True)
@@ -26,6 +143,36 @@ HF_MODELS_DIR = os.path.join(MODELS_DIR, "huggingface")
 os.makedirs(WHISPER_MODELS_DIR, exist_ok=True)
 os.makedirs(HF_MODELS_DIR, exist_ok=True)
 
+# Папка для кэшей результатов (переводы, синтезированное аудио)
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+
+# Движок перевода NLLB: ctranslate2 (модель конвертируется один раз в HF_MODELS_DIR/ctranslate2)
+# или torch (transformers generate). Тип вычислений CTranslate2 задается профилем инференса
+# или TRANSLATION_COMPUTE_TYPE (auto, int8, int8_float16, int8_float32, float16, float32)
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "ctranslate2").lower()
+
+# Кэш переводов: LRU в памяти + постоянное хранилище SQLite в CACHE_DIR
+TRANSLATION_CACHE = os.getenv("TRANSLATION_CACHE", "1") == "1"
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "1024"))
+TRANSLATION_CACHE_MAX_MB = float(os.getenv("TRANSLATION_CACHE_MAX_MB", "64"))
+# Файл с частыми фразами (по одной на строку) для прогрева кэша переводов при запуске
+TRANSLATION_CACHE_WARMUP_FILE = os.getenv("TRANSLATION_CACHE_WARMUP_FILE", None)
+
+# Максимальное число токенов (с учетом дополнения) в одном пакете пакетного перевода
+TRANSLATION_MAX_BATCH_TOKENS = int(os.getenv("TRANSLATION_MAX_BATCH_TOKENS", "2048"))
+
+# Длинный текст переводится окнами: до TRANSLATION_CONTEXT_SENTENCES предыдущих предложений
+# вместе с текущим, но не длиннее TRANSLATION_WINDOW_CHARS символов
+TRANSLATION_CONTEXT_SENTENCES = int(os.getenv("TRANSLATION_CONTEXT_SENTENCES", "2"))
+TRANSLATION_WINDOW_CHARS = int(os.getenv("TRANSLATION_WINDOW_CHARS", "400"))
+
+# Кэш синтезированного аудио: файлы .npy в CACHE_DIR с бюджетом размера и LRU-вытеснением
+AUDIO_CACHE = os.getenv("AUDIO_CACHE", "1") == "1"
+AUDIO_CACHE_MAX_MB = float(os.getenv("AUDIO_CACHE_MAX_MB", "256"))
+AUDIO_CACHE_DTYPE = os.getenv("AUDIO_CACHE_DTYPE", "int16")
+# Фиксировать зерно генерации Bark по ключу кэша, чтобы одна фраза всегда звучала одинаково
+AUDIO_CACHE_DETERMINISTIC = os.getenv("AUDIO_CACHE_DETERMINISTIC", "0") == "1"
+
 os.environ["WHISPER_CACHE_DIR"] = WHISPER_MODELS_DIR
 os.environ["HF_HOME"] = HF_MODELS_DIR
 os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
@@ -36,6 +183,101 @@ if DEVICE_ENV in ["cuda", "cpu"]:
 else:
     DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
+# Профили инференса: тип вычислений faster-whisper на CPU, динамическое квантование
+# Linear-слоев NLLB (движок torch), тип вычислений NLLB в CTranslate2 и число потоков
+# для этапов распознавания и перевода (0 - по умолчанию). В профилях cpu-* ядра делятся
+# между этапами пополам: в конвейере распознавание и перевод работают одновременно
+_CPU_CORES = os.cpu_count() or 4
+_RECOGNIZER_CORES = max(1, _CPU_CORES // 2)
+_TRANSLATOR_CORES = max(1, _CPU_CORES - _RECOGNIZER_CORES)
+INFERENCE_PROFILES = {
+    "default": {
+        "whisper_cpu_compute_type": "float32",
+        "quantize_translator": False,
+        "translator_compute_type": "auto",
+        "recognizer_threads": 0,
+        "translator_threads": 0,
+    },
+    "cpu-int8": {
+        "whisper_cpu_compute_type": "int8",
+        "quantize_translator": True,
+        "translator_compute_type": "int8",
+        "recognizer_threads": _RECOGNIZER_CORES,
+        "translator_threads": _TRANSLATOR_CORES,
+    },
+    "cpu-int8-float32": {
+        "whisper_cpu_compute_type": "int8_float32",
+        "quantize_translator": True,
+        "translator_compute_type": "int8_float32",
+        "recognizer_threads": _RECOGNIZER_CORES,
+        "translator_threads": _TRANSLATOR_CORES,
+    },
+}
+
+DEVICE_PROFILE = os.getenv("DEVICE_PROFILE", "default").lower()
+if DEVICE_PROFILE not in INFERENCE_PROFILES:
+    print(f"⚠ Неизвестный профиль инференса: {DEVICE_PROFILE}. Используется 'default'")
+    DEVICE_PROFILE = "default"
+if DEVICE_PROFILE.startswith("cpu-"):
+    DEVICE = "cpu"
+
+INFERENCE_PROFILE = dict(INFERENCE_PROFILES[DEVICE_PROFILE])
+if os.getenv("RECOGNIZER_THREADS"):
+    INFERENCE_PROFILE["recognizer_threads"] = int(os.getenv("RECOGNIZER_THREADS"))
+if os.getenv("TRANSLATOR_THREADS"):
+    INFERENCE_PROFILE["translator_threads"] = int(os.getenv("TRANSLATOR_THREADS"))
+if os.getenv("TRANSLATION_COMPUTE_TYPE"):
+    INFERENCE_PROFILE["translator_compute_type"] = os.getenv("TRANSLATION_COMPUTE_TYPE").lower()
+
+# Число параллельных обработчиков в пакетном режиме (batch_translate.py)
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "2"))
+
+# Загружать модели параллельно и прогревать их коротким инференсом при запуске
+PARALLEL_MODEL_LOADING = os.getenv("PARALLEL_MODEL_LOADING", "1") == "1"
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "1") == "1"
+
+# Бюджет VRAM для моделей в гигабайтах (0 - без ограничения): простаивающие модели
+# выгружаются в память CPU и возвращаются на GPU перед своим этапом. При MODEL_PREFETCH
+# модель следующего этапа загружается в фоне, пока работает текущий
+VRAM_BUDGET_GB = float(os.getenv("VRAM_BUDGET_GB", "0"))
+MODEL_PREFETCH = os.getenv("MODEL_PREFETCH", "1") == "1"
+
+# Метрики в формате Prometheus: HTTP-эндпоинт /metrics (0 - выключен) и/или файл .prom,
+# перезаписываемый каждые METRICS_FILE_INTERVAL секунд ("" - выключен)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL", "15"))
+# Выводить время этапов каждой фразы в консоль
+METRICS_PRINT = os.getenv("METRICS_PRINT", "1") == "1"
+
+# Профилирование фраз (SpeechTranslator.process): torch (torch.profiler, трасса Chrome .json),
+# python (cProfile, .pstats) или оба через запятую ("" - выключено). Профилируется доля фраз
+# PROFILE_SAMPLE_RATE (запись фразы не профилируется); сохраняются трассы только фраз
+# не быстрее PROFILE_MIN_TURN_S секунд, в PROFILE_DIR хранятся трассы последних PROFILE_KEEP фраз
+PROFILE_MODE = os.getenv("PROFILE_MODE", "").lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_MIN_TURN_S = float(os.getenv("PROFILE_MIN_TURN_S", "0"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+# Серверный режим (python -m server): адрес WebSocket, максимальное число одновременных
+# сессий и число фраз одной сессии, ожидающих обработки (при заполнении чтение
+# аудио клиента приостанавливается)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8765"))
+SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "8"))
+SERVER_SESSION_QUEUE = int(os.getenv("SERVER_SESSION_QUEUE", "2"))
+
+# Микропакетирование запросов сессий сервера к распознаванию и переводу: запросы, пришедшие
+# в пределах окна ожидания, выполняются одним пакетом. Окно сжимается до MIN при одиночных
+# запросах и растет до MAX под нагрузкой. Выключено по умолчанию: при микропакетировании
+# фраза распознается целиком, без потоковой выдачи сегментов (STREAMING_RECOGNITION)
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "8"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "20"))
+MICRO_BATCH_MIN_WAIT_MS = float(os.getenv("MICRO_BATCH_MIN_WAIT_MS", "2"))
+
 def print_gpu_info():
     """Выводит информацию о GPU и доступной VRAM при запуске приложения."""
     if torch.cuda.is_available():
@@ -55,5 +297,3 @@ def print_gpu_info():
         print("  Приложение полностью работает на CPU, но обработка будет медленнее.")
         print("  Ожидаемая задержка: ~12-20 секунд (вместо ~5-8 секунд на GPU).")
         print("  Все компоненты (faster-whisper, NLLB, Bark) поддерживают CPU.")
-
-os.makedirs(OUTPUT_DIR, exist_ok=True)
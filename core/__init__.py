@@ -3,5 +3,9 @@
 """
 
 from core.speech_translator import SpeechTranslator
+from core.pipeline import SpeechPipeline
+from core.startup import StartupReport
+from core.batch import BatchTranslator, discover_inputs
+from core.batching import MicroBatcher
 
-__all__ = ['SpeechTranslator']
\ No newline at end of file
+__all__ = ['SpeechTranslator', 'SpeechPipeline', 'StartupReport', 'BatchTranslator', 'discover_inputs', 'MicroBatcher']
\ No newline at end of file
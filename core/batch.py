@@ -0,0 +1,256 @@
+"""
+Пакетный режим: перевод набора аудиофайлов пулом обработчиков.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import soundfile as sf
+from audio.processing import resample_audio, to_mono_float32
+from recognition.recognizer import WHISPER_SAMPLE_RATE
+from utils.metrics import stage_timer
+
+# Форматы, которые читает soundfile (libsndfile)
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".opus")
+# Папка в дереве результатов для файлов манифеста вне его папки
+EXTERNAL_DIR = "_external"
+
+
+def done_marker(target_lang: str) -> str:
+    """Имя маркера готовности файла для целевого языка."""
+    return f"done_{target_lang}.json"
+
+
+def discover_inputs(source: str) -> list:
+    """Находит аудиофайлы для обработки.
+
+    Args:
+        source: Папка (обходится рекурсивно) или файл-манифест со списком путей
+            (по одному на строку; относительные пути считаются от папки манифеста).
+            Файлы вне папки манифеста попадают в дерево результатов под _external/
+            с путями относительно их общей родительской папки.
+
+    Returns:
+        list: Пары (абсолютный путь, относительный путь для дерева результатов).
+
+    Raises:
+        FileNotFoundError: Если источник не существует.
+    """
+    if os.path.isdir(source):
+        items = []
+        for root, _, files in os.walk(source):
+            for filename in sorted(files):
+                if filename.lower().endswith(AUDIO_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    items.append((os.path.abspath(path), os.path.relpath(path, source)))
+        return sorted(items, key=lambda item: item[1])
+
+    if os.path.isfile(source):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        paths = []
+        with open(source, encoding="utf-8") as f:
+            for line in f:
+                entry = line.strip()
+                if not entry or entry.startswith("#"):
+                    continue
+                paths.append(os.path.abspath(os.path.join(base_dir, entry)))
+
+        external = {path for path in paths if not _is_within(path, base_dir)}
+        external_root = _common_dir(external)
+        items = []
+        for path in paths:
+            if path not in external:
+                relpath = os.path.relpath(path, base_dir)
+            elif external_root:
+                relpath = os.path.join(EXTERNAL_DIR, os.path.relpath(path, external_root))
+            else:
+                # Нет общей папки (разные диски): имя дополняется хэшем полного пути
+                digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+                relpath = os.path.join(EXTERNAL_DIR, f"{digest}_{os.path.basename(path)}")
+            items.append((path, relpath))
+        return items
+
+    raise FileNotFoundError(f"Источник не найден: {source}")
+
+
+def _is_within(path: str, directory: str) -> bool:
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        return False
+
+
+def _common_dir(paths) -> str:
+    if not paths:
+        return ""
+    try:
+        return os.path.commonpath([os.path.dirname(path) for path in paths])
+    except ValueError:
+        return ""
+
+
+class BatchTranslator:
+    """Переводит набор аудиофайлов цепочкой распознавание -> перевод (-> синтез).
+
+    Файлы обрабатываются пулом потоков, разделяющих одни и те же загруженные
+    модели. Для каждого файла в дереве результатов создается папка с
+    транскриптом, переводом и (опционально) синтезированной речью. Маркер
+    done_<язык>.json записывается последним, поэтому после прерывания уже
+    обработанные файлы пропускаются. Маркер отдельный для каждого целевого
+    языка, а файл без синтезированной речи считается необработанным, если
+    синтез запрошен.
+    """
+
+    def __init__(self, recognizer, translator, output_dir: str, target_lang: str = "en",
+                 synthesizer=None, workers: int = 2):
+        """Инициализирует пакетный переводчик.
+
+        Args:
+            recognizer: Загруженный SpeechRecognizer.
+            translator: Загруженный TextTranslator.
+            output_dir: Корневая папка для результатов.
+            target_lang: Целевой язык ('en' или 'fr').
+            synthesizer: Загруженный SpeechSynthesizer (None - без синтеза речи).
+            workers: Число параллельных обработчиков.
+        """
+        self.recognizer = recognizer
+        self.translator = translator
+        self.synthesizer = synthesizer
+        self.output_dir = output_dir
+        self.target_lang = target_lang
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self.stats = {"processed": 0, "skipped": 0, "failed": 0, "audio_seconds": 0.0}
+
+    def item_dir(self, relpath: str) -> str:
+        """Возвращает папку результатов для входного файла."""
+        return os.path.join(self.output_dir, os.path.splitext(relpath)[0])
+
+    def is_done(self, relpath: str) -> bool:
+        """Проверяет, обработан ли файл с теми же параметрами в одном из предыдущих запусков."""
+        try:
+            with open(os.path.join(self.item_dir(relpath), done_marker(self.target_lang)), encoding="utf-8") as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if marker.get("target_lang") != self.target_lang:
+            return False
+        return self.synthesizer is None or bool(marker.get("synthesize"))
+
+    def run(self, items: list) -> dict:
+        """Обрабатывает список файлов и выводит итоговую пропускную способность.
+
+        Args:
+            items: Пары (абсолютный путь, относительный путь), например из discover_inputs.
+
+        Returns:
+            dict: Статистика: обработано, пропущено, ошибки, длительность аудио,
+                время работы, файлов в минуту и часов аудио в час.
+        """
+        pending = [item for item in items if not self.is_done(item[1])]
+        self.stats["skipped"] = len(items) - len(pending)
+        if self.stats["skipped"]:
+            print(f"ℹ Пропущено уже обработанных файлов: {self.stats['skipped']}")
+        print(f"Файлов к обработке: {len(pending)}, обработчиков: {self.workers}")
+
+        start_time = time.time()
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch-worker")
+        try:
+            futures = {pool.submit(self._process_item, path, relpath): relpath for path, relpath in pending}
+            for index, future in enumerate(as_completed(futures), start=1):
+                relpath = futures[future]
+                try:
+                    duration = future.result()
+                    with self._lock:
+                        self.stats["processed"] += 1
+                        self.stats["audio_seconds"] += duration
+                    print(f"✓ [{index}/{len(pending)}] {relpath} ({duration:.1f} сек аудио)")
+                except Exception as e:
+                    with self._lock:
+                        self.stats["failed"] += 1
+                    print(f"⚠ [{index}/{len(pending)}] {relpath}: {e}")
+                    traceback.print_exc()
+        except KeyboardInterrupt:
+            # Файлы из очереди отменяются; уже начатые дорабатываются и отмечаются готовыми
+            print("\n⏹ Остановка: файлы из очереди отменены, дожидаемся начатых...")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+        elapsed = time.time() - start_time
+        self.stats["elapsed_seconds"] = elapsed
+        self.stats["files_per_minute"] = self.stats["processed"] / elapsed * 60 if elapsed > 0 else 0.0
+        self.stats["audio_hours_per_hour"] = self.stats["audio_seconds"] / elapsed if elapsed > 0 else 0.0
+        self._print_summary()
+        return self.stats
+
+    def _process_item(self, path: str, relpath: str) -> float:
+        """Обрабатывает один файл и возвращает длительность его аудио в секундах."""
+        data, sample_rate = sf.read(path, dtype="float32")
+        audio = resample_audio(to_mono_float32(data), sample_rate, WHISPER_SAMPLE_RATE)
+        duration = len(audio) / WHISPER_SAMPLE_RATE
+        timings = {}
+
+        with stage_timer("recognize") as recognition:
+            transcript = self.recognizer.recognize(audio)
+        timings["recognize"] = recognition.elapsed
+
+        with stage_timer("translate") as translation_timer:
+            translation = self.translator.translate(transcript, target_lang=self.target_lang) if transcript else ""
+        timings["translate"] = translation_timer.elapsed
+        if transcript and not translation:
+            # translate возвращает пустую строку при ошибке: файл повторится при следующем запуске
+            raise RuntimeError("не удалось перевести распознанный текст")
+
+        item_dir = self.item_dir(relpath)
+        os.makedirs(item_dir, exist_ok=True)
+        with open(os.path.join(item_dir, "transcript.txt"), "w", encoding="utf-8") as f:
+            f.write(transcript + "\n")
+        with open(os.path.join(item_dir, f"translation_{self.target_lang}.txt"), "w", encoding="utf-8") as f:
+            f.write(translation + "\n")
+
+        speech_file = None
+        if self.synthesizer is not None and translation:
+            with stage_timer("synthesize") as synthesis:
+                synthesized = self.synthesizer.synthesize(translation, target_lang=self.target_lang)
+            timings["synthesize"] = synthesis.elapsed
+            if synthesized is None:
+                # Без отметки о готовности файл повторится при следующем запуске
+                raise RuntimeError("не удалось синтезировать речь")
+            speech, speech_rate = synthesized
+            speech_file = f"speech_{self.target_lang}.wav"
+            sf.write(os.path.join(item_dir, speech_file), speech, speech_rate, subtype="PCM_16")
+
+        marker = {
+            "source": path,
+            "duration_seconds": duration,
+            "target_lang": self.target_lang,
+            "synthesize": self.synthesizer is not None,
+            "speech_file": speech_file,
+            "timings": timings,
+        }
+        marker_path = os.path.join(item_dir, done_marker(self.target_lang))
+        tmp_marker = marker_path + ".tmp"
+        with open(tmp_marker, "w", encoding="utf-8") as f:
+            json.dump(marker, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_marker, marker_path)
+        return duration
+
+    def _print_summary(self):
+        stats = self.stats
+        print("\n" + "=" * 60)
+        print("ИТОГИ ПАКЕТНОЙ ОБРАБОТКИ")
+        print("=" * 60)
+        print(f"Обработано файлов:   {stats['processed']}")
+        print(f"Пропущено (готово):  {stats['skipped']}")
+        print(f"Ошибок:              {stats['failed']}")
+        print(f"Аудио обработано:    {stats['audio_seconds'] / 3600:.2f} ч")
+        print(f"Время работы:        {stats['elapsed_seconds']:.1f} сек")
+        print("-" * 60)
+        print(f"Файлов в минуту:     {stats['files_per_minute']:.2f}")
+        print(f"Часов аудио в час:   {stats['audio_hours_per_hour']:.2f}")
+        print("=" * 60)
@@ -0,0 +1,159 @@
+"""
+Микропакетирование: объединение одновременных запросов к модели в один пакетный вызов.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from utils.metrics import REGISTRY
+
+BATCH_SIZE = REGISTRY.histogram(
+    "micro_batch_size", "Размер пакета, собранного планировщиком микропакетов", ("batcher",),
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+BATCH_WAIT = REGISTRY.histogram(
+    "micro_batch_wait_seconds", "Время ожидания запроса в планировщике до начала обработки", ("batcher",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25)
+)
+
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ("item", "key", "future", "created_at")
+
+    def __init__(self, item, key):
+        self.item = item
+        self.key = key
+        self.future = Future()
+        self.created_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Планировщик, собирающий запросы из разных потоков в пакеты.
+
+    Первый запрос открывает окно ожидания; запросы, пришедшие за это время,
+    обрабатываются одним вызовом batch_fn, а результаты возвращаются
+    вызывающим через Future. Запросы с разными ключами (например, целевым
+    языком) попадают в разные пакеты, и предел размера действует для
+    каждого пакета отдельно.
+
+    Окно и размер пакета подстраиваются под нагрузку: при одиночных запросах
+    окно сжимается до min_wait_ms, так что один пользователь почти не
+    платит задержкой; когда пакеты заполняются, окно растет до max_wait_ms,
+    а предел размера пакета - до max_batch_size.
+    """
+
+    def __init__(self, name: str, batch_fn, max_batch_size: int = 8, max_wait_ms: float = 20.0,
+                 min_wait_ms: float = 2.0, adaptive: bool = True):
+        """Инициализирует планировщик и запускает его поток.
+
+        Args:
+            name: Название (для потока и метрик).
+            batch_fn: Функция batch_fn(items, key) -> list результатов в порядке items.
+            max_batch_size: Максимальный размер пакета.
+            max_wait_ms: Максимальное окно ожидания запросов в миллисекундах.
+            min_wait_ms: Минимальное окно ожидания при адаптации.
+            adaptive: Подстраивать ли окно и размер пакета под нагрузку
+                (иначе всегда max_wait_ms и max_batch_size).
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.min_wait = min(min_wait_ms, max_wait_ms) / 1000
+        self.adaptive = adaptive
+        self.batch_limit = self.max_batch_size if not adaptive else max(1, self.max_batch_size // 2)
+        self.wait = self.max_wait if not adaptive else self.min_wait
+        self.stats = {"requests": 0, "batches": 0}
+        self._load = 1.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"micro-batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item, key=None) -> Future:
+        """Ставит запрос в очередь.
+
+        Args:
+            item: Вход модели (например, текст или аудио).
+            key: Ключ группировки: в один пакет попадают только запросы с равными ключами.
+
+        Returns:
+            Future: Результат обработки запроса.
+        """
+        request = _Request(item, key)
+        self._queue.put(request)
+        return request.future
+
+    def __call__(self, item, key=None):
+        """Выполняет запрос синхронно и возвращает результат."""
+        return self.submit(item, key).result()
+
+    def close(self):
+        """Останавливает поток планировщика после обработки уже поставленных запросов."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            # Предел размера пакета действует для каждого ключа отдельно: сбор
+            # заканчивается, когда заполнен пакет хотя бы одного ключа
+            groups = {first.key: [first]}
+            deadline = time.perf_counter() + self.wait
+            while len(groups[first.key]) < self.batch_limit:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                group = groups.setdefault(request.key, [])
+                group.append(request)
+                if len(group) >= self.batch_limit:
+                    break
+
+            for key, requests in groups.items():
+                self._dispatch(key, requests)
+            self._adapt(max(len(requests) for requests in groups.values()))
+
+    def _dispatch(self, key, requests: list):
+        started = time.perf_counter()
+        for request in requests:
+            BATCH_WAIT.observe(started - request.created_at, batcher=self.name)
+        BATCH_SIZE.observe(len(requests), batcher=self.name)
+        self.stats["requests"] += len(requests)
+        self.stats["batches"] += 1
+
+        try:
+            results = self.batch_fn([request.item for request in requests], key)
+            if len(results) != len(requests):
+                raise RuntimeError(f"batch_fn вернула {len(results)} результатов для {len(requests)} запросов")
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        for request, result in zip(requests, results):
+            request.future.set_result(result)
+
+    def _adapt(self, collected: int):
+        """Подстраивает окно ожидания и предел размера пакета по размеру последнего пакета."""
+        if not self.adaptive:
+            return
+        self._load = 0.8 * self._load + 0.2 * collected
+        if collected >= self.batch_limit:
+            self.batch_limit = min(self.max_batch_size, self.batch_limit * 2)
+        elif collected * 4 <= self.batch_limit and self.batch_limit > 1:
+            self.batch_limit = max(1, self.batch_limit // 2)
+
+        # Доля заполнения: 0 при одиночных запросах, 1 при полных пакетах
+        fill = min(1.0, max(0.0, (self._load - 1.0) / max(1, self.max_batch_size - 1)))
+        self.wait = self.min_wait + (self.max_wait - self.min_wait) * fill
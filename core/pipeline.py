@@ -0,0 +1,508 @@
+"""
+Конвейерный режим: этапы перевода речи работают параллельно в отдельных потоках.
+"""
+
+import dataclasses
+import inspect
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+import numpy as np
+from config import (
+    PIPELINE_QUEUE_SIZE, CAPTURE_DURING_PLAYBACK, BARGE_IN, STREAMING_SYNTHESIS, STREAMING_RECOGNITION,
+    STREAMING_COMMIT_MIN_CHARS, STREAMING_COMMIT_MAX_PENDING_CHARS, METRICS_PRINT
+)
+from core.streaming import StableTextCommitter, iter_committed
+from utils.metrics import (
+    REGISTRY, STAGE_LATENCY, FAILURES, QUEUE_DEPTH, TURN_LATENCY, FIRST_AUDIO_LATENCY
+)
+
+_STOP = object()
+
+# Как часто заблокированный этап проверяет событие аварийной остановки (секунды)
+_ABORT_POLL_S = 0.1
+
+
+@dataclass
+class PipelineItem:
+    """Фраза, проходящая через этапы конвейера, и результаты каждого этапа."""
+
+    turn_id: int
+    audio: np.ndarray
+    sample_rate: int
+    created_at: float = field(default_factory=time.time)
+    text: str = ""
+    translation: str = ""
+    target_lang: str = ""
+    speech: np.ndarray = None
+    speech_rate: int = 0
+    segment_index: int = 0
+    chunk_index: int = 0
+    last_chunk: bool = True
+    end_of_turn: bool = False
+    timings: dict = field(default_factory=dict)
+
+
+class PipelineStage:
+    """Этап конвейера: поток-обработчик между двумя ограниченными очередями."""
+
+    def __init__(self, name: str, func, input_queue: queue.Queue, output_queue: queue.Queue = None,
+                 abort: threading.Event = None, on_error=None):
+        """Инициализирует этап.
+
+        Args:
+            name: Название этапа.
+            func: Функция обработки PipelineItem. Возвращает элемент для следующего
+                этапа или None, если фразу нужно отбросить.
+            input_queue: Входная очередь этапа.
+            output_queue: Очередь следующего этапа (None для последнего этапа).
+            abort: Событие аварийной остановки: после него этап отбрасывает фразы
+                из очереди, не обрабатывая их, и не ждет места в следующей очереди.
+            on_error: Функция, вызываемая с элементом, обработка которого упала.
+                Возвращает элемент для следующего этапа или None.
+        """
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.abort = abort or threading.Event()
+        self.on_error = on_error
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.blocked_time = 0.0
+        self._thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+
+    def start(self):
+        """Запускает поток этапа."""
+        self._thread.start()
+
+    def join(self, timeout: float = None):
+        """Ожидает завершения потока этапа."""
+        self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        """Работает ли еще поток этапа."""
+        return self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            item = self.input_queue.get()
+            if item is _STOP:
+                self._forward(_STOP)
+                break
+            if self.abort.is_set():
+                self.dropped += 1
+                continue
+
+            step_start = time.time()
+            blocked_before = self.blocked_time
+            forwarded = 0
+            try:
+                result = self.func(item)
+                if inspect.isgenerator(result):
+                    for part in result:
+                        if self.abort.is_set():
+                            break
+                        part.timings[self.name] = time.time() - step_start - (self.blocked_time - blocked_before)
+                        self._forward(part)
+                        forwarded += 1
+                elif result is not None:
+                    result.timings[self.name] = time.time() - step_start
+                    self._forward(result)
+                    forwarded = 1
+            except Exception as e:
+                self.failed += 1
+                FAILURES.inc(stage=self.name)
+                print(f"\n⚠ Ошибка на этапе '{self.name}' (фраза #{item.turn_id}): {e}")
+                if self.on_error is not None:
+                    fallback = self.on_error(item)
+                    if fallback is not None:
+                        self._forward(fallback)
+                continue
+            finally:
+                busy = time.time() - step_start - (self.blocked_time - blocked_before)
+                self.busy_time += busy
+                STAGE_LATENCY.observe(busy, stage=self.name)
+
+            if forwarded:
+                self.processed += 1
+            else:
+                self.dropped += 1
+
+    def _forward(self, item):
+        if self.output_queue is None:
+            return
+        wait_start = time.time()
+        while True:
+            try:
+                self.output_queue.put(item, timeout=_ABORT_POLL_S)
+                break
+            except queue.Full:
+                # При аварийной остановке следующий этап быстро разбирает очередь,
+                # поэтому ждать имеет смысл только маркер остановки
+                if self.abort.is_set() and item is not _STOP:
+                    break
+        self.blocked_time += time.time() - wait_start
+
+
+class SpeechPipeline:
+    """Конвейер распознавание -> перевод -> синтез -> воспроизведение.
+
+    Этапы соединены ограниченными очередями: пока предыдущая фраза переводится,
+    синтезируется или воспроизводится, следующая уже записывается и распознается.
+    Если очередь следующего этапа заполнена, этап блокируется (обратное давление),
+    а при заполненной входной очереди блокируется и захват.
+
+    Этап воспроизведения не ждет окончания звука: фрагменты ставятся в очередь
+    движка воспроизведения, а задержки фраз фиксируются по его событиям. При
+    BARGE_IN и захвате во время воспроизведения начало новой речи прерывает
+    фразы, уже поставленные в воспроизведение, а их оставшийся синтез
+    пропускается; фразы, еще не дошедшие до воспроизведения, не отменяются.
+    """
+
+    STAGES = ("recognize", "translate", "synthesize", "play")
+
+    def __init__(self, speech_translator, queue_size: int = PIPELINE_QUEUE_SIZE):
+        """Инициализирует конвейер поверх уже загруженных компонентов.
+
+        Args:
+            speech_translator: Экземпляр SpeechTranslator с загруженными моделями.
+            queue_size: Максимальная глубина очереди перед каждым этапом.
+        """
+        self.speech_translator = speech_translator
+        self.queue_size = queue_size
+        self.queues = {name: queue.Queue(maxsize=queue_size) for name in self.STAGES}
+        self._abort = threading.Event()
+
+        funcs = {
+            "recognize": self._recognize,
+            "translate": self._translate,
+            "synthesize": self._synthesize,
+            "play": self._play,
+        }
+        # До распознавания фраза еще не открыта в воспроизведении, закрывать нечего
+        error_handlers = {
+            "translate": self._end_failed_turn,
+            "synthesize": self._end_failed_turn,
+            "play": self._end_failed_playback,
+        }
+        self.stages = []
+        for index, name in enumerate(self.STAGES):
+            next_name = self.STAGES[index + 1] if index + 1 < len(self.STAGES) else None
+            output_queue = self.queues[next_name] if next_name else None
+            self.stages.append(PipelineStage(name, funcs[name], self.queues[name], output_queue, self._abort,
+                                             on_error=error_handlers.get(name)))
+
+        self.submitted = 0
+        self.rejected = 0
+        self.capture_blocked_time = 0.0
+        self._turn_counter = 0
+        self._turn_items = {}
+        self._turns_lock = threading.Lock()
+        self._started = False
+        self.playback = speech_translator.audio_handler.playback
+        self.playback.add_listener(self._on_playback_event)
+
+    def start(self):
+        """Запускает потоки всех этапов."""
+        if self._started:
+            return
+        for stage in self.stages:
+            stage.start()
+        REGISTRY.add_collector(self._collect_metrics)
+        self._started = True
+
+    def stop(self, timeout: float = None):
+        """Останавливает конвейер, дождавшись обработки уже поставленных фраз.
+
+        Если фразы не успели обработаться за timeout, оставшиеся в очередях
+        фразы отбрасываются, воспроизведение прерывается, а этапы завершаются,
+        как только закончат текущую фразу (их потоки фоновые и не мешают выходу).
+
+        Args:
+            timeout: Максимальное общее время ожидания в секундах (None - без ограничения).
+        """
+        if not self._started:
+            return
+        deadline = None if timeout is None else time.time() + timeout
+        try:
+            self.queues[self.STAGES[0]].put(_STOP, timeout=self._remaining(deadline))
+        except queue.Full:
+            self._abort_stages()
+            try:
+                self.queues[self.STAGES[0]].put(_STOP, timeout=_ABORT_POLL_S * 10)
+            except queue.Full:
+                pass
+        for stage in self.stages:
+            stage.join(self._remaining(deadline))
+            if stage.is_alive() and not self._abort.is_set():
+                self._abort_stages()
+                stage.join(_ABORT_POLL_S * 2)
+        REGISTRY.remove_collector(self._collect_metrics)
+        self._started = False
+
+    @staticmethod
+    def _remaining(deadline):
+        return None if deadline is None else max(0.0, deadline - time.time())
+
+    def _abort_stages(self):
+        dropped = sum(q.qsize() for q in self.queues.values())
+        print(f"⚠ Конвейер не успел обработать поставленные фразы, отброшено элементов: {dropped}")
+        self._abort.set()
+        self.playback.cancel()
+
+    def submit(self, audio: np.ndarray, sample_rate: int, block: bool = True,
+               timeout: float = None) -> bool:
+        """Ставит записанную фразу в очередь на распознавание.
+
+        Args:
+            audio: Записанная фраза (float32).
+            sample_rate: Частота дискретизации фразы.
+            block: Ждать ли освобождения места в очереди.
+            timeout: Максимальное время ожидания при block=True.
+
+        Returns:
+            bool: True, если фраза принята; False, если очередь переполнена.
+        """
+        self._turn_counter += 1
+        item = PipelineItem(turn_id=self._turn_counter, audio=audio, sample_rate=sample_rate)
+        wait_start = time.time()
+        try:
+            self.queues[self.STAGES[0]].put(item, block=block, timeout=timeout)
+        except queue.Full:
+            self.rejected += 1
+            print(f"⚠ Конвейер перегружен, фраза #{item.turn_id} отброшена")
+            return False
+        finally:
+            self.capture_blocked_time += time.time() - wait_start
+        self.submitted += 1
+        return True
+
+    def queue_depths(self) -> dict:
+        """Возвращает текущую глубину очереди перед каждым этапом."""
+        return {name: q.qsize() for name, q in self.queues.items()}
+
+    def stats(self) -> dict:
+        """Возвращает статистику этапов: обработано, отброшено, ошибки, время работы и блокировок."""
+        result = {}
+        for stage in self.stages:
+            result[stage.name] = {
+                "queue_depth": stage.input_queue.qsize(),
+                "processed": stage.processed,
+                "dropped": stage.dropped,
+                "failed": stage.failed,
+                "busy_time": stage.busy_time,
+                "blocked_time": stage.blocked_time,
+            }
+        return result
+
+    def run_continuous(self):
+        """Непрерывно захватывает фразы с микрофона и подает их в конвейер."""
+        audio_handler = self.speech_translator.audio_handler
+        barge_in = BARGE_IN and CAPTURE_DURING_PLAYBACK
+        self.start()
+        print("\n🎙 Конвейерный режим: говорите, фразы обрабатываются параллельно...")
+        if barge_in:
+            print("ℹ Прерывание: начало речи останавливает воспроизведение перевода "
+                  "(без эхоподавления перевод будет прерывать сам себя)")
+        try:
+            on_speech_start = self._barge_in if barge_in else None
+            for utterance in audio_handler.stream_utterances(on_speech_start=on_speech_start):
+                duration = len(utterance) / audio_handler.sample_rate
+                print(f"\n⏺ Фраза #{self._turn_counter + 1} ({duration:.2f} сек), "
+                      f"очереди: {self._format_depths()}")
+                self.submit(utterance, audio_handler.sample_rate)
+        finally:
+            self.stop(timeout=1.0)
+
+    def _barge_in(self):
+        """Прерывает фразы, аудио которых уже поставлено в воспроизведение.
+
+        Фразы, еще находящиеся в конвейере (распознавание, перевод, синтез),
+        не отменяются: их номера больше прерванных, и они будут озвучены.
+        """
+        if self.playback.cancel():
+            print("\n⏹ Воспроизведение прервано: начата новая фраза")
+
+    def _collect_metrics(self):
+        for name, depth in self.queue_depths().items():
+            QUEUE_DEPTH.set(depth, stage=name)
+
+    def _format_depths(self) -> str:
+        return " ".join(f"{name}={depth}" for name, depth in self.queue_depths().items())
+
+    @staticmethod
+    def _closes_turn(item: PipelineItem) -> bool:
+        """Последний ли это элемент фразы: после него фрагментов фразы не будет.
+
+        При потоковом синтезе фразу закрывает отдельный элемент конца фразы,
+        иначе - аудио последнего языка.
+        """
+        return item.end_of_turn or (item.last_chunk and not STREAMING_SYNTHESIS)
+
+    @staticmethod
+    def _turn_end(item: PipelineItem) -> PipelineItem:
+        """Элемент конца фразы без аудио: доходит до воспроизведения и закрывает фразу."""
+        return dataclasses.replace(item, speech=None, last_chunk=True, end_of_turn=True)
+
+    def _end_failed_turn(self, item: PipelineItem):
+        """Передает дальше конец фразы, если упала обработка ее последнего элемента.
+
+        Иначе фраза осталась бы открытой в движке воспроизведения: он держал бы
+        буфер до набора упреждения, а захват без CAPTURE_DURING_PLAYBACK так и
+        не возобновился бы.
+        """
+        return self._turn_end(item) if self._closes_turn(item) else None
+
+    def _end_failed_playback(self, item: PipelineItem):
+        """Закрывает фразу, если не удалось поставить в воспроизведение ее последний элемент."""
+        if self._closes_turn(item):
+            self.playback.end_turn(item.turn_id)
+        return None
+
+    def _recognize(self, item: PipelineItem):
+        translator = self.speech_translator
+        translator.debug_sink.write(item.audio, item.sample_rate, f"recorded_{item.turn_id}")
+        if STREAMING_SYNTHESIS:
+            return self._recognize_segments(item)
+
+        with translator.resident("recognizer", prefetch="translator"):
+            item.text = translator.recognizer.recognize(item.audio, sample_rate=item.sample_rate)
+        if not item.text or len(item.text.strip()) == 0:
+            print(f"Фраза #{item.turn_id}: речь не распознана")
+            return None
+        return item
+
+    def _recognize_segments(self, item: PipelineItem):
+        """Отдает фрагменты распознанного текста, а после них - элемент конца фразы.
+
+        При STREAMING_RECOGNITION фрагменты - устойчивый текст, зафиксированный по
+        мере декодирования, и перевод начала фразы идет параллельно распознаванию
+        ее конца. Иначе вся фраза распознается одним фрагментом.
+        """
+        translator = self.speech_translator
+        recognizer = translator.recognizer
+        segment_count = 0
+        with translator.resident("recognizer", prefetch="translator"):
+            if STREAMING_RECOGNITION:
+                committer = StableTextCommitter(STREAMING_COMMIT_MIN_CHARS, STREAMING_COMMIT_MAX_PENDING_CHARS)
+                segments = recognizer.recognize_stream(item.audio, sample_rate=item.sample_rate)
+                pieces = iter_committed(segments, committer)
+            else:
+                text = recognizer.recognize(item.audio, sample_rate=item.sample_rate)
+                pieces = [text] if text and text.strip() else []
+
+            for piece in pieces:
+                yield dataclasses.replace(item, text=piece, segment_index=segment_count)
+                segment_count += 1
+        if segment_count == 0:
+            print(f"Фраза #{item.turn_id}: речь не распознана")
+            return
+        yield dataclasses.replace(item, text="", segment_index=segment_count, end_of_turn=True)
+
+    def _translate(self, item: PipelineItem):
+        """Переводит фрагмент на все целевые языки; каждый перевод идет на синтез отдельным элементом."""
+        if item.end_of_turn:
+            yield item
+            return
+        translator = self.speech_translator
+        with translator.resident("translator", prefetch="synthesizer"):
+            translations = translator.translate(item.text)
+        if not translations:
+            print(f"Фраза #{item.turn_id}: не удалось перевести текст")
+            if self._closes_turn(item):
+                yield self._turn_end(item)
+            return
+        for index, (lang, translation) in enumerate(translations.items()):
+            # Без потокового синтеза фраза завершается аудио последнего языка
+            yield dataclasses.replace(
+                item, translation=translation, target_lang=lang, last_chunk=index == len(translations) - 1
+            )
+
+    def _synthesize(self, item: PipelineItem):
+        translator = self.speech_translator
+        if item.end_of_turn:
+            return self._turn_end(item)
+        if self.playback.is_cancelled(item.turn_id):
+            return None
+        if STREAMING_SYNTHESIS:
+            return self._synthesize_stream(item)
+
+        with translator.resident("synthesizer", prefetch="recognizer"):
+            synthesized = translator.synthesizer.synthesize(item.translation, target_lang=item.target_lang)
+        if synthesized is None:
+            print(f"Фраза #{item.turn_id}: не удалось синтезировать речь")
+            return self._end_failed_turn(item)
+        item.speech, item.speech_rate = synthesized
+        translator.debug_sink.write(
+            item.speech, item.speech_rate, f"synthesized_{item.target_lang}_{item.turn_id}"
+        )
+        return item
+
+    def _synthesize_stream(self, item: PipelineItem):
+        """Отдает фрагменты синтеза этапу воспроизведения по мере их генерации.
+
+        Фразу закрывает не последний фрагмент, а следующий за ними элемент конца
+        фразы: он передается дальше без аудио и в _synthesize.
+        """
+        translator = self.speech_translator
+        chunk_count = 0
+        with translator.resident("synthesizer", prefetch="recognizer"):
+            stream = translator.synthesizer.synthesize_stream(item.translation, target_lang=item.target_lang)
+            for index, (speech, speech_rate) in enumerate(stream):
+                if self.playback.is_cancelled(item.turn_id):
+                    stream.close()
+                    return
+                translator.debug_sink.write(
+                    speech, speech_rate,
+                    f"synthesized_{item.target_lang}_{item.turn_id}_seg{item.segment_index + 1}_part{index + 1}"
+                )
+                chunk_count += 1
+                yield dataclasses.replace(
+                    item, speech=speech, speech_rate=speech_rate, chunk_index=index, last_chunk=False
+                )
+        if chunk_count == 0:
+            print(f"Фраза #{item.turn_id}: не удалось синтезировать речь")
+
+    def _play(self, item: PipelineItem):
+        """Ставит аудио фразы в очередь воспроизведения, не дожидаясь его окончания."""
+        playback = self.playback
+        with self._turns_lock:
+            self._turn_items.setdefault(item.turn_id, item).timings.update(item.timings)
+        queued = not playback.is_cancelled(item.turn_id)
+        if queued and item.speech is not None:
+            queued = playback.enqueue(item.speech, item.speech_rate, item.turn_id)
+        if not queued:
+            with self._turns_lock:
+                self._turn_items.pop(item.turn_id, None)
+            return None
+        if item.speech is None or item.last_chunk:
+            playback.end_turn(item.turn_id)
+        return item
+
+    def _on_playback_event(self, event: str, turn: int, timestamp: float):
+        with self._turns_lock:
+            if event == "first_audio":
+                item = self._turn_items.get(turn)
+            else:
+                item = self._turn_items.pop(turn, None)
+        if item is None:
+            return
+        if event == "first_audio":
+            first_audio_delay = timestamp - item.created_at
+            FIRST_AUDIO_LATENCY.observe(first_audio_delay)
+            if METRICS_PRINT:
+                print(f"⏱ Фраза #{turn}: первый звук через {first_audio_delay:.2f} сек после записи")
+        elif event == "done":
+            self._report_turn(item, timestamp)
+
+    def _report_turn(self, item: PipelineItem, finished_at: float):
+        latency = finished_at - item.created_at
+        TURN_LATENCY.observe(latency)
+        if not METRICS_PRINT:
+            return
+        stages = " ".join(f"{name}={item.timings.get(name, 0.0):.2f}с" for name in self.STAGES[:-1])
+        print(f"⏱ Фраза #{item.turn_id}: {latency:.2f} сек от записи до конца воспроизведения ({stages})")
@@ -2,125 +2,459 @@
 Основной класс для перевода речи: объединяет все компоненты системы.
 """
 
+import contextlib
+import importlib
 import time
+from concurrent.futures import ThreadPoolExecutor
 from audio import AudioHandler
-from recognition import SpeechRecognizer
-from translation import TextTranslator
-from synthesis import SpeechSynthesizer
-from config import RECORD_DURATION, DEVICE
-from utils import print_memory_usage, clear_cache
+from audio.sink import DebugAudioSink
+from core.startup import StartupReport
+from core.streaming import StableTextCommitter, iter_committed
+from config import (
+    RECORD_DURATION, DEVICE, STREAMING_SYNTHESIS, TRANSLATION_CACHE_WARMUP_FILE,
+    PARALLEL_MODEL_LOADING, WARMUP_MODELS, METRICS_PORT, METRICS_HOST, METRICS_FILE,
+    METRICS_FILE_INTERVAL, METRICS_PRINT, STREAMING_RECOGNITION, STREAMING_COMMIT_MIN_CHARS,
+    STREAMING_COMMIT_MAX_PENDING_CHARS, VRAM_BUDGET_GB, MODEL_PREFETCH
+)
+from utils import print_memory_usage, clear_cache, stage_timer, start_exporters, TurnProfiler
+from utils.metrics import FAILURES, FIRST_AUDIO_LATENCY, STAGE_LATENCY, TURN_LATENCY
+from utils.residency import create_residency_manager
+
+# Компоненты системы: атрибут -> (модуль, класс)
+COMPONENTS = {
+    "recognizer": ("recognition.recognizer", "SpeechRecognizer"),
+    "translator": ("translation.translator", "TextTranslator"),
+    "synthesizer": ("synthesis.synthesizer", "SpeechSynthesizer"),
+}
+
+
+def load_components(startup_report: StartupReport, names: list = None) -> dict:
+    """Загружает компоненты системы (параллельно, если включено PARALLEL_MODEL_LOADING).
+
+    Args:
+        startup_report: Отчет о запуске, в который записывается время этапов.
+        names: Названия компонентов из COMPONENTS (по умолчанию все).
+
+    Returns:
+        dict: Загруженные компоненты по названиям.
+
+    Raises:
+        RuntimeError: Если компонент не удалось загрузить.
+    """
+    names = list(names or COMPONENTS)
+    if PARALLEL_MODEL_LOADING and len(names) > 1:
+        print("Параллельная загрузка моделей...")
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="model-loader") as pool:
+            futures = {name: pool.submit(_load_component, name, startup_report) for name in names}
+            return {name: future.result() for name, future in futures.items()}
+    return {name: _load_component(name, startup_report) for name in names}
+
+
+def _load_component(name: str, startup_report: StartupReport):
+    """Импортирует модуль компонента, загружает модель и прогревает ее.
+
+    Args:
+        name: Название компонента из COMPONENTS.
+        startup_report: Отчет о запуске.
+
+    Returns:
+        Экземпляр компонента.
+    """
+    module_name, class_name = COMPONENTS[name]
+    with startup_report.measure(name, "import"):
+        module = importlib.import_module(module_name)
+    with startup_report.measure(name, "load"):
+        component = getattr(module, class_name)()
+    if WARMUP_MODELS:
+        with startup_report.measure(name, "warmup"):
+            component.warmup()
+    return component
 
 
 class SpeechTranslator:
-    """Класс для перевода речи с русского на английский или французский."""
+    """Класс для перевода речи с русского на английский и/или французский.
+
+    В режиме нескольких языков (target_langs) текст переводится на все языки
+    одним вызовом translate_multi (общий энкодер есть только у движка torch;
+    CTranslate2, используемый по умолчанию, кодирует текст для каждого языка),
+    а переводы синтезируются и воспроизводятся по очереди в порядке target_langs.
+    """
 
-    def __init__(self, target_lang: str = "fr"):
+    def __init__(self, target_lang: str = "fr", target_langs: list = None):
         """Инициализирует все компоненты системы перевода речи.
 
         Args:
             target_lang: Целевой язык ('en' для английского, 'fr' для французского).
+            target_langs: Несколько целевых языков (например, ['en', 'fr']); если указаны,
+                target_lang становится первым из них.
 
         Raises:
             ValueError: Если указан неподдерживаемый целевой язык.
         """
-        if target_lang not in ["en", "fr"]:
-            raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
+        target_langs = list(target_langs or [target_lang])
+        for lang in target_langs:
+            if lang not in ["en", "fr"]:
+                raise ValueError(f"Неподдерживаемый целевой язык: {lang}. Используйте 'en' или 'fr'")
 
-        self.target_lang = target_lang
+        self.target_langs = target_langs
+        self.target_lang = target_langs[0]
         lang_names = {"en": "английский", "fr": "французский"}
-        print(f"Инициализация системы перевода: Русский -> {lang_names[target_lang].upper()}")
+        print(f"Инициализация системы перевода: Русский -> "
+              f"{' + '.join(lang_names[lang].upper() for lang in target_langs)}")
 
         self.audio_handler = AudioHandler()
+        self.debug_sink = DebugAudioSink()
+        self.profiler = TurnProfiler()
 
         if DEVICE == "cuda":
             print_memory_usage()
 
-        self.recognizer = SpeechRecognizer()
+        start_exporters(METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL, METRICS_HOST)
 
-        if DEVICE == "cuda":
-            print_memory_usage()
-            clear_cache()
+        self.startup_report = StartupReport()
+        self._load_components()
 
-        self.translator = TextTranslator()
+        self.residency = None
+        if DEVICE == "cuda" and VRAM_BUDGET_GB > 0:
+            self.residency = create_residency_manager(
+                {name: getattr(self, name) for name in COMPONENTS}, VRAM_BUDGET_GB, prefetch=MODEL_PREFETCH
+            )
 
         if DEVICE == "cuda":
+            clear_cache()
             print_memory_usage()
 
-        self.synthesizer = SpeechSynthesizer()
+        if TRANSLATION_CACHE_WARMUP_FILE:
+            self.warm_translation_cache(TRANSLATION_CACHE_WARMUP_FILE)
 
-        if DEVICE == "cuda":
-            print_memory_usage()
+        self.startup_report.finish()
+        self.startup_report.print_report()
 
         print("Система готова к использованию!")
 
-    def process(self):
-        """Выполняет полный цикл: запись -> распознавание -> перевод -> синтез -> воспроизведение."""
+    def _load_components(self):
+        """Загружает распознаватель, переводчик и синтезатор (параллельно, если включено).
+
+        Raises:
+            RuntimeError: Если компонент не удалось загрузить.
+        """
+        for name, component in load_components(self.startup_report).items():
+            setattr(self, name, component)
+
+    def resident(self, name: str, prefetch: str = None):
+        """Возвращает контекст этапа, на время которого модель находится в VRAM.
+
+        Без бюджета VRAM (VRAM_BUDGET_GB=0) все модели постоянно на устройстве
+        и контекст ничего не делает.
+
+        Args:
+            name: Модель этапа ('recognizer', 'translator', 'synthesizer').
+            prefetch: Модель следующего этапа, которую нужно загрузить в фоне.
+        """
+        if self.residency is None:
+            return contextlib.nullcontext()
+        return self.residency.use(name, prefetch=prefetch)
+
+    def warm_translation_cache(self, phrases_path: str):
+        """Прогревает кэш переводов фразами из файла (по одной фразе на строку).
+
+        Args:
+            phrases_path: Путь к текстовому файлу с фразами на русском языке.
+        """
+        try:
+            with open(phrases_path, encoding="utf-8") as f:
+                phrases = [line.strip() for line in f if line.strip()]
+        except OSError as e:
+            print(f"⚠ Не удалось прочитать файл для прогрева кэша переводов: {e}")
+            return
+
+        print(f"Прогрев кэша переводов ({len(phrases)} фраз)...")
+        translated = 0
+        with self.resident("translator"):
+            for lang in self.target_langs:
+                translated += self.translator.warm_cache(phrases, target_lang=lang)
+        cached = len(phrases) * len(self.target_langs) - translated
+        print(f"✓ Кэш переводов прогрет: переведено {translated}, уже было в кэше {cached}")
+
+    def translate(self, text: str) -> dict:
+        """Переводит текст на все целевые языки (при нескольких языках - через translate_multi).
+
+        Args:
+            text: Текст на русском языке.
+
+        Returns:
+            dict: Непустые переводы по кодам языков в порядке target_langs.
+        """
+        if len(self.target_langs) == 1:
+            translations = {self.target_lang: self.translator.translate(text, target_lang=self.target_lang)}
+        else:
+            translations = self.translator.translate_multi(text, self.target_langs)
+        return {lang: translation for lang, translation in translations.items()
+                if translation and len(translation.strip()) > 0}
+
+    def run_continuous(self):
+        """Непрерывно слушает микрофон и обрабатывает каждую фразу, выделенную VAD.
+
+        На время обработки и воспроизведения сегментация приостанавливается,
+        чтобы синтезированная речь не попадала обратно в микрофон.
+        """
+        print("\n🎙 Непрерывный захват: говорите, фразы обрабатываются автоматически...")
+        utterance_index = 0
+        for utterance in self.audio_handler.stream_utterances():
+            utterance_index += 1
+            duration = len(utterance) / self.audio_handler.sample_rate
+            print(f"\n⏺ Фраза #{utterance_index} ({duration:.2f} сек)")
+            self.audio_handler.pause_capture()
+            try:
+                self.process(utterance)
+            finally:
+                self.audio_handler.resume_capture()
+
+    def process(self, recorded_audio=None):
+        """Выполняет полный цикл: запись -> распознавание -> перевод -> синтез -> воспроизведение.
+
+        Длительность этапов записывается в реестр метрик; при METRICS_PRINT она
+        также выводится в консоль. При PROFILE_MODE профилируется обработка
+        записанной фразы (без самой записи), и трасса сохраняется в PROFILE_DIR.
+
+        Args:
+            recorded_audio: Уже записанная фраза (np.ndarray с частотой обработчика аудио),
+                например из непрерывного захвата. Если не указана, выполняется запись
+                фиксированной длины RECORD_DURATION.
+        """
         start_time = time.time()
+        try:
+            with stage_timer("record") as record:
+                if recorded_audio is None:
+                    recorded_audio = self.audio_handler.record_audio(RECORD_DURATION)
+        except KeyboardInterrupt:
+            print("\n\nПрограмма остановлена пользователем.")
+            return
+        except Exception as e:
+            print(f"\nОшибка: {e}")
+            return
+        self._log(f"⏱ Запись завершена за {record.elapsed:.2f} сек")
+
+        # Запись (ожидание речи) не профилируется: трасса должна показывать только обработку
+        with self.profiler.turn():
+            self._process(recorded_audio, record.elapsed, start_time)
 
+    def _process(self, recorded_audio, record_time: float, start_time: float):
         try:
-            step_start = time.time()
-            recorded_path = self.audio_handler.record_audio(RECORD_DURATION)
-            record_time = time.time() - step_start
-            print(f"⏱ Запись завершена за {record_time:.2f} сек")
+            self.debug_sink.write(recorded_audio, self.audio_handler.sample_rate, "recorded")
+            turn_start = time.time()
+
+            if STREAMING_SYNTHESIS and STREAMING_RECOGNITION:
+                self._process_streaming(recorded_audio, record_time, start_time)
+                return
 
-            step_start = time.time()
             try:
-                recognized_text = self.recognizer.recognize(recorded_path)
+                with stage_timer("recognize") as recognition, self.resident("recognizer", prefetch="translator"):
+                    recognized_text = self.recognizer.recognize(
+                        recorded_audio,
+                        sample_rate=self.audio_handler.sample_rate
+                    )
             except Exception as e:
                 print(f"Ошибка при распознавании речи: {e}")
                 print("Попробуйте еще раз...")
                 return
-            recognition_time = time.time() - step_start
-            print(f"⏱ Распознавание завершено за {recognition_time:.2f} сек")
+            self._log(f"⏱ Распознавание завершено за {recognition.elapsed:.2f} сек")
 
             if not recognized_text or len(recognized_text.strip()) == 0:
                 print("Не удалось распознать речь. Попробуйте еще раз.")
                 return
 
-            step_start = time.time()
-            translated_text = self.translator.translate(recognized_text, target_lang=self.target_lang)
-            translation_time = time.time() - step_start
-            print(f"⏱ Перевод завершен за {translation_time:.2f} сек")
+            with stage_timer("translate") as translation, self.resident("translator", prefetch="synthesizer"):
+                translations = self.translate(recognized_text)
+            self._log(f"⏱ Перевод завершен за {translation.elapsed:.2f} сек")
 
-            if not translated_text or len(translated_text.strip()) == 0:
+            if not translations:
+                FAILURES.inc(stage="translate")
                 print("Не удалось перевести текст.")
                 return
 
-            step_start = time.time()
-            result_path = self.synthesizer.synthesize(
-                translated_text,
-                target_lang=self.target_lang,
-                output_filename=f"synthesized_{self.target_lang}.wav",
-                reference_audio_path=recorded_path
-            )
-            synthesis_time = time.time() - step_start
-            print(f"⏱ Синтез завершен за {synthesis_time:.2f} сек")
-
-            if result_path:
-                step_start = time.time()
-                self.audio_handler.play_audio(result_path)
-                playback_time = time.time() - step_start
-                print(f"⏱ Воспроизведение завершено за {playback_time:.2f} сек")
-
-                total_time = time.time() - start_time
-                processing_time = total_time - record_time - playback_time
-
-                print("\n" + "=" * 60)
-                print("СТАТИСТИКА ОБРАБОТКИ")
-                print("=" * 60)
-                print(f"Запись аудио:        {record_time:.2f} сек")
-                print(f"Распознавание речи:  {recognition_time:.2f} сек")
-                print(f"Перевод текста:      {translation_time:.2f} сек")
-                print(f"Синтез речи:         {synthesis_time:.2f} сек")
-                print(f"Воспроизведение:     {playback_time:.2f} сек")
-                print("-" * 60)
-                print(f"Время обработки:      {processing_time:.2f} сек")
-                print(f"Общее время:         {total_time:.2f} сек")
-                print("=" * 60)
+            if STREAMING_SYNTHESIS:
+                speak_start = time.time()
+                with stage_timer("speak") as speaking:
+                    first_audio_time = self.audio_handler.play_stream(self._translations_chunks(translations))
+
+                if first_audio_time is None:
+                    FAILURES.inc(stage="synthesize")
+                    print("Не удалось синтезировать речь.")
+                    return
+
+                time_to_first_audio = first_audio_time - speak_start
+                FIRST_AUDIO_LATENCY.observe(first_audio_time - turn_start)
+                TURN_LATENCY.observe(time.time() - turn_start)
+                self._log(f"⏱ Синтез и воспроизведение завершены за {speaking.elapsed:.2f} сек "
+                          f"(первый звук через {time_to_first_audio:.2f} сек)")
+
+                if METRICS_PRINT:
+                    self._print_stats([
+                        ("Запись аудио", record_time),
+                        ("Распознавание речи", recognition.elapsed),
+                        ("Перевод текста", translation.elapsed),
+                        ("До первого звука", time_to_first_audio),
+                        ("Синтез + воспроизв.", speaking.elapsed),
+                    ], first_audio_time - turn_start, time.time() - start_time)
+                return
+
+            with stage_timer("synthesize") as synthesis, self.resident("synthesizer", prefetch="recognizer"):
+                synthesized = []
+                for lang, translated_text in translations.items():
+                    result = self.synthesizer.synthesize(translated_text, target_lang=lang)
+                    if result is not None:
+                        synthesized.append((lang, result))
+            self._log(f"⏱ Синтез завершен за {synthesis.elapsed:.2f} сек")
+
+            if synthesized:
+                for lang, (speech, speech_rate) in synthesized:
+                    self.debug_sink.write(speech, speech_rate, f"synthesized_{lang}")
+
+                FIRST_AUDIO_LATENCY.observe(time.time() - turn_start)
+                with stage_timer("play") as playback:
+                    for _, (speech, speech_rate) in synthesized:
+                        self.audio_handler.play_audio(speech, speech_rate)
+                TURN_LATENCY.observe(time.time() - turn_start)
+                self._log(f"⏱ Воспроизведение завершено за {playback.elapsed:.2f} сек")
+
+                if METRICS_PRINT:
+                    total_time = time.time() - start_time
+                    self._print_stats([
+                        ("Запись аудио", record_time),
+                        ("Распознавание речи", recognition.elapsed),
+                        ("Перевод текста", translation.elapsed),
+                        ("Синтез речи", synthesis.elapsed),
+                        ("Воспроизведение", playback.elapsed),
+                    ], total_time - record_time - playback.elapsed, total_time)
             else:
+                FAILURES.inc(stage="synthesize")
                 print("Не удалось синтезировать речь.")
 
         except KeyboardInterrupt:
             print("\n\nПрограмма остановлена пользователем.")
         except Exception as e:
             print(f"\nОшибка: {e}")
+
+    def _process_streaming(self, recorded_audio, record_time: float, start_time: float):
+        """Распознает, переводит и озвучивает фразу потоково.
+
+        Устойчивые фрагменты распознанного текста переводятся и синтезируются
+        сразу, поэтому воспроизведение начала длинной фразы идет, пока ее
+        конец еще распознается.
+
+        Args:
+            recorded_audio: Записанная фраза.
+            record_time: Длительность записи в секундах.
+            start_time: Момент начала обработки (time.time()).
+        """
+        turn = {"recognized": [], "translated": [], "recognize": 0.0, "translate": 0.0}
+        turn_start = time.time()
+        with stage_timer("speak") as speaking:
+            first_audio_time = self.audio_handler.play_stream(self._streamed_chunks(recorded_audio, turn))
+
+        if not turn["recognized"]:
+            print("Не удалось распознать речь. Попробуйте еще раз.")
+            return
+        print(f"Распознанный текст: {' '.join(turn['recognized'])}")
+        print(f"Перевод: {' '.join(turn['translated'])}")
+        if first_audio_time is None:
+            FAILURES.inc(stage="synthesize")
+            print("Не удалось синтезировать речь.")
+            return
+
+        time_to_first_audio = first_audio_time - turn_start
+        FIRST_AUDIO_LATENCY.observe(time_to_first_audio)
+        TURN_LATENCY.observe(time.time() - turn_start)
+        self._log(f"⏱ Распознавание, перевод, синтез и воспроизведение завершены за {speaking.elapsed:.2f} сек "
+                  f"(первый звук через {time_to_first_audio:.2f} сек)")
+
+        if METRICS_PRINT:
+            self._print_stats([
+                ("Запись аудио", record_time),
+                ("Распознавание речи", turn["recognize"]),
+                ("Перевод текста", turn["translate"]),
+                ("До первого звука", time_to_first_audio),
+                ("Весь цикл", speaking.elapsed),
+            ], time_to_first_audio, time.time() - start_time)
+
+    def _streamed_chunks(self, recorded_audio, turn: dict):
+        """Отдает фрагменты синтеза по мере фиксации распознанного текста.
+
+        Args:
+            recorded_audio: Записанная фраза.
+            turn: Словарь, в который накапливаются распознанный текст, перевод
+                и время распознавания и перевода.
+
+        Yields:
+            tuple: Пара (аудиосигнал float32, частота дискретизации).
+        """
+        committer = StableTextCommitter(STREAMING_COMMIT_MIN_CHARS, STREAMING_COMMIT_MAX_PENDING_CHARS)
+        for piece in iter_committed(self._timed_segments(recorded_audio, turn), committer):
+            turn["recognized"].append(piece)
+            with stage_timer("translate") as translation, self.resident("translator", prefetch="synthesizer"):
+                translations = self.translate(piece)
+            turn["translate"] += translation.elapsed
+            if not translations:
+                FAILURES.inc(stage="translate")
+                print(f"⚠ Не удалось перевести фрагмент: {piece}")
+                continue
+            for lang, translated_text in translations.items():
+                turn["translated"].append(
+                    translated_text if len(self.target_langs) == 1 else f"[{lang}] {translated_text}"
+                )
+            yield from self._translations_chunks(translations)
+
+    def _timed_segments(self, recorded_audio, turn: dict):
+        """Отдает сегменты потокового распознавания, суммируя время их декодирования."""
+        with self.resident("recognizer", prefetch="translator"):
+            yield from self._recognized_segments(recorded_audio, turn)
+        STAGE_LATENCY.observe(turn["recognize"], stage="recognize")
+
+    def _recognized_segments(self, recorded_audio, turn: dict):
+        segments = self.recognizer.recognize_stream(recorded_audio, sample_rate=self.audio_handler.sample_rate)
+        while True:
+            step_start = time.time()
+            try:
+                segment = next(segments, None)
+            except Exception:
+                FAILURES.inc(stage="recognize")
+                raise
+            finally:
+                turn["recognize"] += time.time() - step_start
+            if segment is None:
+                break
+            yield segment
+
+    @staticmethod
+    def _log(message: str):
+        """Выводит сообщение о времени этапа, если включен вывод метрик в консоль."""
+        if METRICS_PRINT:
+            print(message)
+
+    def _translations_chunks(self, translations: dict):
+        """Потоково синтезирует переводы на все языки подряд."""
+        for lang, translated_text in translations.items():
+            yield from self._synthesized_chunks(translated_text, target_lang=lang)
+
+    def _synthesized_chunks(self, text: str, target_lang: str = None):
+        """Потоково синтезирует текст, сохраняя фрагменты в отладочный приемник."""
+        target_lang = target_lang or self.target_lang
+        with self.resident("synthesizer", prefetch="recognizer"):
+            for index, (speech, speech_rate) in enumerate(
+                    self.synthesizer.synthesize_stream(text, target_lang=target_lang), start=1):
+                self.debug_sink.write(speech, speech_rate, f"synthesized_{target_lang}_part{index}")
+                yield speech, speech_rate
+
+    @staticmethod
+    def _print_stats(rows: list, processing_time: float, total_time: float):
+        """Выводит таблицу времени этапов обработки."""
+        print("\n" + "=" * 60)
+        print("СТАТИСТИКА ОБРАБОТКИ")
+        print("=" * 60)
+        for label, value in rows:
+            print(f"{label + ':':<21}{value:.2f} сек")
+        print("-" * 60)
+        print(f"Время обработки:      {processing_time:.2f} сек")
+        print(f"Общее время:         {total_time:.2f} сек")
+        print("=" * 60)
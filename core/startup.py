@@ -0,0 +1,75 @@
+"""
+Отчет о времени запуска: импорт, загрузка весов и прогрев каждого компонента.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Собирает длительность этапов запуска по компонентам (потокобезопасно)."""
+
+    PHASES = ("import", "load", "warmup")
+    PHASE_NAMES = {"import": "Импорт", "load": "Загрузка", "warmup": "Прогрев"}
+
+    def __init__(self):
+        """Инициализирует пустой отчет."""
+        self.components = {}
+        self.started_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, component: str, phase: str):
+        """Измеряет длительность этапа запуска компонента.
+
+        Args:
+            component: Название компонента (например, 'recognizer').
+            phase: Этап: 'import', 'load' или 'warmup'.
+        """
+        phase_start = time.time()
+        try:
+            yield
+        finally:
+            self.record(component, phase, time.time() - phase_start)
+
+    def record(self, component: str, phase: str, seconds: float):
+        """Добавляет длительность этапа в отчет."""
+        with self._lock:
+            phases = self.components.setdefault(component, {})
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def finish(self):
+        """Отмечает окончание запуска."""
+        self.finished_at = time.time()
+
+    @property
+    def wall_time(self) -> float:
+        """Общее (настенное) время запуска в секундах."""
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    def as_dict(self) -> dict:
+        """Возвращает отчет в виде словаря."""
+        with self._lock:
+            components = {name: dict(phases) for name, phases in self.components.items()}
+        return {"components": components, "wall_time": self.wall_time}
+
+    def print_report(self):
+        """Выводит таблицу времени запуска по компонентам и этапам."""
+        header = "".join(f"{self.PHASE_NAMES[phase]:>11}" for phase in self.PHASES)
+        print("\n" + "=" * 60)
+        print("ОТЧЕТ О ЗАПУСКЕ")
+        print("=" * 60)
+        print(f"{'Компонент':<15}{header}{'Итого':>11}")
+        serial_total = 0.0
+        for name, phases in self.as_dict()["components"].items():
+            values = "".join(f"{phases.get(phase, 0.0):>10.2f}с" for phase in self.PHASES)
+            component_total = sum(phases.values())
+            serial_total += component_total
+            print(f"{name:<15}{values}{component_total:>10.2f}с")
+        print("-" * 60)
+        print(f"Сумма по компонентам: {serial_total:.2f} сек")
+        print(f"Фактическое время:    {self.wall_time:.2f} сек")
+        print("=" * 60)
@@ -0,0 +1,116 @@
+"""
+Потоковое распознавание: выделение устойчивого текста из сегментов для инкрементального перевода.
+"""
+
+from utils.text import split_sentences, split_clauses
+
+_SENTENCE_TERMINATORS = ".!?…"
+
+
+class StableTextCommitter:
+    """Политика фиксации текста, поступающего сегментами распознавания.
+
+    Сегменты faster-whisper окончательны, но их границы не совпадают с
+    границами предложений, а перевод обрывка предложения хуже перевода
+    целого. Поэтому фиксируются только завершенные предложения (короткие
+    объединяются со следующими до min_chars символов). Незавершенный хвост
+    ждет следующих сегментов; если он вырос длиннее max_pending_chars,
+    фиксируется по последней границе клаузы. Зафиксированный текст больше
+    не меняется и повторно не переводится.
+    """
+
+    def __init__(self, min_chars: int = 20, max_pending_chars: int = 200):
+        """Инициализирует политику фиксации.
+
+        Args:
+            min_chars: Минимальная длина фиксируемого фрагмента (кроме последнего).
+            max_pending_chars: Длина незавершенного хвоста, после которой он
+                фиксируется по границам клауз.
+        """
+        self.min_chars = min_chars
+        self.max_pending_chars = max_pending_chars
+        self.committed = []
+        self._pending = ""
+
+    @property
+    def pending(self) -> str:
+        """Текст, еще не зафиксированный для перевода."""
+        return self._pending
+
+    @property
+    def committed_text(self) -> str:
+        """Весь зафиксированный текст."""
+        return " ".join(self.committed)
+
+    def add(self, text: str) -> list:
+        """Добавляет текст очередного сегмента.
+
+        Args:
+            text: Текст сегмента распознавания.
+
+        Returns:
+            list: Новые зафиксированные фрагменты (возможно, пустой).
+        """
+        text = text.strip()
+        if not text:
+            return []
+        self._pending = f"{self._pending} {text}" if self._pending else text
+        return self._commit(final=False)
+
+    def flush(self) -> list:
+        """Фиксирует весь оставшийся текст (распознавание завершено).
+
+        Returns:
+            list: Последние зафиксированные фрагменты (возможно, пустой).
+        """
+        return self._commit(final=True)
+
+    def _commit(self, final: bool) -> list:
+        sentences = split_sentences(self._pending)
+        if not sentences:
+            self._pending = ""
+            return []
+
+        if final or self._pending[-1] in _SENTENCE_TERMINATORS:
+            stable, tail = sentences, ""
+        else:
+            stable, tail = sentences[:-1], sentences[-1]
+            if len(tail) > self.max_pending_chars:
+                clauses = split_clauses(tail)
+                if len(clauses) > 1:
+                    stable.append(" ".join(clauses[:-1]))
+                    tail = clauses[-1]
+
+        pieces = []
+        current = ""
+        for sentence in stable:
+            current = f"{current} {sentence}" if current else sentence
+            if len(current) >= self.min_chars:
+                pieces.append(current)
+                current = ""
+        if current:
+            if final:
+                pieces.append(current)
+            else:
+                tail = f"{current} {tail}" if tail else current
+
+        self._pending = tail
+        self.committed.extend(pieces)
+        return pieces
+
+
+def iter_committed(segments, committer: StableTextCommitter = None):
+    """Превращает поток сегментов распознавания в поток устойчивых фрагментов текста.
+
+    Args:
+        segments: Итерируемый источник текста сегментов (например, recognize_stream).
+        committer: Политика фиксации (по умолчанию StableTextCommitter()).
+
+    Yields:
+        str: Зафиксированный фрагмент текста, готовый к переводу.
+    """
+    if committer is None:
+        committer = StableTextCommitter()
+    for segment in segments:
+        yield from committer.add(segment)
+    yield from committer.flush()
@@ -3,32 +3,74 @@
 Запускает приложение для перевода речи с русского на английский или французский язык.
 """
 
-from core import SpeechTranslator
-from config import DEVICE, print_gpu_info
+from core import SpeechTranslator, SpeechPipeline
+from config import DEVICE, CAPTURE_MODE, PIPELINE_MODE, RECORD_DURATION, METRICS_PRINT, print_gpu_info
+from utils import REGISTRY, stop_exporters
 
 
-def select_target_language() -> str:
-    """Интерактивный выбор целевого языка для перевода.
+def select_target_languages() -> list:
+    """Интерактивный выбор целевых языков для перевода.
 
     Returns:
-        Код целевого языка ('en' или 'fr').
+        Коды целевых языков (['en'], ['fr'] или ['en', 'fr']).
     """
     print("\n" + "=" * 60)
     print("ВЫБОР ЦЕЛЕВОГО ЯЗЫКА")
     print("=" * 60)
     print("1. Английский (English)")
     print("2. Французский (Français)")
+    print("3. Английский и французский (оба перевода подряд)")
     print("=" * 60)
 
     while True:
-        choice = input("\nВыберите целевой язык (1 или 2): ").strip()
+        choice = input("\nВыберите целевой язык (1, 2 или 3): ").strip()
 
         if choice == "1":
-            return "en"
+            return ["en"]
         elif choice == "2":
-            return "fr"
+            return ["fr"]
+        elif choice == "3":
+            return ["en", "fr"]
         else:
-            print("⚠ Неверный выбор. Введите 1 или 2.")
+            print("⚠ Неверный выбор. Введите 1, 2 или 3.")
+
+
+def run_pipeline(translator: SpeechTranslator):
+    """Запускает конвейерный режим: следующая фраза записывается, пока обрабатывается предыдущая.
+
+    Args:
+        translator: Инициализированная система перевода речи.
+    """
+    pipeline = SpeechPipeline(translator)
+    print("\n📌 ИНСТРУКЦИЯ (конвейерный режим):")
+    if CAPTURE_MODE == "vad":
+        print("  • Просто говорите на русском языке - фраза завершается паузой")
+        print("  • Можно говорить следующую фразу, не дожидаясь перевода предыдущей")
+    else:
+        print(f"  • Нажмите Enter для записи фразы ({RECORD_DURATION} сек)")
+        print("  • Можно записывать следующую фразу, не дожидаясь перевода предыдущей")
+    print("  • Нажмите Ctrl+C для выхода")
+    print("=" * 60)
+
+    if CAPTURE_MODE == "vad":
+        try:
+            pipeline.run_continuous()
+        except KeyboardInterrupt:
+            print("\n\nВыход из приложения...")
+        return
+
+    pipeline.start()
+    try:
+        while True:
+            input("\n⏺ Нажмите Enter для начала записи...")
+            audio = translator.audio_handler.record_audio(RECORD_DURATION)
+            depths = " ".join(f"{name}={depth}" for name, depth in pipeline.queue_depths().items())
+            print(f"Очереди этапов: {depths}")
+            pipeline.submit(audio, translator.audio_handler.sample_rate)
+    except KeyboardInterrupt:
+        print("\n\nВыход из приложения...")
+    finally:
+        pipeline.stop(timeout=1.0)
 
 
 def main():
@@ -40,16 +82,47 @@ def main():
     print()
     print_gpu_info()
 
-    target_lang = select_target_language()
+    target_langs = select_target_languages()
     lang_names = {"en": "Английский", "fr": "Французский"}
-    print(f"\n✓ Выбран целевой язык: {lang_names[target_lang]}")
+    selected = " + ".join(lang_names[lang] for lang in target_langs)
+    print(f"\n✓ Выбран целевой язык: {selected}")
 
-    translator = SpeechTranslator(target_lang=target_lang)
+    translator = SpeechTranslator(target_langs=target_langs)
 
     print("\n" + "=" * 60)
     print("Приложение готово к работе!")
-    print(f"Перевод: Русский -> {lang_names[target_lang]}")
+    print(f"Перевод: Русский -> {selected}")
     print("=" * 60)
+    try:
+        run_session(translator)
+    finally:
+        if METRICS_PRINT:
+            REGISTRY.print_summary()
+        stop_exporters()
+
+
+def run_session(translator: SpeechTranslator):
+    """Запускает выбранный режим работы до выхода пользователя.
+
+    Args:
+        translator: Инициализированная система перевода речи.
+    """
+    if PIPELINE_MODE:
+        run_pipeline(translator)
+        return
+
+    if CAPTURE_MODE == "vad":
+        print("\n📌 ИНСТРУКЦИЯ:")
+        print("  • Просто говорите на русском языке - фраза завершается паузой")
+        print("  • Перевод воспроизводится автоматически после каждой фразы")
+        print("  • Нажмите Ctrl+C для выхода")
+        print("=" * 60)
+        try:
+            translator.run_continuous()
+        except KeyboardInterrupt:
+            print("\n\nВыход из приложения...")
+        return
+
     print("\n📌 ИНСТРУКЦИЯ:")
     print("  • Нажмите Enter для начала записи")
     print("  • Говорите на русском языке (запись длится 5 секунд)")
@@ -2,24 +2,51 @@
 Модуль для распознавания речи с использованием faster-whisper.
 """
 
-from faster_whisper import WhisperModel
-from config import DEVICE, WHISPER_MODELS_DIR
+from typing import Union
+import numpy as np
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.tokenizer import Tokenizer
+from audio.processing import resample_audio, to_mono_float32
+from audio.vad import frame_rms
+from config import (
+    DEVICE, WHISPER_MODELS_DIR, INFERENCE_PROFILE, SILENCE_GATE, SILENCE_GATE_THRESHOLD,
+    SILENCE_GATE_MIN_SPEECH_MS, SILENCE_GATE_PAD_MS, RECOGNITION_NO_SPEECH_THRESHOLD,
+    RECOGNITION_LOGPROB_THRESHOLD
+)
+from utils.metrics import REGISTRY, CPU_FALLBACKS
+
+WHISPER_SAMPLE_RATE = 16000
+# Длина кадра шлюза тишины в миллисекундах
+GATE_FRAME_MS = 30
+
+RECOGNITION_GATED = REGISTRY.counter(
+    "recognition_gated_total",
+    "Записи и сегменты, отброшенные до перевода: тишина, отсутствие речи, низкая уверенность",
+    ("reason",)
+)
 
 
 class SpeechRecognizer:
     """Класс для распознавания речи на русском языке."""
 
-    def __init__(self, model_size: str = "base"):
+    def __init__(self, model_size: str = "base", cpu_compute_type: str = None, cpu_threads: int = None,
+                 device: str = None):
         """Инициализирует распознаватель речи.
 
         Args:
             model_size: Размер модели Whisper ('tiny', 'base', 'small', 'medium', 'large').
+            cpu_compute_type: Тип вычислений на CPU ('float32', 'int8', 'int8_float32');
+                по умолчанию берется из профиля инференса DEVICE_PROFILE.
+            cpu_threads: Число потоков CTranslate2 (0 - по умолчанию); по умолчанию из профиля.
+            device: Устройство ('cuda' или 'cpu'); по умолчанию DEVICE из конфигурации.
         """
         print("Загрузка модели faster-whisper для распознавания речи...")
         print(f"Модели Whisper будут сохранены в: {WHISPER_MODELS_DIR}")
 
         self.model_size = model_size
-        device = "cuda" if DEVICE == "cuda" else "cpu"
+        self.cpu_compute_type = cpu_compute_type or INFERENCE_PROFILE["whisper_cpu_compute_type"]
+        self.cpu_threads = INFERENCE_PROFILE["recognizer_threads"] if cpu_threads is None else cpu_threads
+        device = "cuda" if (device or DEVICE) == "cuda" else "cpu"
         if device == "cuda":
             try:
                 import torch
@@ -37,13 +64,15 @@ class SpeechRecognizer:
                 print(f"⚠ Не удалось определить compute capability GPU: {e}. Используется float32")
                 compute_type = "float32"
         else:
-            compute_type = "float32"
+            compute_type = self.cpu_compute_type
+            print(f"ℹ faster-whisper на CPU: compute_type={compute_type}, потоков={self.cpu_threads or 'по умолчанию'}")
 
         try:
             self.model = WhisperModel(
                 model_size,
                 device=device,
                 compute_type=compute_type,
+                cpu_threads=self.cpu_threads,
                 download_root=WHISPER_MODELS_DIR
             )
             print("✓ Модель faster-whisper загружена!")
@@ -52,59 +81,268 @@ class SpeechRecognizer:
             if device == "cuda" and ("cublas" in error_msg or "cudnn" in error_msg or "dll" in error_msg or "cuda" in error_msg):
                 print(f"⚠ Ошибка при загрузке модели на GPU: {e}")
                 print("ℹ Переключаемся на CPU для faster-whisper")
-                self.model = WhisperModel(
-                    model_size,
-                    device="cpu",
-                    compute_type="float32",
-                    download_root=WHISPER_MODELS_DIR
-                )
+                CPU_FALLBACKS.inc(component="recognizer")
+                self.model = self._load_cpu_model()
                 print("✓ Модель faster-whisper загружена на CPU!")
             else:
                 raise
 
-    def recognize(self, audio_path: str, language: str = "ru") -> str:
-        """Распознает речь в аудиофайле.
+    def _load_cpu_model(self) -> WhisperModel:
+        """Загружает модель на CPU с типом вычислений и числом потоков из профиля."""
+        return WhisperModel(
+            self.model_size,
+            device="cpu",
+            compute_type=self.cpu_compute_type,
+            cpu_threads=self.cpu_threads,
+            download_root=WHISPER_MODELS_DIR
+        )
+
+    def warmup(self):
+        """Выполняет короткий холостой инференс, чтобы первое распознавание не платило за холодный старт."""
+        segments, _ = self.model.transcribe(
+            np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32),
+            language="ru",
+            beam_size=1
+        )
+        for _ in segments:
+            pass
+
+    def recognize(self, audio: Union[str, np.ndarray], language: str = "ru",
+                  sample_rate: int = WHISPER_SAMPLE_RATE) -> str:
+        """Распознает речь в аудиобуфере или аудиофайле.
 
         Args:
-            audio_path: Путь к аудиофайлу.
+            audio: Аудиосигнал (float32, моно) или путь к аудиофайлу.
             language: Код языка для распознавания (по умолчанию 'ru').
+            sample_rate: Частота дискретизации аудиосигнала (игнорируется для пути к файлу).
 
         Returns:
             str: Распознанный текст.
         """
         print("\nРаспознавание речи...")
 
+        audio = self._gate(self._prepare(audio, sample_rate))
+        if audio is None:
+            return ""
+        return self._recognize_prepared(audio, language)
+
+    def _recognize_prepared(self, audio: np.ndarray, language: str) -> str:
+        """Распознает уже подготовленный и пропущенный через шлюз тишины сигнал.
+
+        При ошибке CUDA модель перезагружается на CPU, и распознавание повторяется.
+        """
         try:
-            segments, info = self.model.transcribe(
-                audio_path,
-                language=language,
-                beam_size=5
+            return self._transcribe(audio, language)
+        except Exception as e:
+            error_msg = str(e).lower()
+            if "cublas" in error_msg or "cudnn" in error_msg or "dll" in error_msg:
+                print(f"⚠ Ошибка CUDA при распознавании: {e}")
+                print("ℹ Перезагружаем модель на CPU...")
+                CPU_FALLBACKS.inc(component="recognizer")
+                self.model = self._load_cpu_model()
+                return self._transcribe(audio, language)
+            else:
+                raise
+
+    def recognize_batch(self, audios: list, language: str = "ru",
+                        sample_rate: int = WHISPER_SAMPLE_RATE) -> list:
+        """Распознает несколько коротких фраз одним пакетным вызовом модели.
+
+        Фразы дополняются тишиной до окна Whisper (30 сек), их мел-спектрограммы
+        кодируются и декодируются одним пакетом CTranslate2. Фразы длиннее окна
+        распознаются по отдельности (шлюз тишины применяется к каждой фразе один раз).
+
+        Args:
+            audios: Аудиосигналы (float32, моно).
+            language: Код языка для распознавания (по умолчанию 'ru').
+            sample_rate: Частота дискретизации аудиосигналов.
+
+        Returns:
+            list: Распознанные тексты в порядке входных сигналов.
+        """
+        if len(audios) == 1:
+            return [self.recognize(audios[0], language=language, sample_rate=sample_rate)]
+
+        print(f"\nПакетное распознавание речи: {len(audios)} фраз")
+        feature_extractor = self.model.feature_extractor
+        max_samples = feature_extractor.n_samples
+        results = [""] * len(audios)
+        batch_indices = []
+        batch_audios = []
+        features = []
+        for index, audio in enumerate(audios):
+            audio = self._gate(self._prepare(audio, sample_rate))
+            if audio is None:
+                continue
+            if len(audio) > max_samples:
+                results[index] = self._recognize_prepared(audio, language)
+                continue
+            batch_indices.append(index)
+            batch_audios.append(audio)
+            features.append(self._window_features(audio))
+
+        if not features:
+            return results
+
+        try:
+            tokenizer = Tokenizer(self.model.hf_tokenizer, self.model.model.is_multilingual,
+                                  task="transcribe", language=language)
+            prompt = self.model.get_prompt(tokenizer, [], without_timestamps=True)
+            encoder_output = self.model.encode(np.stack(features).astype(np.float32))
+            outputs = self.model.model.generate(
+                encoder_output,
+                [prompt] * len(features),
+                beam_size=5,
+                max_length=self.model.max_length,
+                return_scores=True,
+                return_no_speech_prob=True,
+                suppress_blank=True,
+                suppress_tokens=[-1]
             )
-            recognized_text = " ".join([segment.text for segment in segments]).strip()
+        except Exception as e:
+            print(f"⚠ Ошибка пакетного распознавания: {e}. Фразы распознаются по отдельности")
+            for index, audio in zip(batch_indices, batch_audios):
+                results[index] = self._recognize_prepared(audio, language)
+            return results
+
+        for index, output in zip(batch_indices, outputs):
+            # Оценка CTranslate2 - log-prob последовательности, нормированный на ее длину
+            if self._rejected(output.no_speech_prob, output.scores[0]):
+                continue
+            results[index] = tokenizer.decode(output.sequences_ids[0]).strip()
+        print(f"Распознанные тексты: {results}")
+        return results
+
+    def recognize_stream(self, audio: Union[str, np.ndarray], language: str = "ru",
+                         sample_rate: int = WHISPER_SAMPLE_RATE):
+        """Распознает речь и отдает текст сегментов по мере их декодирования.
 
-            print(f"Распознанный язык: {info.language}")
-            print(f"Распознанный текст: {recognized_text}")
+        В отличие от recognize, не дожидается конца распознавания: первый
+        сегмент можно переводить, пока декодируются следующие. Если ошибка
+        CUDA возникла во время декодирования, модель перезагружается на CPU,
+        а уже отданные сегменты пропускаются.
 
-            return recognized_text
+        Args:
+            audio: Аудиосигнал (float32, моно) или путь к аудиофайлу.
+            language: Код языка для распознавания (по умолчанию 'ru').
+            sample_rate: Частота дискретизации аудиосигнала (игнорируется для пути к файлу).
+
+        Yields:
+            str: Текст очередного сегмента.
+        """
+        print("\nПотоковое распознавание речи...")
+
+        audio = self._gate(self._prepare(audio, sample_rate))
+        if audio is None:
+            return
+
+        emitted = 0
+        try:
+            for text in self._transcribe_segments(audio, language):
+                emitted += 1
+                yield text
         except Exception as e:
             error_msg = str(e).lower()
             if "cublas" in error_msg or "cudnn" in error_msg or "dll" in error_msg:
                 print(f"⚠ Ошибка CUDA при распознавании: {e}")
                 print("ℹ Перезагружаем модель на CPU...")
-                self.model = WhisperModel(
-                    self.model_size,
-                    device="cpu",
-                    compute_type="float32",
-                    download_root=WHISPER_MODELS_DIR
-                )
-                segments, info = self.model.transcribe(
-                    audio_path,
-                    language=language,
-                    beam_size=5
-                )
-                recognized_text = " ".join([segment.text for segment in segments]).strip()
-                print(f"Распознанный язык: {info.language}")
-                print(f"Распознанный текст: {recognized_text}")
-                return recognized_text
+                CPU_FALLBACKS.inc(component="recognizer")
+                self.model = self._load_cpu_model()
+                for index, text in enumerate(self._transcribe_segments(audio, language)):
+                    if index >= emitted:
+                        yield text
             else:
                 raise
+
+    def _window_features(self, audio: np.ndarray) -> np.ndarray:
+        """Мел-спектрограмма окна Whisper для фразы не длиннее окна.
+
+        Дополняется сам сигнал, а не спектрограмма: нули в лог-мел - это не
+        тишина, а заметный уровень сигнала, и пакетный результат расходился
+        бы с распознаванием фразы по отдельности.
+        """
+        feature_extractor = self.model.feature_extractor
+        audio = np.pad(audio, (0, feature_extractor.n_samples - len(audio)))
+        return feature_extractor(audio)[:, :feature_extractor.nb_max_frames]
+
+    @staticmethod
+    def _prepare(audio: Union[str, np.ndarray], sample_rate: int) -> np.ndarray:
+        """Приводит аудиосигнал или файл к моно float32 с частотой Whisper."""
+        if isinstance(audio, np.ndarray):
+            return resample_audio(to_mono_float32(audio), sample_rate, WHISPER_SAMPLE_RATE)
+        return decode_audio(audio, sampling_rate=WHISPER_SAMPLE_RATE)
+
+    @staticmethod
+    def _gate(audio: np.ndarray):
+        """Шлюз тишины: обрезает тишину по краям или отбрасывает запись без речи.
+
+        Args:
+            audio: Моно-сигнал float32 с частотой Whisper.
+
+        Returns:
+            np.ndarray: Сигнал от первого до последнего кадра речи (с запасом
+                SILENCE_GATE_PAD_MS) или None, если речи меньше SILENCE_GATE_MIN_SPEECH_MS.
+        """
+        if not SILENCE_GATE:
+            return audio
+        frame_length = WHISPER_SAMPLE_RATE * GATE_FRAME_MS // 1000
+        voiced = np.flatnonzero(frame_rms(audio, frame_length) >= SILENCE_GATE_THRESHOLD)
+        if len(voiced) * GATE_FRAME_MS < SILENCE_GATE_MIN_SPEECH_MS:
+            RECOGNITION_GATED.inc(reason="silence")
+            print("Речь не обнаружена: распознавание пропущено")
+            return None
+
+        pad = WHISPER_SAMPLE_RATE * SILENCE_GATE_PAD_MS // 1000
+        start = max(0, voiced[0] * frame_length - pad)
+        end = min(len(audio), (voiced[-1] + 1) * frame_length + pad)
+        if end - start < len(audio):
+            print(f"Тишина обрезана: {(len(audio) - (end - start)) / WHISPER_SAMPLE_RATE:.2f} сек")
+        return audio[start:end]
+
+    @staticmethod
+    def _rejected(no_speech_prob: float, avg_logprob: float) -> bool:
+        """Проверяет, что сегмент - не речь или распознан с низкой уверенностью (и считает отброшенные)."""
+        if no_speech_prob > RECOGNITION_NO_SPEECH_THRESHOLD:
+            RECOGNITION_GATED.inc(reason="no_speech")
+            return True
+        if avg_logprob < RECOGNITION_LOGPROB_THRESHOLD:
+            RECOGNITION_GATED.inc(reason="low_confidence")
+            return True
+        return False
+
+    def _segments(self, audio: np.ndarray, language: str):
+        """Запускает faster-whisper и возвращает сегменты, прошедшие фильтры уверенности.
+
+        Returns:
+            tuple: Ленивый итератор сегментов и сведения о распознавании.
+        """
+        segments, info = self.model.transcribe(
+            audio,
+            language=language,
+            beam_size=5
+        )
+        return (segment for segment in segments if not self._dropped(segment)), info
+
+    def _dropped(self, segment) -> bool:
+        if not self._rejected(segment.no_speech_prob, segment.avg_logprob):
+            return False
+        print(f"Сегмент [{segment.start:.1f}-{segment.end:.1f} сек] отброшен "
+              f"(no_speech={segment.no_speech_prob:.2f}, logprob={segment.avg_logprob:.2f}): {segment.text.strip()}")
+        return True
+
+    def _transcribe_segments(self, audio: np.ndarray, language: str):
+        segments, _ = self._segments(audio, language)
+        for segment in segments:
+            text = segment.text.strip()
+            if text:
+                print(f"Сегмент [{segment.start:.1f}-{segment.end:.1f} сек]: {text}")
+                yield text
+
+    def _transcribe(self, audio: np.ndarray, language: str) -> str:
+        segments, info = self._segments(audio, language)
+        recognized_text = " ".join([segment.text for segment in segments]).strip()
+
+        print(f"Распознанный язык: {info.language}")
+        print(f"Распознанный текст: {recognized_text}")
+
+        return recognized_text
@@ -0,0 +1,9 @@
+"""
+Серверный режим: потоковый перевод речи для многих клиентов с общим набором моделей.
+"""
+
+from server.models import SharedModels
+from server.session import ClientSession
+from server.app import TranslationServer
+
+__all__ = ['SharedModels', 'ClientSession', 'TranslationServer']
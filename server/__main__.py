@@ -0,0 +1,57 @@
+"""
+Серверный режим перевода речи.
+
+Пример:
+    python -m server --port 8765 --max-sessions 8
+"""
+
+import argparse
+import asyncio
+from server.app import TranslationServer
+from server.models import SharedModels
+from config import (
+    DEVICE, SERVER_HOST, SERVER_PORT, SERVER_MAX_SESSIONS, SERVER_SESSION_QUEUE,
+    METRICS_PORT, METRICS_HOST, METRICS_FILE, METRICS_FILE_INTERVAL, print_gpu_info
+)
+from utils import start_exporters, stop_exporters
+
+
+def parse_args():
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(description="WebSocket-сервер потокового перевода русской речи")
+    parser.add_argument("--host", default=SERVER_HOST, help="Адрес для прослушивания")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Порт")
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS,
+                        help="Максимальное число одновременных сессий")
+    parser.add_argument("--queue-size", type=int, default=SERVER_SESSION_QUEUE,
+                        help="Число фраз одной сессии, ожидающих обработки")
+    parser.add_argument("--no-synthesis", action="store_true", help="Не загружать синтезатор (только текст)")
+    return parser.parse_args()
+
+
+def main():
+    """Загружает модели один раз и обслуживает клиентов."""
+    args = parse_args()
+    print(f"Используется устройство: {DEVICE}")
+    print_gpu_info()
+    start_exporters(METRICS_PORT, METRICS_FILE, METRICS_FILE_INTERVAL, METRICS_HOST)
+
+    models = SharedModels(synthesis=not args.no_synthesis)
+    server = TranslationServer(
+        models,
+        host=args.host,
+        port=args.port,
+        max_sessions=args.max_sessions,
+        queue_size=args.queue_size
+    )
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        print("\n\nСервер остановлен.")
+    finally:
+        models.shutdown()
+        stop_exporters()
+
+
+if __name__ == "__main__":
+    main()
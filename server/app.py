@@ -0,0 +1,168 @@
+"""
+WebSocket-сервер потокового перевода речи для многих клиентов.
+"""
+
+import asyncio
+import itertools
+import json
+from server.session import ClientSession, AUDIO_FORMAT
+from config import SERVER_HOST, SERVER_PORT, SERVER_MAX_SESSIONS, SERVER_SESSION_QUEUE
+from utils.metrics import REGISTRY
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+SESSIONS = REGISTRY.gauge("server_sessions", "Число активных сессий сервера")
+
+# Максимальный размер входящего сообщения (блока аудио) в байтах
+MAX_MESSAGE_BYTES = 1024 ** 2
+
+
+class TranslationServer:
+    """Сервер, принимающий аудио клиентов по WebSocket и возвращающий результаты потоком.
+
+    Протокол: клиент отправляет JSON {"type": "start", "sample_rate": 16000,
+    "target_lang": "en", "synthesize": true}, затем бинарные сообщения с
+    аудио (16-битный PCM, моно) и в конце {"type": "end"}. Сервер отвечает
+    JSON-сообщениями transcript, translation, turn_end и error; за каждым
+    сообщением audio следует бинарное сообщение с синтезированной речью.
+    Все сессии используют общий набор моделей.
+    """
+
+    def __init__(self, models, host: str = SERVER_HOST, port: int = SERVER_PORT,
+                 max_sessions: int = SERVER_MAX_SESSIONS, queue_size: int = SERVER_SESSION_QUEUE):
+        """Инициализирует сервер.
+
+        Args:
+            models: Общий набор моделей (SharedModels).
+            host: Адрес для прослушивания.
+            port: Порт.
+            max_sessions: Максимальное число одновременных сессий.
+            queue_size: Число фраз одной сессии, ожидающих обработки.
+        """
+        self.models = models
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.queue_size = queue_size
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    async def serve(self, stop_event: asyncio.Event = None):
+        """Запускает сервер и обслуживает клиентов до выставления stop_event.
+
+        Raises:
+            RuntimeError: Если не установлена библиотека websockets.
+        """
+        if websockets is None:
+            raise RuntimeError("Для серверного режима установите websockets: pip install websockets")
+
+        stop_event = stop_event or asyncio.Event()
+        async with websockets.serve(self._handle, self.host, self.port, max_size=MAX_MESSAGE_BYTES):
+            print(f"✓ Сервер перевода речи: ws://{self.host}:{self.port} "
+                  f"(до {self.max_sessions} сессий)")
+            await stop_event.wait()
+
+    async def _handle(self, websocket, path: str = None):
+        if len(self.sessions) >= self.max_sessions:
+            await self._send(websocket, {"type": "error", "message": "Сервер перегружен, попробуйте позже"})
+            await websocket.close(code=1013, reason="server busy")
+            return
+
+        # Место резервируется до первого await, иначе клиенты, одновременно ожидающие
+        # сообщения start, вместе превысили бы max_sessions
+        session_id = next(self._ids)
+        self.sessions[session_id] = None
+        try:
+            await self._run_session(websocket, session_id)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.sessions.pop(session_id, None)
+            SESSIONS.set(len(self.sessions))
+
+    async def _run_session(self, websocket, session_id: int):
+        try:
+            start = self._parse(await websocket.recv())
+            if start.get("type") != "start":
+                raise ValueError("первое сообщение должно иметь тип 'start'")
+
+            async def send(message):
+                await self._send(websocket, message)
+
+            session = ClientSession(
+                session_id,
+                self.models,
+                send,
+                sample_rate=start.get("sample_rate", 16000),
+                target_lang=start.get("target_lang", "en"),
+                synthesize=bool(start.get("synthesize", True)),
+                queue_size=self.queue_size
+            )
+        except (ValueError, TypeError) as e:
+            await self._send(websocket, {"type": "error", "message": f"Некорректное начало сессии: {e}"})
+            await websocket.close(code=1003, reason="bad start message")
+            return
+
+        self.sessions[session_id] = session
+        SESSIONS.set(len(self.sessions))
+        print(f"ℹ Сессия #{session_id} открыта ({session.sample_rate} Гц -> {session.target_lang})")
+        await self._send(websocket, {
+            "type": "ready",
+            "session": session_id,
+            "audio_format": AUDIO_FORMAT,
+            "synthesize": session.synthesize,
+        })
+
+        worker = asyncio.create_task(session.run())
+        bad_message = None
+        try:
+            async for message in websocket:
+                try:
+                    if isinstance(message, bytes):
+                        await session.feed(message)
+                    elif self._parse(message).get("type") == "end":
+                        break
+                except ValueError as e:
+                    bad_message = e
+                    break
+                if worker.done():
+                    break
+            if bad_message is None and not worker.done():
+                await session.finish()
+                await worker
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if not worker.done():
+                worker.cancel()
+            elif not worker.cancelled() and worker.exception() is not None:
+                print(f"⚠ Сессия #{session_id} прервана: {worker.exception()}")
+            print(f"ℹ Сессия #{session_id} закрыта (фраз: {session.turns})")
+
+        if bad_message is not None:
+            await self._send(websocket, {"type": "error", "message": f"Некорректное сообщение: {bad_message}"})
+            await websocket.close(code=1003, reason="bad message")
+            return
+        await websocket.close()
+
+    @staticmethod
+    def _parse(message) -> dict:
+        """Разбирает управляющее сообщение клиента.
+
+        Raises:
+            ValueError: Если сообщение не является JSON-объектом.
+        """
+        message = json.loads(message)
+        if not isinstance(message, dict):
+            raise ValueError("ожидался JSON-объект")
+        return message
+
+    @staticmethod
+    async def _send(websocket, message):
+        if isinstance(message, bytes):
+            await websocket.send(message)
+        else:
+            await websocket.send(json.dumps(message, ensure_ascii=False))
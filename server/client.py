@@ -0,0 +1,153 @@
+"""
+Тестовый клиент сервера перевода речи: передает аудиофайл блоками, как микрофон.
+
+Пример:
+    python -m server.client sample.wav --lang en --clients 4 --output client_output
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import numpy as np
+import soundfile as sf
+from audio.processing import to_mono_float32
+from server.session import decode_pcm, encode_pcm
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+async def run_client(index: int, url: str, audio: np.ndarray, sample_rate: int, target_lang: str = "en",
+                     synthesize: bool = True, chunk_ms: int = 100, realtime: bool = True,
+                     output_dir: str = None) -> dict:
+    """Передает аудио серверу и собирает результаты.
+
+    Args:
+        index: Номер клиента (для вывода и имен файлов).
+        url: Адрес сервера (ws://host:port).
+        audio: Аудиосигнал float32, моно.
+        sample_rate: Частота дискретизации сигнала.
+        target_lang: Целевой язык.
+        synthesize: Запрашивать ли синтезированную речь.
+        chunk_ms: Длительность одного блока аудио в миллисекундах.
+        realtime: Передавать блоки в темпе реального времени.
+        output_dir: Папка для синтезированной речи (None - не сохранять).
+
+    Returns:
+        dict: Статистика клиента: фразы, время до первого звука и полное время.
+    """
+    stats = {"turns": 0, "first_audio_latency": [], "turn_latency": [], "errors": 0}
+    speech = {}
+    chunk_samples = max(1, int(sample_rate * chunk_ms / 1000))
+
+    async with websockets.connect(url, max_size=None) as websocket:
+        await websocket.send(json.dumps({
+            "type": "start",
+            "sample_rate": sample_rate,
+            "target_lang": target_lang,
+            "synthesize": synthesize,
+        }))
+
+        async def send_audio():
+            for start in range(0, len(audio), chunk_samples):
+                await websocket.send(encode_pcm(audio[start:start + chunk_samples]))
+                if realtime:
+                    await asyncio.sleep(chunk_ms / 1000)
+            await websocket.send(json.dumps({"type": "end"}))
+
+        sender = asyncio.create_task(send_audio())
+        audio_header = None
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    if audio_header is not None:
+                        speech.setdefault(audio_header["turn"], []).append(
+                            (decode_pcm(message), audio_header["sample_rate"])
+                        )
+                        audio_header = None
+                    continue
+
+                event = json.loads(message)
+                kind = event.get("type")
+                if kind == "audio":
+                    audio_header = event
+                elif kind == "transcript":
+                    print(f"[клиент {index}] #{event['turn']} RU: {event['text']}")
+                elif kind == "translation":
+                    print(f"[клиент {index}] #{event['turn']} {target_lang.upper()}: {event['text']}")
+                elif kind == "turn_end":
+                    stats["turns"] += 1
+                    stats["turn_latency"].append(event["latency"])
+                    if event.get("first_audio_latency") is not None:
+                        stats["first_audio_latency"].append(event["first_audio_latency"])
+                    print(f"[клиент {index}] #{event['turn']} готово за {event['latency']:.2f} сек")
+                elif kind == "error":
+                    stats["errors"] += 1
+                    print(f"[клиент {index}] ⚠ {event.get('message')}")
+        finally:
+            sender.cancel()
+
+    if output_dir and speech:
+        os.makedirs(output_dir, exist_ok=True)
+        for turn, parts in speech.items():
+            path = os.path.join(output_dir, f"client{index}_turn{turn}.wav")
+            sf.write(path, np.concatenate([part for part, _ in parts]), parts[0][1], subtype="PCM_16")
+    return stats
+
+
+async def run_clients(args) -> list:
+    """Запускает несколько клиентов одновременно."""
+    data, sample_rate = sf.read(args.audio, dtype="float32")
+    audio = to_mono_float32(data)
+    tasks = [
+        run_client(
+            index, args.url, audio, sample_rate,
+            target_lang=args.lang,
+            synthesize=not args.no_synthesis,
+            chunk_ms=args.chunk_ms,
+            realtime=not args.fast,
+            output_dir=args.output
+        )
+        for index in range(1, args.clients + 1)
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def main():
+    """Точка входа тестового клиента."""
+    parser = argparse.ArgumentParser(description="Тестовый клиент сервера перевода речи")
+    parser.add_argument("audio", help="Аудиофайл с русской речью")
+    parser.add_argument("--url", default="ws://127.0.0.1:8765", help="Адрес сервера")
+    parser.add_argument("--lang", choices=["en", "fr"], default="en", help="Целевой язык")
+    parser.add_argument("--clients", type=int, default=1, help="Число одновременных клиентов")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Длительность блока аудио, мс")
+    parser.add_argument("--fast", action="store_true", help="Передавать аудио без паузы между блоками")
+    parser.add_argument("--no-synthesis", action="store_true", help="Получать только текст")
+    parser.add_argument("--output", help="Папка для сохранения синтезированной речи")
+    args = parser.parse_args()
+
+    if websockets is None:
+        raise RuntimeError("Для тестового клиента установите websockets: pip install websockets")
+
+    start_time = time.time()
+    results = asyncio.run(run_clients(args))
+    elapsed = time.time() - start_time
+
+    print("\n" + "=" * 60)
+    print("ИТОГИ КЛИЕНТОВ")
+    print("=" * 60)
+    for index, stats in enumerate(results, start=1):
+        first_audio = stats["first_audio_latency"]
+        first_audio_text = f"{sum(first_audio) / len(first_audio):.2f} сек" if first_audio else "-"
+        print(f"Клиент {index}: фраз {stats['turns']}, ошибок {stats['errors']}, "
+              f"среднее время до первого звука {first_audio_text}")
+    print(f"Общее время: {elapsed:.1f} сек")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Общий набор моделей сервера с отдельным исполнителем для каждой модели.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from core.batching import MicroBatcher
+from core.speech_translator import COMPONENTS, load_components
+from core.startup import StartupReport
+from config import MICRO_BATCHING, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS, MICRO_BATCH_MIN_WAIT_MS
+
+_END = object()
+
+
+class SharedModels:
+    """Распознаватель, переводчик и синтезатор, загруженные один раз на процесс.
+
+    Каждая модель обслуживается собственным однопоточным исполнителем: вызовы
+    одной модели из разных сессий выполняются по очереди, а разные этапы
+    разных сессий (например, распознавание одной и синтез другой) - параллельно.
+    При микропакетировании одновременные запросы к распознаванию и переводу
+    объединяются планировщиком в пакетные вызовы.
+    """
+
+    def __init__(self, synthesis: bool = True, micro_batching: bool = MICRO_BATCHING):
+        """Загружает модели.
+
+        Args:
+            synthesis: Загружать ли синтезатор речи (без него сервер отдает только текст).
+            micro_batching: Объединять ли одновременные запросы распознавания и перевода в пакеты.
+
+        Raises:
+            RuntimeError: Если модель не удалось загрузить.
+        """
+        names = [name for name in COMPONENTS if synthesis or name != "synthesizer"]
+        self.startup_report = StartupReport()
+        components = load_components(self.startup_report, names)
+        self.startup_report.finish()
+        self.startup_report.print_report()
+
+        self.recognizer = components["recognizer"]
+        self.translator = components["translator"]
+        self.synthesizer = components.get("synthesizer")
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"server-{name}")
+            for name in components
+        }
+
+        self._batchers = {}
+        if micro_batching:
+            batcher_params = {
+                "max_batch_size": MICRO_BATCH_MAX_SIZE,
+                "max_wait_ms": MICRO_BATCH_MAX_WAIT_MS,
+                "min_wait_ms": MICRO_BATCH_MIN_WAIT_MS,
+            }
+            self._batchers["recognizer"] = MicroBatcher(
+                "recognize",
+                lambda audios, sample_rate: self.recognizer.recognize_batch(audios, sample_rate=sample_rate),
+                **batcher_params
+            )
+            self._batchers["translator"] = MicroBatcher("translate", self._translate_batch, **batcher_params)
+            print(f"✓ Микропакетирование: до {MICRO_BATCH_MAX_SIZE} запросов, "
+                  f"окно {MICRO_BATCH_MIN_WAIT_MS:g}-{MICRO_BATCH_MAX_WAIT_MS:g} мс")
+
+    def _translate_batch(self, texts: list, target_lang: str) -> list:
+        if len(texts) == 1:
+            return [self.translator.translate(texts[0], target_lang=target_lang)]
+        return self.translator.translate_many(texts, target_lang=target_lang)
+
+    async def recognize_segments(self, audio, sample_rate: int):
+        """Распознает фразу и отдает текст по мере готовности.
+
+        При микропакетировании фраза распознается целиком в пакете с фразами
+        других сессий, иначе сегменты отдаются по мере декодирования.
+
+        Args:
+            audio: Аудиосигнал фразы (float32, моно).
+            sample_rate: Частота дискретизации.
+
+        Yields:
+            str: Текст сегмента (или всей фразы).
+        """
+        batcher = self._batchers.get("recognizer")
+        if batcher is not None:
+            text = await asyncio.wrap_future(batcher.submit(audio, key=sample_rate))
+            if text:
+                yield text
+            return
+        segments = self.recognizer.recognize_stream(audio, sample_rate=sample_rate)
+        async for segment in self.iterate("recognizer", segments):
+            yield segment
+
+    async def translate(self, text: str, target_lang: str) -> str:
+        """Переводит текст (в пакете с запросами других сессий, если включено микропакетирование)."""
+        batcher = self._batchers.get("translator")
+        if batcher is not None:
+            return await asyncio.wrap_future(batcher.submit(text, key=target_lang))
+        return await self.run("translator", self.translator.translate, text, target_lang=target_lang)
+
+    async def run(self, name: str, func, *args, **kwargs):
+        """Выполняет вызов модели в ее исполнителе, не блокируя цикл событий.
+
+        Args:
+            name: Название модели ('recognizer', 'translator', 'synthesizer').
+            func: Вызываемая функция.
+            *args: Позиционные аргументы.
+            **kwargs: Именованные аргументы.
+
+        Returns:
+            Результат вызова.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executors[name], functools.partial(func, *args, **kwargs))
+
+    async def iterate(self, name: str, iterator):
+        """Продвигает синхронный генератор модели в ее исполнителе.
+
+        Между элементами исполнитель свободен, поэтому потоковые вызовы
+        разных сессий чередуются, а не ждут друг друга целиком.
+
+        Args:
+            name: Название модели.
+            iterator: Генератор (например, recognize_stream или synthesize_stream).
+
+        Yields:
+            Очередной элемент генератора.
+        """
+        while True:
+            item = await self.run(name, next, iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def shutdown(self):
+        """Останавливает планировщики и исполнители моделей."""
+        for batcher in self._batchers.values():
+            batcher.close()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
@@ -0,0 +1,168 @@
+"""
+Сессия клиента: сегментация входящего аудио и потоковая обработка фраз.
+"""
+
+import asyncio
+import time
+import numpy as np
+from audio.vad import UtteranceSegmenter
+from core.streaming import StableTextCommitter
+from config import (
+    VAD_ENERGY_THRESHOLD, VAD_SILENCE_MS, VAD_MIN_SPEECH_MS, VAD_PRE_ROLL_MS, VAD_MAX_UTTERANCE_S,
+    STREAMING_COMMIT_MIN_CHARS, STREAMING_COMMIT_MAX_PENDING_CHARS
+)
+from utils.metrics import FAILURES, FIRST_AUDIO_LATENCY, TURN_LATENCY
+
+# Формат аудио в бинарных сообщениях: 16-битный PCM little-endian, моно
+AUDIO_FORMAT = "pcm_s16le"
+
+# Допустимая частота дискретизации аудио клиента (Гц)
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 192000
+
+
+def decode_pcm(data: bytes) -> np.ndarray:
+    """Преобразует 16-битный PCM в float32 в диапазоне [-1, 1].
+
+    Raises:
+        ValueError: Если длина блока не кратна размеру отсчета.
+    """
+    if len(data) % 2:
+        raise ValueError(f"длина аудиоблока ({len(data)} байт) не кратна размеру отсчета {AUDIO_FORMAT}")
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def encode_pcm(audio: np.ndarray) -> bytes:
+    """Преобразует сигнал float32 в 16-битный PCM."""
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+class ClientSession:
+    """Состояние одного клиента сервера.
+
+    Входящие блоки аудио сегментируются по речи собственным сегментатором
+    сессии. Завершенные фразы ставятся в ограниченную очередь и обрабатываются
+    по порядку: распознанный текст фиксируется по предложениям, каждый
+    фрагмент сразу переводится и озвучивается, а результаты отправляются
+    клиенту по мере готовности. Когда очередь фраз заполнена, feed ждет ее
+    освобождения, и сервер перестает читать аудио клиента.
+    """
+
+    def __init__(self, session_id: int, models, send, sample_rate: int, target_lang: str = "en",
+                 synthesize: bool = True, queue_size: int = 2):
+        """Инициализирует сессию.
+
+        Args:
+            session_id: Номер сессии.
+            models: Общий набор моделей (SharedModels).
+            send: Корутина отправки сообщения клиенту (dict или bytes).
+            sample_rate: Частота дискретизации аудио клиента.
+            target_lang: Целевой язык ('en' или 'fr').
+            synthesize: Отправлять ли синтезированную речь.
+            queue_size: Максимальное число фраз, ожидающих обработки.
+
+        Raises:
+            ValueError: Если указан неподдерживаемый целевой язык или недопустимая частота.
+        """
+        if target_lang not in ["en", "fr"]:
+            raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
+        if (isinstance(sample_rate, bool) or not isinstance(sample_rate, int)
+                or not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE):
+            raise ValueError(f"Недопустимая частота дискретизации: {sample_rate!r}. "
+                             f"Ожидается целое число от {MIN_SAMPLE_RATE} до {MAX_SAMPLE_RATE} Гц")
+
+        self.session_id = session_id
+        self.models = models
+        self.send = send
+        self.sample_rate = sample_rate
+        self.target_lang = target_lang
+        self.synthesize = synthesize and models.synthesizer is not None
+        self.turns = 0
+        self.segmenter = UtteranceSegmenter(
+            sample_rate,
+            energy_threshold=VAD_ENERGY_THRESHOLD,
+            min_speech_ms=VAD_MIN_SPEECH_MS,
+            silence_ms=VAD_SILENCE_MS,
+            pre_roll_ms=VAD_PRE_ROLL_MS,
+            max_utterance_s=VAD_MAX_UTTERANCE_S
+        )
+        self._utterances = asyncio.Queue(maxsize=max(1, queue_size))
+
+    async def feed(self, data: bytes):
+        """Принимает блок аудио клиента и ставит завершенные фразы в очередь.
+
+        Raises:
+            ValueError: Если блок не является 16-битным PCM.
+        """
+        for utterance in self.segmenter.feed(decode_pcm(data)):
+            await self._utterances.put((utterance, time.time()))
+
+    async def finish(self):
+        """Завершает поток аудио: последняя незавершенная фраза тоже обрабатывается."""
+        utterance = self.segmenter.flush()
+        if utterance is not None:
+            await self._utterances.put((utterance, time.time()))
+        await self._utterances.put(None)
+
+    async def run(self):
+        """Обрабатывает фразы из очереди до конца потока аудио."""
+        while True:
+            entry = await self._utterances.get()
+            if entry is None:
+                break
+            utterance, created_at = entry
+            self.turns += 1
+            try:
+                await self._process_turn(self.turns, utterance, created_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                FAILURES.inc(stage="server")
+                print(f"⚠ Сессия #{self.session_id}, фраза #{self.turns}: {e}")
+                await self.send({"type": "error", "turn": self.turns, "message": str(e)})
+
+    async def _process_turn(self, turn: int, audio: np.ndarray, created_at: float):
+        models = self.models
+        committer = StableTextCommitter(STREAMING_COMMIT_MIN_CHARS, STREAMING_COMMIT_MAX_PENDING_CHARS)
+        state = {"first_audio": None}
+
+        async for segment in models.recognize_segments(audio, self.sample_rate):
+            for piece in committer.add(segment):
+                await self._process_piece(turn, piece, created_at, state)
+        for piece in committer.flush():
+            await self._process_piece(turn, piece, created_at, state)
+
+        latency = time.time() - created_at
+        TURN_LATENCY.observe(latency)
+        await self.send({
+            "type": "turn_end",
+            "turn": turn,
+            "text": committer.committed_text,
+            "latency": latency,
+            "first_audio_latency": state["first_audio"],
+        })
+
+    async def _process_piece(self, turn: int, piece: str, created_at: float, state: dict):
+        await self.send({"type": "transcript", "turn": turn, "text": piece})
+
+        translation = await self.models.translate(piece, self.target_lang)
+        if not translation or len(translation.strip()) == 0:
+            FAILURES.inc(stage="translate")
+            return
+        await self.send({"type": "translation", "turn": turn, "text": translation})
+
+        if not self.synthesize:
+            return
+        synthesizer = self.models.synthesizer
+        chunks = synthesizer.synthesize_stream(translation, target_lang=self.target_lang)
+        async for speech, speech_rate in self.models.iterate("synthesizer", chunks):
+            if state["first_audio"] is None:
+                state["first_audio"] = time.time() - created_at
+                FIRST_AUDIO_LATENCY.observe(state["first_audio"])
+            await self.send({
+                "type": "audio",
+                "turn": turn,
+                "sample_rate": speech_rate,
+                "format": AUDIO_FORMAT,
+            })
+            await self.send(encode_pcm(speech))
@@ -3,5 +3,7 @@
 """
 
 from synthesis.synthesizer import SpeechSynthesizer
+from synthesis.cache import AudioCache
+from synthesis.postprocess import StreamingPostProcessor
 
-__all__ = ['SpeechSynthesizer']
\ No newline at end of file
+__all__ = ['SpeechSynthesizer', 'AudioCache', 'StreamingPostProcessor']
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+Кэш синтезированного аудио с адресацией по содержимому и ограничением по размеру.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.metrics import CACHE_REQUESTS
+
+
+class AudioCache:
+    """Кэш аудио синтеза на диске.
+
+    Хранится исходный выход Bark до постобработки (фильтрации, нормализации
+    и передискретизации), поэтому изменение постобработки не требует сброса
+    кэша. Ключ - хэш текста, языка, голоса и параметров генерации. Каждая запись
+    хранится отдельным файлом .npy (int16 или float32), который читается через
+    memory map. Суммарный размер ограничен бюджетом в байтах: при превышении
+    удаляются записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 ** 2, dtype: str = "int16"):
+        """Инициализирует кэш и восстанавливает индекс из файлов в папке.
+
+        Args:
+            directory: Папка для файлов кэша.
+            max_bytes: Бюджет размера кэша в байтах.
+            dtype: Формат хранения сэмплов: 'int16' (компактно) или 'float32' (без потерь).
+
+        Raises:
+            ValueError: Если указан неподдерживаемый формат хранения.
+        """
+        if dtype not in ("int16", "float32"):
+            raise ValueError(f"Неподдерживаемый формат кэша аудио: {dtype}. Используйте 'int16' или 'float32'")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for filename in os.listdir(directory):
+            if not filename.endswith(".npy"):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                key, sample_rate = filename[:-4].rsplit("_", 1)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, key, path, stat.st_size, int(sample_rate)))
+            except (ValueError, OSError):
+                continue
+        for _, key, path, size, sample_rate in sorted(entries):
+            self._index[key] = (path, size, sample_rate)
+            self.total_bytes += size
+
+    @staticmethod
+    def make_key(text: str, language: str, voice: str, params: dict) -> str:
+        """Строит ключ записи кэша.
+
+        Args:
+            text: Синтезируемый текст.
+            language: Язык синтеза.
+            voice: Голос/пресет (или None).
+            params: Параметры генерации, влияющие на результат.
+
+        Returns:
+            str: Хэш SHA-256 ключа.
+        """
+        payload = json.dumps([text.strip(), language, voice, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def seed_for_key(key: str) -> int:
+        """Возвращает детерминированное зерно генератора случайных чисел для ключа."""
+        return int(key[:8], 16)
+
+    def get(self, key: str):
+        """Возвращает аудио из кэша.
+
+        Args:
+            key: Ключ, построенный make_key.
+
+        Returns:
+            tuple: Пара (аудиосигнал float32, частота дискретизации) или None.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                CACHE_REQUESTS.inc(cache="audio", result="miss")
+                return None
+            self._index.move_to_end(key)
+
+        path, _, sample_rate = entry
+        try:
+            stored = np.load(path, mmap_mode="r")
+            if stored.dtype == np.int16:
+                audio = stored.astype(np.float32) / 32767.0
+            else:
+                audio = np.array(stored, dtype=np.float32)
+            del stored
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self._drop(key)
+                self.stats["misses"] += 1
+            CACHE_REQUESTS.inc(cache="audio", result="miss")
+            return None
+
+        with self._lock:
+            self.stats["hits"] += 1
+        CACHE_REQUESTS.inc(cache="audio", result="hit")
+        return audio, sample_rate
+
+    def put(self, key: str, audio: np.ndarray, sample_rate: int):
+        """Сохраняет аудио в кэш и при необходимости вытесняет старые записи.
+
+        Args:
+            key: Ключ, построенный make_key.
+            audio: Аудиосигнал float32 в диапазоне [-1, 1].
+            sample_rate: Частота дискретизации.
+        """
+        if self.dtype == np.int16:
+            stored = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+        else:
+            stored = np.asarray(audio, dtype=np.float32)
+
+        path = os.path.join(self.directory, f"{key}_{sample_rate}.npy")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, stored)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"⚠ Не удалось сохранить аудио в кэш: {e}")
+            return
+
+        with self._lock:
+            if key in self._index:
+                self.total_bytes -= self._index[key][1]
+            self._index[key] = (path, size, sample_rate)
+            self._index.move_to_end(key)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._drop(oldest, remove_file=True)
+                self.stats["evictions"] += 1
+
+    def _drop(self, key: str, remove_file: bool = False):
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return
+        path, size, _ = entry
+        self.total_bytes -= size
+        if remove_file:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
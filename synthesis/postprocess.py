@@ -0,0 +1,137 @@
+"""
+Потоковая постобработка синтезированной речи: фильтр, нормализация и передискретизация по фрагментам.
+"""
+
+import numpy as np
+from scipy import signal
+from audio.processing import StreamingResampler
+from config import SYNTHESIS_HIGHPASS_HZ, SYNTHESIS_PEAK, SYNTHESIS_MAX_GAIN, SYNTHESIS_LOOKAHEAD_MS
+
+# Максимальная длина блока, подаваемого в передискретизатор за один вызов
+_RESAMPLE_BLOCK = 4096
+
+
+class StreamingPostProcessor:
+    """Постобработка аудио, поступающего фрагментами, с сохранением состояния между ними.
+
+    Этапы:
+        1. Фильтр высоких частот Баттерворта в форме SOS с сохранением состояния
+           (убирает низкочастотный гул Bark).
+        2. Нормализация по нарастающему пику с упреждением: усиление приводит
+           максимальный пик, замеченный на lookahead вперед, к целевому уровню,
+           и сглаживается скользящим средним по окну упреждения, поэтому пик
+           не превышает целевой уровень еще до того, как до него дойдет выход.
+        3. Передискретизация в частоту устройства воспроизведения.
+
+    Все этапы причинные и хранят свое состояние, поэтому результат не зависит
+    от того, как сигнал разбит на фрагменты: выход за всю фразу совпадает с
+    конкатенацией выходов process по фрагментам и flush в конце. Выход
+    задерживается на длину упреждения, хвост отдает flush.
+    """
+
+    def __init__(self, sample_rate: int, output_rate: int = None, highpass_hz: float = SYNTHESIS_HIGHPASS_HZ,
+                 peak: float = SYNTHESIS_PEAK, max_gain: float = SYNTHESIS_MAX_GAIN,
+                 lookahead_ms: float = SYNTHESIS_LOOKAHEAD_MS):
+        """Инициализирует постобработку.
+
+        Args:
+            sample_rate: Частота дискретизации входного сигнала.
+            output_rate: Частота выходного сигнала (по умолчанию равна входной).
+            highpass_hz: Частота среза фильтра высоких частот (0 - без фильтра).
+            peak: Целевой уровень пика после нормализации.
+            max_gain: Максимальное усиление (чтобы не поднимать тишину и шум).
+            lookahead_ms: Упреждение нормализации в миллисекундах.
+        """
+        self.sample_rate = sample_rate
+        self.output_rate = output_rate or sample_rate
+        self.peak = peak
+        self.min_envelope = peak / max(max_gain, 1e-6)
+        self.lookahead = max(1, int(sample_rate * lookahead_ms / 1000))
+
+        self._sos = None
+        if highpass_hz and 0 < highpass_hz < sample_rate / 2:
+            self._sos = signal.butter(3, highpass_hz, "high", fs=sample_rate, output="sos")
+
+        self.resampler = None
+        if self.output_rate != sample_rate:
+            self.resampler = StreamingResampler(sample_rate, self.output_rate, _RESAMPLE_BLOCK)
+        self.reset()
+
+    def reset(self):
+        """Сбрасывает состояние перед новой фразой."""
+        self._zi = np.zeros((self._sos.shape[0], 2)) if self._sos is not None else None
+        self._pending = np.zeros(0, dtype=np.float64)
+        self._envelope = 0.0
+        self._emitted = 0
+        # Хвост накопленных сумм усиления; первый элемент - сумма до начала сигнала
+        self._sums = np.zeros(1, dtype=np.float64)
+        if self.resampler is not None:
+            self.resampler.reset()
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Обрабатывает очередной фрагмент.
+
+        Args:
+            audio: Фрагмент сигнала (моно).
+
+        Returns:
+            np.ndarray: Обработанный сигнал float32 с частотой output_rate
+                (короче входа на длину упреждения для первого фрагмента).
+        """
+        audio = np.asarray(audio, dtype=np.float64).reshape(-1)
+        if self._sos is not None:
+            audio, self._zi = signal.sosfilt(self._sos, audio, zi=self._zi)
+        buffer = np.concatenate([self._pending, audio]) if len(self._pending) else audio
+        count = len(buffer) - self.lookahead
+        if count <= 0:
+            self._pending = buffer
+            return np.zeros(0, dtype=np.float32)
+        self._pending = buffer[count:]
+        return self._resample(self._normalize(buffer, count))
+
+    def flush(self) -> np.ndarray:
+        """Отдает задержанный хвост сигнала и сбрасывает состояние.
+
+        Returns:
+            np.ndarray: Остаток обработанного сигнала float32 с частотой output_rate.
+        """
+        buffer = self._pending
+        output = self._normalize(buffer, len(buffer)) if len(buffer) else np.zeros(0, dtype=np.float64)
+        if self.resampler is not None:
+            # Нули выталкивают из фильтра передискретизации последние сэмплы
+            output = np.concatenate([output, np.zeros(self.resampler.taps_per_phase)])
+        output = self._resample(output)
+        self.reset()
+        return output
+
+    def _normalize(self, buffer: np.ndarray, count: int) -> np.ndarray:
+        """Нормализует первые count сэмплов буфера, используя остальные как упреждение."""
+        magnitude = np.abs(buffer)
+        running_peak = np.maximum.accumulate(magnitude)
+        ahead = np.minimum(np.arange(count) + self.lookahead, len(buffer) - 1)
+        envelope = np.maximum(running_peak[ahead], self._envelope)
+        self._envelope = float(envelope[-1])
+        gain = self.peak / np.maximum(envelope, self.min_envelope)
+
+        # Скользящее среднее усиления по окну [n - lookahead, n] через накопленные суммы
+        sums = np.cumsum(np.concatenate([self._sums[-1:], gain]))[1:]
+        all_sums = np.concatenate([self._sums, sums])
+        base = self._emitted - len(self._sums)
+        positions = np.arange(self._emitted, self._emitted + count)
+        lower = np.maximum(positions - self.lookahead - 1, -1)
+        smoothed = (all_sums[positions - base] - all_sums[lower - base]) / (positions - lower)
+
+        self._sums = all_sums[-(self.lookahead + 1):]
+        self._emitted += count
+        return buffer[:count] * smoothed
+
+    def _resample(self, audio: np.ndarray) -> np.ndarray:
+        if self.resampler is None:
+            return audio.astype(np.float32)
+        output = np.zeros(self.resampler.max_output(len(audio)) + len(audio) // _RESAMPLE_BLOCK + 1,
+                          dtype=np.float32)
+        written = 0
+        for start in range(0, len(audio), _RESAMPLE_BLOCK):
+            written += self.resampler.process(audio[start:start + _RESAMPLE_BLOCK], output[written:])
+        # Фильтр передискретизации может дать небольшой выброс над пиком
+        return np.clip(output[:written], -1.0, 1.0)
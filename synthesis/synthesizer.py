@@ -2,20 +2,52 @@
 Модуль для синтеза речи через Bark.
 """
 
+import contextlib
 import os
+import threading
 import traceback
 import numpy as np
-import soundfile as sf
 import torch
-from scipy import signal
-from config import OUTPUT_DIR, DEVICE, HF_MODELS_DIR
+from config import (
+    DEVICE, HF_MODELS_DIR, SYNTHESIS_CHUNK_CHARS, SYNTHESIS_TIERS, SYNTHESIS_TIER, SYNTHESIS_VOICES,
+    CACHE_DIR, AUDIO_CACHE, AUDIO_CACHE_MAX_MB, AUDIO_CACHE_DTYPE, AUDIO_CACHE_DETERMINISTIC,
+    PLAYBACK_SAMPLE_RATE
+)
+from synthesis.cache import AudioCache
+from synthesis.postprocess import StreamingPostProcessor
+from utils.text import split_into_chunks
+
+# Частота семантических токенов Bark (токенов на секунду речи)
+SEMANTIC_TOKENS_PER_SECOND = 49.9
+
+# Параметры уровня, которые задаются в конфигурации грубой стадии модели, а не аргументами generate
+_COARSE_CONFIG_KEYS = ("max_coarse_history", "sliding_window_len")
+
+# Генерация с сидом идет через глобальный генератор torch, общий для всех потоков
+_SEEDED_GENERATION_LOCK = threading.Lock()
 
 
 class SpeechSynthesizer:
     """Класс для синтеза речи через Bark."""
 
-    def __init__(self):
-        """Инициализирует синтезатор речи с Bark."""
+    def __init__(self, cache: AudioCache = None, tier: str = None, voices: dict = None, use_cache: bool = None):
+        """Инициализирует синтезатор речи с Bark.
+
+        Args:
+            cache: Кэш синтезированного аудио (по умолчанию создается из конфигурации, если AUDIO_CACHE=1).
+            tier: Уровень синтеза из SYNTHESIS_TIERS ('fast', 'balanced', 'quality');
+                по умолчанию SYNTHESIS_TIER.
+            voices: Голоса Bark по языкам, например {'en': 'v2/en_speaker_6'};
+                по умолчанию SYNTHESIS_VOICES.
+            use_cache: Использовать кэш аудио: True - создать кэш независимо от AUDIO_CACHE,
+                False - работать без кэша, даже если передан cache; по умолчанию из конфигурации.
+
+        Raises:
+            ValueError: Если указан неизвестный уровень синтеза.
+        """
+        tier = tier or SYNTHESIS_TIER
+        if tier not in SYNTHESIS_TIERS:
+            raise ValueError(f"Неизвестный уровень синтеза: {tier}. Доступны: {', '.join(SYNTHESIS_TIERS)}")
         print("Инициализация синтезатора речи...")
         print("Загрузка модели Bark для синтеза речи...")
 
@@ -26,6 +58,7 @@ class SpeechSynthesizer:
             os.makedirs(cache_dir, exist_ok=True)
 
             model_name = "suno/bark"
+            self.model_name = model_name
 
             print(f"Загрузка модели {model_name}...")
             self.processor = AutoProcessor.from_pretrained(
@@ -36,6 +69,7 @@ class SpeechSynthesizer:
                 model_name,
                 cache_dir=cache_dir
             ).to(DEVICE)
+            self.sample_rate = getattr(self.model.generation_config, "sample_rate", 24000)
 
             print("✓ Модель Bark загружена!")
             print(f"✓ Модели будут сохранены в: {HF_MODELS_DIR}")
@@ -51,23 +85,91 @@ class SpeechSynthesizer:
             "en": "en",
             "fr": "fr"
         }
+        self.tier = tier
+        tier_params = SYNTHESIS_TIERS[tier]
+        self.max_chunk_chars = SYNTHESIS_CHUNK_CHARS or tier_params["max_chunk_chars"]
+        self.generation_params = {"do_sample": True}
+        self.generation_params.update({
+            key: value for key, value in tier_params.items()
+            if key != "max_chunk_chars" and key not in _COARSE_CONFIG_KEYS
+        })
+        coarse_overrides = {key: tier_params[key] for key in _COARSE_CONFIG_KEYS if key in tier_params}
+        coarse_config = getattr(self.model.generation_config, "coarse_acoustics_config", None)
+        if isinstance(coarse_config, dict):
+            coarse_config.update(coarse_overrides)
+        # Кэш хранит необработанный выход Bark: постобработка выполняется после него
+        self.cache_params = {
+            "model": self.model_name, "tier": tier, "output": "raw", **self.generation_params, **coarse_overrides
+        }
+        self.output_rate = PLAYBACK_SAMPLE_RATE or self.sample_rate
+        self.max_chunk_seconds = tier_params["semantic_max_new_tokens"] / SEMANTIC_TOKENS_PER_SECOND
+        print(f"✓ Уровень синтеза: {tier} (фрагмент до {self.max_chunk_chars} символов, "
+              f"до {self.max_chunk_seconds:.1f} сек речи)")
+
+        self.voices = dict(SYNTHESIS_VOICES if voices is None else voices)
+        self._voice_prompts = {}
+        for lang in self.bark_languages:
+            self._voice_prompts[lang] = self._load_voice_prompt(lang)
+
+        if use_cache is False:
+            cache = None
+        elif cache is None and (use_cache or AUDIO_CACHE):
+            cache = AudioCache(
+                os.path.join(CACHE_DIR, "audio"),
+                max_bytes=int(AUDIO_CACHE_MAX_MB * 1024 ** 2),
+                dtype=AUDIO_CACHE_DTYPE
+            )
+            print(f"✓ Кэш аудио: {cache.directory} ({cache.total_bytes / 1024 ** 2:.1f} MB)")
+        self.cache = cache
 
         print("Синтезатор речи готов!")
 
-    def synthesize(self, text: str, target_lang: str = "fr",
-                   output_filename: str = None, max_length: int = 250,
-                   reference_audio_path: str = None) -> str:
+    def _load_voice_prompt(self, target_lang: str):
+        """Загружает history prompt голоса для языка и переносит его на устройство модели.
+
+        Args:
+            target_lang: Код языка.
+
+        Returns:
+            dict: Тензоры семантического, грубого и точного промптов или None,
+                если голос для языка не задан или не загрузился.
+        """
+        voice = self.voices.get(target_lang)
+        if not voice:
+            return None
+        try:
+            inputs = self.processor(text=["."], voice_preset=voice, return_tensors="pt")
+            history_prompt = inputs.get("history_prompt")
+            if history_prompt is None:
+                raise RuntimeError("процессор не вернул history_prompt")
+            prompt = {key: value.to(DEVICE) for key, value in history_prompt.items()}
+            print(f"✓ Голос для '{target_lang}': {voice}")
+            return prompt
+        except Exception as e:
+            print(f"⚠ Не удалось загрузить голос {voice} для '{target_lang}': {e}. Используется случайный голос")
+            self.voices.pop(target_lang, None)
+            return None
+
+    def warmup(self):
+        """Выполняет короткую генерацию Bark в обход кэша, чтобы первый синтез не платил за холодный старт."""
+        inputs = self.processor(text=["[en] Hi."], return_tensors="pt").to(DEVICE)
+        with torch.no_grad():
+            self.model.generate(**inputs, do_sample=True, semantic_max_new_tokens=16)
+
+    def synthesize(self, text: str, target_lang: str = "fr", max_chunk_chars: int = None):
         """Синтезирует речь на указанном языке.
 
+        Длинный текст не обрезается: он синтезируется по фрагментам, которые
+        затем склеиваются в один сигнал.
+
         Args:
             text: Текст для синтеза.
             target_lang: Целевой язык ('en' для английского, 'fr' для французского).
-            output_filename: Имя файла для сохранения (автоматически генерируется если None).
-            max_length: Максимальная длина текста для синтеза.
-            reference_audio_path: Путь к референсному аудио (опционально, в текущей версии не используется).
+            max_chunk_chars: Максимальная длина фрагмента, синтезируемого за один вызов Bark
+                (по умолчанию из уровня синтеза).
 
         Returns:
-            str: Путь к сохраненному аудиофайлу или None при ошибке.
+            tuple: Пара (аудиосигнал float32, частота дискретизации) или None при ошибке.
         """
         if not text or len(text.strip()) == 0:
             return None
@@ -75,21 +177,87 @@ class SpeechSynthesizer:
         if target_lang not in ["en", "fr"]:
             raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
 
-        if reference_audio_path and not os.path.exists(reference_audio_path):
-            print(f"⚠ Предупреждение: файл референсного аудио не найден: {reference_audio_path}")
-            print("  Продолжаем без клонирования голоса...")
-
         lang_names = {"en": "английском", "fr": "французском"}
         print(f"\nСинтез речи на {lang_names[target_lang]} (Bark)...")
 
-        if len(text) > max_length:
-            text = text[:max_length]
-            print(f"Предупреждение: текст обрезан до {max_length} символов")
+        postprocessor = self.create_postprocessor()
+        parts = []
+        for chunk in split_into_chunks(text, max_chunk_chars or self.max_chunk_chars):
+            audio_array = self._generate(chunk, target_lang)
+            if audio_array is not None:
+                parts.append(postprocessor.process(audio_array))
+        if not parts:
+            return None
+        parts.append(postprocessor.flush())
+
+        audio_array = np.concatenate(parts)
+        print(f"✓ Речь синтезирована: {len(audio_array) / self.output_rate:.2f} сек")
+        return audio_array, self.output_rate
+
+    def synthesize_stream(self, text: str, target_lang: str = "fr", max_chunk_chars: int = None):
+        """Синтезирует речь по фрагментам, разбивая текст по границам предложений и клауз.
+
+        Каждый фрагмент отдается сразу после генерации, поэтому воспроизведение
+        первого фрагмента может начаться, пока синтезируются следующие.
+
+        Args:
+            text: Текст для синтеза.
+            target_lang: Целевой язык ('en' для английского, 'fr' для французского).
+            max_chunk_chars: Максимальная длина фрагмента в символах (по умолчанию из уровня синтеза).
+
+        Yields:
+            tuple: Пара (аудиосигнал float32, частота дискретизации) для каждого фрагмента.
+        """
+        if not text or len(text.strip()) == 0:
+            return
+
+        if target_lang not in ["en", "fr"]:
+            raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
+
+        chunks = split_into_chunks(text, max_chunk_chars or self.max_chunk_chars)
+        lang_names = {"en": "английском", "fr": "французском"}
+        print(f"\nПотоковый синтез речи на {lang_names[target_lang]} (Bark): {len(chunks)} фрагм.")
+
+        postprocessor = self.create_postprocessor()
+        produced = False
+        for index, chunk in enumerate(chunks, start=1):
+            audio_array = self._generate(chunk, target_lang)
+            if audio_array is None:
+                print(f"⚠ Фрагмент {index}/{len(chunks)} пропущен")
+                continue
+            produced = True
+            print(f"✓ Фрагмент {index}/{len(chunks)} синтезирован: {len(audio_array) / self.sample_rate:.2f} сек")
+            audio_array = postprocessor.process(audio_array)
+            if index == len(chunks):
+                audio_array = np.concatenate([audio_array, postprocessor.flush()])
+            yield audio_array, self.output_rate
+
+        if produced and audio_array is None:
+            yield postprocessor.flush(), self.output_rate
 
-        if output_filename is None:
-            output_filename = f"synthesized_{target_lang}.wav"
+    def create_postprocessor(self) -> StreamingPostProcessor:
+        """Создает потоковую постобработку для одной фразы (фильтр, нормализация, передискретизация)."""
+        return StreamingPostProcessor(self.sample_rate, self.output_rate)
 
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
+    def _generate(self, text: str, target_lang: str):
+        """Генерирует аудио Bark для одного фрагмента текста (без постобработки).
+
+        Результат берется из кэша аудио, если фрагмент уже синтезировался
+        с тем же языком, голосом и уровнем синтеза. Голос берется из
+        заранее загруженных history prompt, а длительность ограничена
+        бюджетом семантических токенов уровня.
+
+        Returns:
+            np.ndarray: Аудиосигнал float32 или None при ошибке.
+        """
+        cache_key = None
+        if self.cache is not None or AUDIO_CACHE_DETERMINISTIC:
+            cache_key = AudioCache.make_key(text, target_lang, self.voices.get(target_lang), self.cache_params)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None and cached[1] == self.sample_rate:
+                print("✓ Аудио взято из кэша")
+                return cached[0]
 
         try:
             lang_code = self.bark_languages[target_lang]
@@ -100,14 +268,23 @@ class SpeechSynthesizer:
                 return_tensors="pt"
             ).to(DEVICE)
 
-            with torch.no_grad():
+            history_prompt = self._voice_prompts.get(target_lang)
+            if history_prompt is not None:
+                inputs["history_prompt"] = history_prompt
+
+            # Bark сэмплирует из глобального генератора torch и не принимает свой
+            # генератор, поэтому его состояние сохраняется и восстанавливается после
+            # генерации, а генерации с сидом из разных потоков идут по очереди:
+            # иначе другой поток сдвинул бы генератор посреди фрагмента
+            rng_devices = [torch.cuda.current_device()] if DEVICE == "cuda" else []
+            rng_lock = _SEEDED_GENERATION_LOCK if AUDIO_CACHE_DETERMINISTIC else contextlib.nullcontext()
+            with rng_lock, torch.random.fork_rng(devices=rng_devices, enabled=AUDIO_CACHE_DETERMINISTIC), \
+                    torch.no_grad():
+                if AUDIO_CACHE_DETERMINISTIC:
+                    torch.manual_seed(AudioCache.seed_for_key(cache_key))
                 audio_array = self.model.generate(
                     **inputs,
-                    do_sample=True,
-                    temperature=0.7,
-                    semantic_temperature=0.7,
-                    coarse_temperature=0.7,
-                    fine_temperature=0.5,
+                    **self.generation_params
                 )
 
             if isinstance(audio_array, torch.Tensor):
@@ -116,20 +293,14 @@ class SpeechSynthesizer:
             if len(audio_array.shape) > 1:
                 audio_array = audio_array.squeeze()
 
-            max_abs = np.max(np.abs(audio_array))
-            if max_abs > 0:
-                audio_array = audio_array / max_abs * 0.9
-
-                if len(audio_array) > 100:
-                    b, a = signal.butter(3, 0.01, 'high')
-                    audio_array = signal.filtfilt(b, a, audio_array)
-            else:
+            if not np.any(audio_array):
                 print("⚠ Предупреждение: сгенерированное аудио пустое или содержит только нули")
                 return None
 
-            sf.write(output_path, audio_array, 24000, subtype='PCM_24')
-            print(f"✓ Синтезированное аудио сохранено: {output_path}")
-            return output_path
+            audio_array = audio_array.astype(np.float32)
+            if self.cache is not None:
+                self.cache.put(cache_key, audio_array, self.sample_rate)
+            return audio_array
 
         except Exception as e:
             print(f"Ошибка при синтезе речи: {e}")
@@ -0,0 +1,121 @@
+import contextlib
+
+import numpy as np
+import pytest
+
+import core.pipeline as pipeline_module
+from core.pipeline import SpeechPipeline
+
+SAMPLE_RATE = 16000
+
+
+class FakePlayback:
+    """Записывает вызовы движка воспроизведения вместо вывода звука."""
+
+    def __init__(self):
+        self.enqueued = []
+        self.ended = []
+        self.open_turn = None
+
+    def add_listener(self, listener):
+        pass
+
+    def is_cancelled(self, turn):
+        return False
+
+    def enqueue(self, audio, sample_rate, turn):
+        self.enqueued.append((turn, len(audio)))
+        self.open_turn = turn
+        return True
+
+    def end_turn(self, turn):
+        self.ended.append(turn)
+        if self.open_turn == turn:
+            self.open_turn = None
+
+    def cancel(self, through=0):
+        return False
+
+
+class FakeSynthesizer:
+    """Синтезирует тишину для всех языков, кроме перечисленных в failing."""
+
+    def __init__(self, failing, error=None):
+        self.failing = failing
+        self.error = error
+
+    def synthesize(self, text, target_lang):
+        if target_lang in self.failing:
+            if self.error is not None:
+                raise self.error
+            return None
+        return np.zeros(2400, dtype=np.float32), 24000
+
+
+class FakeRecognizer:
+    def recognize(self, audio, sample_rate):
+        return "привет"
+
+
+class FakeDebugSink:
+    def write(self, audio, sample_rate, name):
+        pass
+
+
+class FakeSpeechTranslator:
+    def __init__(self, synthesizer, translations):
+        self.audio_handler = type("AudioHandler", (), {"playback": FakePlayback()})()
+        self.recognizer = FakeRecognizer()
+        self.synthesizer = synthesizer
+        self.debug_sink = FakeDebugSink()
+        self.translations = translations
+
+    @contextlib.contextmanager
+    def resident(self, name, prefetch=None):
+        yield
+
+    def translate(self, text):
+        return dict(self.translations)
+
+
+def run_turns(speech_translator, turns=1):
+    pipeline = SpeechPipeline(speech_translator, queue_size=2)
+    pipeline.start()
+    for _ in range(turns):
+        pipeline.submit(np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE)
+    pipeline.stop(timeout=5.0)
+    return speech_translator.audio_handler.playback
+
+
+@pytest.fixture(autouse=True)
+def whole_phrase_synthesis(monkeypatch):
+    monkeypatch.setattr(pipeline_module, "STREAMING_SYNTHESIS", False)
+
+
+@pytest.mark.parametrize("error", [None, RuntimeError("сбой синтеза")])
+def test_turn_is_closed_when_last_language_fails(error):
+    translator = FakeSpeechTranslator(FakeSynthesizer({"de"}, error), {"en": "hello", "de": "hallo"})
+
+    playback = run_turns(translator, turns=2)
+
+    assert [turn for turn, _ in playback.enqueued] == [1, 2]
+    assert playback.ended == [1, 2]
+    assert playback.open_turn is None
+
+
+def test_turn_is_closed_when_every_language_fails():
+    translator = FakeSpeechTranslator(FakeSynthesizer({"en", "de"}), {"en": "hello", "de": "hallo"})
+
+    playback = run_turns(translator)
+
+    assert playback.enqueued == []
+    assert playback.ended == [1]
+
+
+def test_turn_is_closed_when_translation_fails():
+    translator = FakeSpeechTranslator(FakeSynthesizer(set()), {})
+
+    playback = run_turns(translator)
+
+    assert playback.enqueued == []
+    assert playback.ended == [1]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from synthesis.postprocess import StreamingPostProcessor
+
+SAMPLE_RATE = 24000
+
+
+def speech_like(seconds=1.5, seed=0):
+    """Синтетический сигнал с гулом, тоном, всплеском и шумом, похожий на выход Bark."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    audio = 0.2 * np.sin(2 * np.pi * 30 * t) + 0.3 * np.sin(2 * np.pi * 440 * t) * np.sin(2 * np.pi * 3 * t)
+    audio[len(audio) // 2:len(audio) // 2 + 200] += 0.6
+    audio += 0.02 * rng.standard_normal(len(audio))
+    return audio.astype(np.float32)
+
+
+def make_processor(output_rate):
+    return StreamingPostProcessor(SAMPLE_RATE, output_rate, highpass_hz=80.0, peak=0.9, max_gain=4.0,
+                                  lookahead_ms=20.0)
+
+
+def run_chunked(processor, audio, sizes):
+    parts = []
+    pos = 0
+    for size in sizes:
+        if pos >= len(audio):
+            break
+        parts.append(processor.process(audio[pos:pos + size]))
+        pos += size
+    if pos < len(audio):
+        parts.append(processor.process(audio[pos:]))
+    parts.append(processor.flush())
+    return np.concatenate(parts)
+
+
+@pytest.mark.parametrize("output_rate", [SAMPLE_RATE, 48000, 16000])
+def test_random_chunking_matches_single_call(output_rate):
+    audio = speech_like()
+    processor = make_processor(output_rate)
+    expected = np.concatenate([processor.process(audio), processor.flush()])
+
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        # Среди размеров есть фрагменты короче упреждения и длиннее блока передискретизации
+        sizes = rng.integers(1, 6000, size=len(audio)).tolist()
+        output = run_chunked(make_processor(output_rate), audio, sizes)
+        assert len(output) == len(expected)
+        np.testing.assert_allclose(output, expected, rtol=0, atol=1e-6)
+
+
+def test_processor_is_reusable_after_flush():
+    audio = speech_like(seconds=0.5, seed=2)
+    processor = make_processor(48000)
+    first = np.concatenate([processor.process(audio), processor.flush()])
+    second = run_chunked(processor, audio, [333] * 100)
+
+    np.testing.assert_allclose(second, first, rtol=0, atol=1e-6)
+
+
+def test_output_stays_within_peak():
+    output = run_chunked(make_processor(SAMPLE_RATE), speech_like(seed=3), [480] * 200)
+
+    assert np.max(np.abs(output)) <= 0.9 + 1e-6
@@ -0,0 +1,90 @@
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faster_whisper")
+
+from faster_whisper.feature_extractor import FeatureExtractor
+
+import recognition.recognizer as recognizer_module
+from recognition.recognizer import SpeechRecognizer, WHISPER_SAMPLE_RATE
+
+
+def tone(seconds, frequency, amplitude=0.3):
+    t = np.arange(int(WHISPER_SAMPLE_RATE * seconds)) / WHISPER_SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+class FakeTokenizer:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def decode(self, tokens):
+        return " ".join(str(token) for token in tokens)
+
+
+class FakeWhisper:
+    """Пакетный декодер, ответ которого зависит только от своей строки признаков."""
+
+    def __init__(self):
+        self.feature_extractor = FeatureExtractor()
+        self.hf_tokenizer = None
+        self.max_length = 448
+        self.encoded = []
+        self.model = types.SimpleNamespace(is_multilingual=True, generate=self._generate)
+
+    def get_prompt(self, tokenizer, previous_tokens, without_timestamps=False):
+        return []
+
+    def encode(self, features):
+        self.encoded.append(features)
+        return features
+
+    @staticmethod
+    def _generate(encoder_output, prompts, **kwargs):
+        outputs = []
+        for features in encoder_output:
+            tokens = [int(value) for value in np.round(features.mean(axis=0)[::500] * 1000)]
+            outputs.append(types.SimpleNamespace(sequences_ids=[tokens], scores=[0.0], no_speech_prob=0.0))
+        return outputs
+
+
+@pytest.fixture
+def recognizer(monkeypatch):
+    monkeypatch.setattr(recognizer_module, "Tokenizer", FakeTokenizer)
+    monkeypatch.setattr(recognizer_module, "SILENCE_GATE", False)
+    instance = SpeechRecognizer.__new__(SpeechRecognizer)
+    instance.model = FakeWhisper()
+    return instance
+
+
+def single_clip_window(feature_extractor, clip):
+    """Окно одной фразы, как его строит Whisper: сигнал дополняется тишиной до 30 сек."""
+    window = np.pad(clip, (0, feature_extractor.n_samples - len(clip)))
+    return feature_extractor(window)[:, :feature_extractor.nb_max_frames]
+
+
+def test_batch_features_match_single_clip_window(recognizer):
+    clips = [tone(1.0, 220), tone(3.5, 440), tone(0.4, 330)]
+
+    recognizer.recognize_batch(clips)
+
+    batch = recognizer.model.encoded[-1]
+    for clip, features in zip(clips, batch):
+        expected = single_clip_window(recognizer.model.feature_extractor, clip)
+        np.testing.assert_allclose(features, expected, rtol=0, atol=1e-6)
+        # Хвост окна - тишина (нижняя граница лог-мел), а не нули
+        assert np.all(features[:, -100:] < 0)
+
+
+def test_batch_decoding_matches_single_clip(recognizer):
+    clips = [tone(1.0, 220), tone(6.0, 550), tone(0.4, 330)]
+    feature_extractor = recognizer.model.feature_extractor
+    tokenizer = FakeTokenizer()
+    expected = []
+    for clip in clips:
+        output = FakeWhisper._generate(single_clip_window(feature_extractor, clip)[None], [[]])[0]
+        expected.append(tokenizer.decode(output.sequences_ids[0]))
+
+    assert recognizer.recognize_batch(clips) == expected
@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+from utils.residency import ResidencyManager
+
+
+class FakeModel:
+    """Модель, перемещения которой только записываются в журнал."""
+
+    def __init__(self, name, log, load_gate=None):
+        self.name = name
+        self.log = log
+        self.load_gate = load_gate
+        self.load_error = None
+
+    def offload(self):
+        self.log.append(("offload", self.name))
+
+    def load(self):
+        if self.load_gate is not None:
+            self.load_gate.wait(timeout=5)
+        if self.load_error is not None:
+            raise self.load_error
+        self.log.append(("load", self.name))
+
+
+def make_manager(budget_gb, sizes, log, prefetch=False, gates=None, models=None):
+    manager = ResidencyManager(budget_gb, memory_fn=None, prefetch=prefetch)
+    for name, size_gb in sizes.items():
+        model = FakeModel(name, log, (gates or {}).get(name))
+        if models is not None:
+            models[name] = model
+        manager.register(name, model.offload, model.load, size_gb)
+    return manager
+
+
+def test_enforce_budget_offloads_least_recently_used():
+    log = []
+    manager = make_manager(2.0, {"recognizer": 1.0, "translator": 1.0, "synthesizer": 1.0}, log)
+    manager.release("translator")
+    manager.release("synthesizer")
+
+    manager.enforce_budget()
+
+    assert log == [("offload", "recognizer")]
+    assert manager.resident() == ["translator", "synthesizer"]
+    assert manager.resident_gb() == 2.0
+
+
+def test_use_reloads_model_and_keeps_it_pinned():
+    log = []
+    manager = make_manager(2.0, {"recognizer": 1.0, "translator": 1.0, "synthesizer": 1.0}, log)
+    manager.enforce_budget()
+    log.clear()
+
+    with manager.use("recognizer"):
+        assert "recognizer" in manager.resident()
+        # Используемая модель не вытесняется, даже если она самая давняя
+        with manager.use("synthesizer"):
+            pass
+
+    assert ("load", "recognizer") in log
+    assert ("offload", "recognizer") not in log
+    assert manager.resident_gb() <= 2.0
+
+
+def test_failed_load_does_not_pin_model():
+    log = []
+    models = {}
+    manager = make_manager(1.0, {"recognizer": 1.0, "translator": 1.0}, log, models=models)
+    manager.enforce_budget()
+    models["recognizer"].load_error = RuntimeError("CUDA out of memory")
+
+    with pytest.raises(RuntimeError):
+        manager.acquire("recognizer")
+
+    # После неудачной загрузки модель снова можно загрузить и вытеснить
+    models["recognizer"].load_error = None
+    with manager.use("recognizer"):
+        pass
+    with manager.use("translator"):
+        pass
+    assert manager.resident() == ["translator"]
+
+
+def test_prefetch_loads_without_holding_lock():
+    log = []
+    gate = threading.Event()
+    manager = make_manager(1.0, {"recognizer": 1.0, "translator": 1.0}, log, prefetch=True,
+                           gates={"recognizer": gate})
+    manager.enforce_budget()
+    assert manager.resident() == ["translator"]
+    log.clear()
+    try:
+        future = manager.prefetch("recognizer")
+        assert future is not None
+
+        # Пока модель загружается, менеджер доступен из других потоков,
+        # а место под нее уже зарезервировано
+        done = threading.Event()
+        threading.Thread(target=lambda: (manager.resident_gb(), done.set()), daemon=True).start()
+        assert done.wait(timeout=1)
+        assert manager.resident_gb() == 1.0
+
+        gate.set()
+        future.result(timeout=5)
+        assert manager.resident() == ["recognizer"]
+
+        # Захват после предзагрузки не загружает модель повторно
+        with manager.use("recognizer"):
+            pass
+        assert log.count(("load", "recognizer")) == 1
+    finally:
+        gate.set()
+        manager.shutdown()
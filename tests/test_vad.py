@@ -0,0 +1,111 @@
+import numpy as np
+
+from audio.vad import UtteranceSegmenter
+
+SAMPLE_RATE = 16000
+
+
+def pcm(*parts):
+    """Собирает синтетический сигнал из отрезков (длительность в секундах, амплитуда тона 220 Гц)."""
+    blocks = []
+    for duration, amplitude in parts:
+        t = np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE
+        blocks.append((amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+    return np.concatenate(blocks)
+
+
+def make_segmenter(**kwargs):
+    params = {"frame_ms": 30, "energy_threshold": 0.01, "min_speech_ms": 250, "silence_ms": 600,
+              "pre_roll_ms": 300, "max_utterance_s": 5.0}
+    params.update(kwargs)
+    return UtteranceSegmenter(SAMPLE_RATE, **params)
+
+
+def feed_in_blocks(segmenter, audio, sizes):
+    utterances = []
+    pos = 0
+    for size in sizes:
+        if pos >= len(audio):
+            break
+        utterances.extend(segmenter.feed(audio[pos:pos + size]))
+        pos += size
+    if pos < len(audio):
+        utterances.extend(segmenter.feed(audio[pos:]))
+    return utterances
+
+
+def test_single_phrase_is_cut_with_pre_roll():
+    segmenter = make_segmenter()
+    audio = pcm((1.0, 0.0), (1.0, 0.3), (1.0, 0.0))
+
+    utterances = segmenter.feed(audio)
+
+    assert len(utterances) == 1
+    utterance = utterances[0]
+    # Речь плюс не более pre_roll до и после нее (с точностью до кадра)
+    frame = segmenter.frame_length
+    assert SAMPLE_RATE * 1.0 <= len(utterance) <= SAMPLE_RATE * 1.6 + 2 * frame
+    assert np.max(np.abs(utterance)) > 0.25
+    assert not segmenter.in_speech
+
+
+def test_short_noise_burst_is_dropped():
+    segmenter = make_segmenter()
+    audio = pcm((0.5, 0.0), (0.1, 0.3), (1.0, 0.0))
+
+    assert segmenter.feed(audio) == []
+    assert segmenter.flush() is None
+
+
+def test_two_phrases_are_separated_by_silence():
+    segmenter = make_segmenter()
+    audio = pcm((0.3, 0.0), (0.6, 0.3), (1.0, 0.0), (0.8, 0.2), (1.0, 0.0))
+
+    utterances = segmenter.feed(audio)
+
+    assert len(utterances) == 2
+
+
+def test_result_does_not_depend_on_block_sizes():
+    audio = pcm((0.4, 0.0), (0.7, 0.3), (0.9, 0.0), (0.5, 0.2), (0.8, 0.0))
+    expected = make_segmenter().feed(audio)
+
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        sizes = rng.integers(1, 2000, size=len(audio)).tolist()
+        utterances = feed_in_blocks(make_segmenter(), audio, sizes)
+        assert len(utterances) == len(expected)
+        for utterance, reference in zip(utterances, expected):
+            np.testing.assert_array_equal(utterance, reference)
+
+
+def test_long_speech_is_split_at_max_length():
+    segmenter = make_segmenter(max_utterance_s=1.0)
+    audio = pcm((0.2, 0.0), (2.5, 0.3))
+
+    utterances = segmenter.feed(audio)
+
+    assert len(utterances) >= 2
+    assert all(len(utterance) <= SAMPLE_RATE * 1.0 + segmenter.frame_length for utterance in utterances)
+
+
+def test_flush_returns_unfinished_phrase():
+    segmenter = make_segmenter()
+    assert segmenter.feed(pcm((0.3, 0.0), (0.8, 0.3))) == []
+    assert segmenter.in_speech
+
+    utterance = segmenter.flush()
+
+    assert utterance is not None and len(utterance) >= SAMPLE_RATE * 0.8
+    assert not segmenter.in_speech
+
+
+def test_pooled_buffers_are_not_reused_while_referenced():
+    segmenter = make_segmenter(buffers=1)
+    first = segmenter.feed(pcm((0.3, 0.0), (0.6, 0.3), (1.0, 0.0)))[0]
+    snapshot = first.copy()
+
+    second = segmenter.feed(pcm((0.6, 0.1), (1.0, 0.0)))[0]
+
+    np.testing.assert_array_equal(first, snapshot)
+    assert not np.shares_memory(first, second)
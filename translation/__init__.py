@@ -3,5 +3,6 @@
 """
 
 from translation.translator import TextTranslator
+from translation.cache import TranslationCache
 
-__all__ = ['TextTranslator']
+__all__ = ['TextTranslator', 'TranslationCache']
@@ -0,0 +1,321 @@
+"""
+Движки генерации NLLB: PyTorch (transformers generate) и CTranslate2.
+"""
+
+import os
+import shutil
+import torch
+from utils.metrics import TRUNCATIONS
+from utils.residency import torch_module_size_gb
+
+try:
+    import ctranslate2
+except ImportError:
+    ctranslate2 = None
+
+# Число параметров модели NLLB-200 distilled 600M (для оценки объема в VRAM)
+NLLB_PARAMETERS = 615e6
+
+# Байт на параметр для типов вычислений CTranslate2
+_BYTES_PER_PARAMETER = {"int8": 1, "int16": 2, "float16": 2, "bfloat16": 2, "float32": 4}
+
+
+def _count_truncations(input_lengths, output_lengths, max_length: int):
+    truncated_inputs = sum(1 for length in input_lengths if length >= max_length)
+    if truncated_inputs:
+        TRUNCATIONS.inc(truncated_inputs, component="translator_input")
+    truncated_outputs = sum(1 for length in output_lengths if length >= max_length)
+    if truncated_outputs:
+        TRUNCATIONS.inc(truncated_outputs, component="translator_output")
+
+
+class TorchNLLBBackend:
+    """Генерация NLLB через AutoModelForSeq2SeqLM.generate (лучевой поиск PyTorch)."""
+
+    name = "torch"
+    # generate_multi выполняет энкодер один раз для всех целевых языков
+    shared_encoder = True
+
+    def __init__(self, model_name: str, tokenizer, cache_dir: str, device: str, quantize: bool = False,
+                 num_threads: int = 0):
+        """Загружает модель.
+
+        Args:
+            model_name: Имя модели Hugging Face.
+            tokenizer: Токенизатор модели.
+            cache_dir: Папка кэша моделей transformers.
+            device: Устройство ('cuda' или 'cpu').
+            quantize: Динамически квантовать Linear-слои в int8 (только на CPU).
+            num_threads: Число потоков PyTorch для всего процесса (0 - по умолчанию).
+        """
+        from transformers import AutoModelForSeq2SeqLM
+
+        self.tokenizer = tokenizer
+        self.device = device
+        self.num_threads = num_threads
+        self.variant = model_name
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name, cache_dir=cache_dir).to(device)
+        self.model.eval()
+
+        # Число потоков PyTorch общее для процесса, поэтому задается один раз при загрузке,
+        # а не при каждом вызове generate
+        if num_threads and torch.get_num_threads() != num_threads:
+            torch.set_num_threads(num_threads)
+
+        if quantize and device == "cpu":
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.variant = f"{model_name}+dynamic-int8"
+            print("✓ Linear-слои NLLB квантованы в int8 (динамическое квантование)")
+
+    def generate(self, texts: list, target_lang_code: str, num_beams: int, max_length: int) -> list:
+        """Переводит пакет текстов одним вызовом generate.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang_code: Код целевого языка NLLB (например, 'eng_Latn').
+            num_beams: Ширина лучевого поиска.
+            max_length: Максимальная длина входа и выхода в токенах.
+
+        Returns:
+            list: Переводы в порядке входных текстов.
+        """
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=max_length
+        ).to(self.device)
+
+        with torch.no_grad():
+            translated_tokens = self.model.generate(
+                **inputs,
+                forced_bos_token_id=self._forced_bos_token_id(target_lang_code),
+                max_length=max_length,
+                num_beams=num_beams,
+                early_stopping=True
+            )
+
+        _count_truncations(
+            inputs["attention_mask"].sum(dim=1).tolist(),
+            (translated_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist(),
+            max_length
+        )
+        return self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
+
+    def generate_multi(self, texts: list, target_lang_codes: list, num_beams: int, max_length: int) -> dict:
+        """Переводит пакет текстов на несколько языков с одним проходом энкодера.
+
+        Выход энкодера вычисляется один раз и передается в generate для
+        каждого целевого языка; повторяется только декодирование.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang_codes: Коды целевых языков NLLB.
+            num_beams: Ширина лучевого поиска.
+            max_length: Максимальная длина входа и выхода в токенах.
+
+        Returns:
+            dict: Переводы в порядке входных текстов по кодам языков.
+        """
+        from transformers.modeling_outputs import BaseModelOutput
+
+        inputs = self.tokenizer(
+            texts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=max_length
+        ).to(self.device)
+
+        input_lengths = inputs["attention_mask"].sum(dim=1).tolist()
+        results = {}
+        with torch.no_grad():
+            hidden_state = self.model.get_encoder()(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                return_dict=True
+            ).last_hidden_state
+            for index, target_lang_code in enumerate(target_lang_codes):
+                # generate расширяет выход энкодера под лучи на месте, поэтому обертка своя для каждого языка
+                translated_tokens = self.model.generate(
+                    attention_mask=inputs["attention_mask"],
+                    encoder_outputs=BaseModelOutput(last_hidden_state=hidden_state),
+                    forced_bos_token_id=self._forced_bos_token_id(target_lang_code),
+                    max_length=max_length,
+                    num_beams=num_beams,
+                    early_stopping=True
+                )
+                _count_truncations(
+                    input_lengths if index == 0 else [],
+                    (translated_tokens != self.tokenizer.pad_token_id).sum(dim=1).tolist(),
+                    max_length
+                )
+                results[target_lang_code] = self.tokenizer.batch_decode(translated_tokens, skip_special_tokens=True)
+        return results
+
+    def offload(self):
+        """Переносит модель в память CPU."""
+        self.model.to("cpu")
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def load(self):
+        """Возвращает модель на устройство."""
+        self.model.to(self.device)
+
+    def size_gb(self) -> float:
+        """Оценивает объем модели в гигабайтах."""
+        return torch_module_size_gb(self.model)
+
+    def _forced_bos_token_id(self, target_lang_code: str) -> int:
+        try:
+            return self.tokenizer.lang_code_to_id[target_lang_code]
+        except (AttributeError, KeyError):
+            return self.tokenizer.convert_tokens_to_ids(target_lang_code)
+
+
+class CTranslate2NLLBBackend:
+    """Генерация NLLB через CTranslate2 (как распознавание в faster-whisper).
+
+    При первом запуске модель Hugging Face конвертируется в формат
+    CTranslate2 (веса float16) и сохраняется в models_dir; дальше загружается
+    готовая модель. Тип вычислений (int8, int8_float16, float16 и т.д.)
+    выбирается при загрузке без повторной конвертации.
+    """
+
+    name = "ctranslate2"
+    # CTranslate2 не принимает готовый выход энкодера: generate_multi кодирует текст для каждого языка
+    shared_encoder = False
+
+    def __init__(self, model_name: str, tokenizer, cache_dir: str, models_dir: str, device: str,
+                 compute_type: str = "auto", num_threads: int = 0):
+        """Загружает модель, при необходимости конвертируя ее.
+
+        Args:
+            model_name: Имя модели Hugging Face.
+            tokenizer: Токенизатор модели.
+            cache_dir: Папка кэша моделей transformers (для исходной модели).
+            models_dir: Папка сконвертированных моделей CTranslate2.
+            device: Устройство ('cuda' или 'cpu').
+            compute_type: Тип вычислений CTranslate2.
+            num_threads: Число потоков CTranslate2 на CPU (0 - по умолчанию).
+
+        Raises:
+            ImportError: Если ctranslate2 не установлен.
+        """
+        if ctranslate2 is None:
+            raise ImportError("ctranslate2 не установлен")
+
+        self.tokenizer = tokenizer
+        self.device = device
+        model_dir = self._ensure_converted(model_name, cache_dir, models_dir)
+        self.model = ctranslate2.Translator(
+            model_dir,
+            device=device,
+            compute_type=compute_type,
+            inter_threads=1,
+            intra_threads=num_threads
+        )
+        self.compute_type = getattr(self.model, "compute_type", compute_type)
+        self.variant = f"{model_name}+ct2-{self.compute_type}"
+        print(f"ℹ NLLB в CTranslate2: compute_type={self.compute_type}, устройство={device}")
+
+    @staticmethod
+    def _ensure_converted(model_name: str, cache_dir: str, models_dir: str) -> str:
+        """Возвращает папку модели CTranslate2, конвертируя модель, если ее еще нет."""
+        model_dir = os.path.join(models_dir, model_name.replace("/", "--"))
+        if os.path.exists(os.path.join(model_dir, "model.bin")):
+            return model_dir
+
+        from huggingface_hub import snapshot_download
+        from ctranslate2.converters import TransformersConverter
+
+        print(f"Конвертация {model_name} в формат CTranslate2 (выполняется один раз)...")
+        source_dir = snapshot_download(model_name, cache_dir=cache_dir)
+        temp_dir = f"{model_dir}.tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        TransformersConverter(source_dir).convert(temp_dir, quantization="float16", force=True)
+        os.replace(temp_dir, model_dir)
+        print(f"✓ Модель CTranslate2 сохранена: {model_dir}")
+        return model_dir
+
+    def generate(self, texts: list, target_lang_code: str, num_beams: int, max_length: int) -> list:
+        """Переводит пакет текстов одним вызовом translate_batch.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang_code: Код целевого языка NLLB (например, 'eng_Latn').
+            num_beams: Ширина лучевого поиска.
+            max_length: Максимальная длина входа и выхода в токенах.
+
+        Returns:
+            list: Переводы в порядке входных текстов.
+        """
+        input_ids = self.tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+        sources = [self.tokenizer.convert_ids_to_tokens(ids) for ids in input_ids]
+        results = self.model.translate_batch(
+            sources,
+            target_prefix=[[target_lang_code]] * len(sources),
+            beam_size=num_beams,
+            max_input_length=max_length,
+            max_decoding_length=max_length
+        )
+
+        hypotheses = [result.hypotheses[0] for result in results]
+        _count_truncations([len(ids) for ids in input_ids], [len(tokens) for tokens in hypotheses], max_length)
+        return [self._decode(tokens, target_lang_code) for tokens in hypotheses]
+
+    def generate_multi(self, texts: list, target_lang_codes: list, num_beams: int, max_length: int) -> dict:
+        """Переводит пакет текстов на несколько языков одним вызовом translate_batch.
+
+        CTranslate2 не позволяет передать готовый выход энкодера, поэтому
+        текст токенизируется один раз, а пары (текст, язык) идут одним
+        пакетом. Энкодер при этом выполняется для каждой пары, то есть
+        len(target_lang_codes) раз на текст; выигрыш только в одном
+        пакетном вызове вместо вызова на каждый язык.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang_codes: Коды целевых языков NLLB.
+            num_beams: Ширина лучевого поиска.
+            max_length: Максимальная длина входа и выхода в токенах.
+
+        Returns:
+            dict: Переводы в порядке входных текстов по кодам языков.
+        """
+        input_ids = self.tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+        sources = [self.tokenizer.convert_ids_to_tokens(ids) for ids in input_ids]
+        results = self.model.translate_batch(
+            sources * len(target_lang_codes),
+            target_prefix=[[code] for code in target_lang_codes for _ in sources],
+            beam_size=num_beams,
+            max_input_length=max_length,
+            max_decoding_length=max_length
+        )
+
+        hypotheses = [result.hypotheses[0] for result in results]
+        _count_truncations([len(ids) for ids in input_ids], [len(tokens) for tokens in hypotheses], max_length)
+        translations = {}
+        for index, target_lang_code in enumerate(target_lang_codes):
+            block = hypotheses[index * len(sources):(index + 1) * len(sources)]
+            translations[target_lang_code] = [self._decode(tokens, target_lang_code) for tokens in block]
+        return translations
+
+    def _decode(self, tokens: list, target_lang_code: str) -> str:
+        if tokens and tokens[0] == target_lang_code:
+            tokens = tokens[1:]
+        return self.tokenizer.decode(self.tokenizer.convert_tokens_to_ids(tokens), skip_special_tokens=True)
+
+    def offload(self):
+        """Переносит модель в память CPU."""
+        self.model.unload_model(to_cpu=True)
+
+    def load(self):
+        """Возвращает модель на устройство."""
+        self.model.load_model()
+
+    def size_gb(self) -> float:
+        """Оценивает объем модели в гигабайтах по типу вычислений."""
+        weight_type = self.compute_type.split("_")[0]
+        return NLLB_PARAMETERS * _BYTES_PER_PARAMETER.get(weight_type, 2) / 1024 ** 3
@@ -0,0 +1,191 @@
+"""
+Двухуровневый кэш переводов: LRU в памяти процесса и постоянное хранилище SQLite.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from utils.metrics import CACHE_REQUESTS
+
+
+def normalize_text(text: str) -> str:
+    """Нормализует исходный текст для ключа кэша (Unicode NFKC, схлопывание пробелов).
+
+    Args:
+        text: Исходный текст.
+
+    Returns:
+        str: Нормализованный текст.
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize("NFKC", text)).strip()
+
+
+class TranslationCache:
+    """Кэш переводов с LRU в памяти перед постоянным хранилищем SQLite.
+
+    Ключ строится из нормализованного текста, целевого языка, имени модели
+    и параметров генерации. Размер хранилища на диске ограничен: при
+    превышении лимита удаляются записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, db_path: str = None, memory_size: int = 1024, max_disk_bytes: int = 64 * 1024 ** 2):
+        """Инициализирует кэш.
+
+        Args:
+            db_path: Путь к файлу SQLite (None - только кэш в памяти).
+            memory_size: Максимальное число записей в LRU в памяти.
+            max_disk_bytes: Максимальный суммарный размер записей на диске в байтах.
+        """
+        self.memory_size = memory_size
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db = None
+        self._disk_bytes = 0
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON translations(accessed)")
+            self._db.commit()
+            self._disk_bytes = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM translations"
+            ).fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, target_lang: str, model_name: str, params: dict) -> str:
+        """Строит ключ кэша.
+
+        Args:
+            text: Исходный текст.
+            target_lang: Код целевого языка.
+            model_name: Имя модели перевода.
+            params: Параметры генерации, влияющие на результат.
+
+        Returns:
+            str: Хэш SHA-256 ключа.
+        """
+        payload = json.dumps(
+            [normalize_text(text), target_lang, model_name, params],
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """Возвращает перевод из кэша.
+
+        Args:
+            key: Ключ, построенный make_key.
+
+        Returns:
+            str: Закэшированный перевод или None.
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                CACHE_REQUESTS.inc(cache="translation", result="memory_hit")
+                return value
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM translations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE translations SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, row[0])
+                    self.stats["disk_hits"] += 1
+                    CACHE_REQUESTS.inc(cache="translation", result="disk_hit")
+                    return row[0]
+
+            self.stats["misses"] += 1
+            CACHE_REQUESTS.inc(cache="translation", result="miss")
+            return None
+
+    def contains(self, key: str) -> bool:
+        """Проверяет наличие перевода, не учитывая обращение в статистике и порядке LRU.
+
+        Args:
+            key: Ключ, построенный make_key.
+
+        Returns:
+            bool: Есть ли перевод в памяти или в хранилище.
+        """
+        with self._lock:
+            if key in self._memory:
+                return True
+            if self._db is not None:
+                return self._db.execute("SELECT 1 FROM translations WHERE key = ?", (key,)).fetchone() is not None
+            return False
+
+    def put(self, key: str, value: str):
+        """Сохраняет перевод в оба уровня кэша.
+
+        Args:
+            key: Ключ, построенный make_key.
+            value: Перевод.
+        """
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                size = len(key) + len(value.encode("utf-8"))
+                previous = self._db.execute("SELECT size FROM translations WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time())
+                )
+                self._disk_bytes += size - (previous[0] if previous else 0)
+                self._evict_disk()
+                self._db.commit()
+
+    def hit_rate(self) -> float:
+        """Доля обращений, обслуженных кэшем."""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def clear(self):
+        """Очищает оба уровня кэша."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+                self._disk_bytes = 0
+
+    def close(self):
+        """Закрывает соединение с хранилищем."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, value: str):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM translations ORDER BY accessed ASC")
+        for key, size in rows.fetchall():
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM translations WHERE key = ?", (key,))
+            self._disk_bytes -= size
+            self.stats["evictions"] += 1
@@ -4,16 +4,35 @@
 
 import os
 import traceback
-import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from config import DEVICE, HF_MODELS_DIR
+from transformers import AutoTokenizer
+from config import (
+    DEVICE, HF_MODELS_DIR, CACHE_DIR, INFERENCE_PROFILE, TRANSLATION_BACKEND, TRANSLATION_CACHE,
+    TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_MAX_MB, TRANSLATION_MAX_BATCH_TOKENS,
+    TRANSLATION_CONTEXT_SENTENCES, TRANSLATION_WINDOW_CHARS
+)
+from translation.backends import TorchNLLBBackend, CTranslate2NLLBBackend
+from translation.cache import TranslationCache
+from utils.text import group_sentences
 
 
 class TextTranslator:
     """Класс для перевода текста с русского на английский или французский через NLLB."""
 
-    def __init__(self):
-        """Инициализирует модель перевода NLLB."""
+    def __init__(self, cache: TranslationCache = None, quantize: bool = None, num_threads: int = None,
+                 device: str = None, backend: str = None, compute_type: str = None, use_cache: bool = None):
+        """Инициализирует модель перевода NLLB.
+
+        Args:
+            cache: Кэш переводов (по умолчанию создается из конфигурации, если TRANSLATION_CACHE=1).
+            quantize: Динамически квантовать Linear-слои в int8 (только движок torch на CPU);
+                по умолчанию берется из профиля инференса DEVICE_PROFILE.
+            num_threads: Число потоков перевода (0 - по умолчанию); по умолчанию из профиля.
+            device: Устройство ('cuda' или 'cpu'); по умолчанию DEVICE из конфигурации.
+            backend: Движок генерации ('ctranslate2' или 'torch'); по умолчанию TRANSLATION_BACKEND.
+            compute_type: Тип вычислений CTranslate2; по умолчанию из профиля инференса.
+            use_cache: Использовать кэш переводов: True - создать кэш независимо от TRANSLATION_CACHE,
+                False - работать без кэша, даже если передан cache; по умолчанию из конфигурации.
+        """
         print("Загрузка модели NLLB для перевода...")
         print(f"Модели Hugging Face будут сохранены в: {HF_MODELS_DIR}")
 
@@ -21,6 +40,17 @@ class TextTranslator:
         os.makedirs(cache_dir, exist_ok=True)
 
         model_name = "facebook/nllb-200-distilled-600M"
+        self.model_name = model_name
+        self.generation_params = {"num_beams": 4, "max_length": 400}
+        self.device = device or DEVICE
+        self.num_threads = INFERENCE_PROFILE["translator_threads"] if num_threads is None else num_threads
+        if quantize is None:
+            quantize = INFERENCE_PROFILE["quantize_translator"]
+        compute_type = compute_type or INFERENCE_PROFILE["translator_compute_type"]
+        backend = (backend or TRANSLATION_BACKEND).lower()
+        if backend not in ["ctranslate2", "torch"]:
+            print(f"⚠ Неизвестный движок перевода: {backend}. Используется 'ctranslate2'")
+            backend = "ctranslate2"
 
         try:
             print(f"Загрузка модели {model_name}...")
@@ -28,12 +58,29 @@ class TextTranslator:
                 model_name,
                 cache_dir=cache_dir
             )
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(
-                model_name,
-                cache_dir=cache_dir
-            ).to(DEVICE)
+            self.backend = None
+            if backend == "ctranslate2":
+                try:
+                    self.backend = CTranslate2NLLBBackend(
+                        model_name, self.tokenizer, cache_dir,
+                        models_dir=os.path.join(HF_MODELS_DIR, "ctranslate2"),
+                        device=self.device,
+                        compute_type=compute_type,
+                        num_threads=self.num_threads
+                    )
+                except ImportError:
+                    print("⚠ ctranslate2 не установлен, перевод выполняется через PyTorch")
+            if self.backend is None:
+                self.backend = TorchNLLBBackend(
+                    model_name, self.tokenizer, cache_dir,
+                    device=self.device,
+                    quantize=quantize,
+                    num_threads=self.num_threads
+                )
+            self.model = self.backend.model
+            self.model_variant = self.backend.variant
 
-            print("✓ Модель NLLB загружена!")
+            print(f"✓ Модель NLLB загружена (движок {self.backend.name})!")
         except Exception as e:
             raise RuntimeError(f"Ошибка при загрузке модели NLLB: {e}")
 
@@ -42,15 +89,62 @@ class TextTranslator:
             "fr": "fra_Latn"
         }
 
+        if use_cache is False:
+            cache = None
+        elif cache is None and (use_cache or TRANSLATION_CACHE):
+            cache = TranslationCache(
+                db_path=os.path.join(CACHE_DIR, "translations.sqlite"),
+                memory_size=TRANSLATION_CACHE_SIZE,
+                max_disk_bytes=int(TRANSLATION_CACHE_MAX_MB * 1024 ** 2)
+            )
+            print(f"✓ Кэш переводов: {os.path.join(CACHE_DIR, 'translations.sqlite')}")
+        self.cache = cache
+
         print("Модель перевода готова!")
 
-    def translate(self, text: str, target_lang: str = "fr", max_input_length: int = 500) -> str:
+    def warmup(self):
+        """Выполняет короткий перевод в обход кэша, чтобы первый настоящий перевод не платил за холодный старт."""
+        self._generate_batch(["Привет"], self.nllb_languages["en"])
+
+    def warm_cache(self, phrases, target_lang: str = "fr") -> int:
+        """Прогревает кэш переводов списком частых фраз.
+
+        Args:
+            phrases: Итерируемый список фраз на русском языке.
+            target_lang: Целевой язык ('en' или 'fr').
+
+        Returns:
+            int: Количество фраз, переведенных заново (остальные уже были в кэше).
+        """
+        if self.cache is None:
+            return 0
+
+        translated = 0
+        for phrase in phrases:
+            phrase = phrase.strip()
+            if not phrase:
+                continue
+            # Проверка без статистики: промах учтет сам translate
+            if not self.cache.contains(self._cache_key(phrase, target_lang)):
+                self.translate(phrase, target_lang=target_lang)
+                translated += 1
+        return translated
+
+    def _cache_key(self, text: str, target_lang: str) -> str:
+        return TranslationCache.make_key(
+            text, self.nllb_languages[target_lang], self.model_variant, self.generation_params
+        )
+
+    def translate(self, text: str, target_lang: str = "fr") -> str:
         """Переводит текст с русского на указанный язык через NLLB.
 
+        Длинный текст не обрезается: он делится на окна из нескольких соседних
+        предложений (предложения внутри окна служат друг другу контекстом),
+        окна переводятся одним пакетом и собираются в исходном порядке.
+
         Args:
             text: Текст на русском языке.
             target_lang: Целевой язык ('en' для английского, 'fr' для французского).
-            max_input_length: Максимальная длина входного текста.
 
         Returns:
             str: Переведенный текст на целевом языке.
@@ -63,49 +157,295 @@ class TextTranslator:
 
         print(f"\nПеревод текста с русского на {target_lang.upper()} (NLLB)...")
 
-        if len(text) > max_input_length:
-            text = text[:max_input_length]
-            print(f"Предупреждение: текст обрезан до {max_input_length} символов")
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(text, target_lang)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print(f"Переведенный текст (из кэша): {cached}")
+                return cached
 
         try:
-            target_lang_code = self.nllb_languages[target_lang]
-
-            try:
-                forced_bos_token_id = self.tokenizer.lang_code_to_id[target_lang_code]
-            except (AttributeError, KeyError):
-                forced_bos_token_id = self.tokenizer.convert_tokens_to_ids(target_lang_code)
-
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=400
-            ).to(DEVICE)
-
-            with torch.no_grad():
-                translated_tokens = self.model.generate(
-                    **inputs,
-                    forced_bos_token_id=forced_bos_token_id,
-                    max_length=400,
-                    num_beams=4,
-                    early_stopping=True
-                )
-
-            translated_text = self.tokenizer.decode(
-                translated_tokens[0],
-                skip_special_tokens=True
-            )
-
-            max_output_length = 300
-            if len(translated_text) > max_output_length:
-                translated_text = translated_text[:max_output_length]
-                print(f"Предупреждение: переведенный текст обрезан до {max_output_length} символов для TTS")
+            windows = group_sentences(text, TRANSLATION_CONTEXT_SENTENCES + 1, TRANSLATION_WINDOW_CHARS)
+            if len(windows) == 1:
+                translated_text = self._generate_batch(windows, self.nllb_languages[target_lang])[0]
+            else:
+                print(f"Длинный текст: {len(windows)} окон по предложениям")
+                translations = self.translate_batch(windows, target_lang=target_lang)
+                missing = sum(1 for part in translations if not part.strip())
+                if missing:
+                    # Склеенный без пропущенных окон перевод молча терял бы часть текста
+                    raise RuntimeError(f"не удалось перевести {missing} из {len(windows)} окон")
+                translated_text = " ".join(part.strip() for part in translations)
 
             print(f"Переведенный текст: {translated_text}")
+            if cache_key is not None and translated_text:
+                self.cache.put(cache_key, translated_text)
             return translated_text
 
         except Exception as e:
             print(f"Ошибка при переводе: {e}")
             traceback.print_exc()
             return ""
+
+    def translate_multi(self, text: str, target_langs: list,
+                        max_batch_tokens: int = TRANSLATION_MAX_BATCH_TOKENS) -> dict:
+        """Переводит текст сразу на несколько языков, которых нет в кэше.
+
+        Окна исходного текста делятся на пакеты по длине, как в translate_batch,
+        и каждый пакет переводится на все языки одним вызовом generate_multi.
+        Движок torch кодирует пакет один раз и повторяет только декодирование;
+        CTranslate2 кодирует его для каждого языка, но в одном вызове
+        translate_batch (поэтому бюджет пакета делится между языками).
+        Для одного языка равносилен translate. Если пакетный вызов упал или
+        какое-то окно осталось без перевода, язык переводится заново через
+        translate, а неполный перевод не кэшируется.
+
+        Args:
+            text: Текст на русском языке.
+            target_langs: Целевые языки (например, ['en', 'fr']).
+            max_batch_tokens: Максимальное число токенов (с дополнением) в одном пакете.
+
+        Returns:
+            dict: Переводы по кодам языков (пустая строка при ошибке).
+        """
+        for target_lang in target_langs:
+            if target_lang not in ["en", "fr"]:
+                raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
+        results = {target_lang: "" for target_lang in target_langs}
+        if not text or len(text.strip()) == 0:
+            return results
+
+        pending = []
+        for target_lang in target_langs:
+            cached = self.cache.get(self._cache_key(text, target_lang)) if self.cache is not None else None
+            if cached is not None:
+                results[target_lang] = cached
+            else:
+                pending.append(target_lang)
+        if len(pending) <= 1:
+            for target_lang in pending:
+                results[target_lang] = self.translate(text, target_lang=target_lang)
+            return results
+
+        languages = ", ".join(target_lang.upper() for target_lang in pending)
+        shared_encoder = self.backend.shared_encoder
+        print(f"\nПеревод текста с русского на {languages} "
+              f"(NLLB{', общий энкодер' if shared_encoder else ''})...")
+        lang_codes = [self.nllb_languages[target_lang] for target_lang in pending]
+        if not shared_encoder:
+            max_batch_tokens = max(1, max_batch_tokens // len(pending))
+        try:
+            windows = group_sentences(text, TRANSLATION_CONTEXT_SENTENCES + 1, TRANSLATION_WINDOW_CHARS)
+            translations = {code: [""] * len(windows) for code in lang_codes}
+            for bucket in self._buckets(windows, max_batch_tokens):
+                bucket_translations = self.backend.generate_multi(
+                    [windows[index] for index in bucket],
+                    lang_codes,
+                    num_beams=self.generation_params["num_beams"],
+                    max_length=self.generation_params["max_length"]
+                )
+                for code in lang_codes:
+                    for index, translated in zip(bucket, bucket_translations[code]):
+                        translations[code][index] = translated
+        except Exception as e:
+            print(f"Ошибка при переводе: {e}")
+            traceback.print_exc()
+            print("⚠ Переводим каждый язык отдельно")
+            for target_lang in pending:
+                results[target_lang] = self.translate(text, target_lang=target_lang)
+            return results
+
+        for target_lang in pending:
+            parts = translations[self.nllb_languages[target_lang]]
+            missing = sum(1 for part in parts if not part.strip())
+            if missing:
+                # Как и в translate: склеенный без пропущенных окон перевод молча
+                # терял бы часть текста, поэтому он не кэшируется и переводится заново
+                print(f"⚠ {target_lang.upper()}: не удалось перевести {missing} из {len(windows)} окон, "
+                      f"переводим отдельно")
+                results[target_lang] = self.translate(text, target_lang=target_lang)
+                continue
+            translated_text = " ".join(part.strip() for part in parts)
+            print(f"Переведенный текст ({target_lang.upper()}): {translated_text}")
+            results[target_lang] = translated_text
+            if self.cache is not None and translated_text:
+                self.cache.put(self._cache_key(text, target_lang), translated_text)
+        return results
+
+    def translate_many(self, texts: list, target_lang: str = "fr") -> list:
+        """Переводит несколько независимых текстов общими пакетами.
+
+        Каждый текст делится на окна так же, как в translate, окна всех
+        текстов переводятся через translate_batch и собираются обратно по
+        текстам. Используется планировщиком микропакетов, когда одновременно
+        приходят запросы нескольких сессий.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang: Целевой язык ('en' или 'fr').
+
+        Returns:
+            list: Переводы в порядке входных текстов (пустая строка для пустых входов и ошибок;
+                текст, хотя бы одно окно которого не переведено, тоже считается ошибкой).
+        """
+        if target_lang not in ["en", "fr"]:
+            raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
+
+        results = [""] * len(texts)
+        windows = []
+        owners = []
+        for index, text in enumerate(texts):
+            if not text or len(text.strip()) == 0:
+                continue
+            if self.cache is not None:
+                cached = self.cache.get(self._cache_key(text, target_lang))
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            for window in group_sentences(text, TRANSLATION_CONTEXT_SENTENCES + 1, TRANSLATION_WINDOW_CHARS):
+                windows.append(window)
+                owners.append(index)
+
+        if not windows:
+            return results
+
+        parts = {}
+        failed = set()
+        for owner, translated in zip(owners, self.translate_batch(windows, target_lang=target_lang)):
+            if translated.strip():
+                parts.setdefault(owner, []).append(translated.strip())
+            else:
+                failed.add(owner)
+        for index, translated_parts in parts.items():
+            if index in failed:
+                # Текст с непереведенным окном считается ошибкой, а не переводится частично
+                continue
+            results[index] = " ".join(translated_parts)
+            if self.cache is not None:
+                self.cache.put(self._cache_key(texts[index], target_lang), results[index])
+        return results
+
+    def translate_batch(self, texts: list, target_lang: str = "fr",
+                        max_batch_tokens: int = TRANSLATION_MAX_BATCH_TOKENS) -> list:
+        """Переводит список текстов, группируя их в пакеты по длине.
+
+        Тексты сортируются по числу токенов и делятся на пакеты так, чтобы
+        размер пакета с учетом дополнения (число текстов x длина самого длинного)
+        не превышал max_batch_tokens. На каждый пакет выполняется один вызов
+        generate, результаты возвращаются в исходном порядке. Если пакет не
+        удалось перевести, его тексты переводятся по одному.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang: Целевой язык ('en' для английского, 'fr' для французского).
+            max_batch_tokens: Максимальное число токенов (с дополнением) в одном пакете.
+
+        Returns:
+            list: Переводы в порядке входных текстов (пустая строка для пустых входов и ошибок).
+        """
+        if target_lang not in ["en", "fr"]:
+            raise ValueError(f"Неподдерживаемый целевой язык: {target_lang}. Используйте 'en' или 'fr'")
+
+        results = [""] * len(texts)
+        pending = []
+        for index, text in enumerate(texts):
+            if not text or len(text.strip()) == 0:
+                continue
+            if self.cache is not None:
+                cached = self.cache.get(self._cache_key(text, target_lang))
+                if cached is not None:
+                    results[index] = cached
+                    continue
+            pending.append(index)
+
+        if not pending:
+            return results
+
+        buckets = [[pending[i] for i in bucket]
+                   for bucket in self._buckets([texts[index] for index in pending], max_batch_tokens)]
+
+        print(f"\nПакетный перевод на {target_lang.upper()} (NLLB): "
+              f"{len(pending)} текстов в {len(buckets)} пакетах")
+
+        target_lang_code = self.nllb_languages[target_lang]
+        for bucket in buckets:
+            try:
+                translations = self._generate_batch([texts[index] for index in bucket], target_lang_code)
+            except Exception as e:
+                print(f"Ошибка при пакетном переводе: {e}")
+                traceback.print_exc()
+                translations = self._generate_each([texts[index] for index in bucket], target_lang_code)
+            for index, translated_text in zip(bucket, translations):
+                results[index] = translated_text
+                if self.cache is not None and translated_text:
+                    self.cache.put(self._cache_key(texts[index], target_lang), translated_text)
+
+        return results
+
+    def _generate_each(self, texts: list, target_lang_code: str) -> list:
+        """Переводит тексты неудавшегося пакета по одному.
+
+        Returns:
+            list: Переводы в порядке входных текстов (пустая строка для текстов с ошибкой).
+        """
+        if len(texts) == 1:
+            return [""]
+        print(f"ℹ Тексты пакета ({len(texts)}) переводятся по одному")
+        translations = []
+        for text in texts:
+            try:
+                translations.append(self._generate_batch([text], target_lang_code)[0])
+            except Exception as e:
+                print(f"Ошибка при переводе: {e}")
+                translations.append("")
+        return translations
+
+    def _buckets(self, texts: list, max_batch_tokens: int) -> list:
+        """Делит тексты на пакеты по длине в токенах.
+
+        Тексты сортируются по числу токенов, и пакет закрывается, когда его
+        размер с учетом дополнения (число текстов x длина самого длинного)
+        превысил бы max_batch_tokens.
+
+        Args:
+            texts: Тексты на русском языке.
+            max_batch_tokens: Максимальное число токенов (с дополнением) в одном пакете.
+
+        Returns:
+            list: Пакеты - списки индексов texts.
+        """
+        lengths = [
+            len(ids) for ids in self.tokenizer(
+                texts,
+                truncation=True,
+                max_length=self.generation_params["max_length"]
+            )["input_ids"]
+        ]
+        buckets = []
+        bucket = []
+        for index in sorted(range(len(texts)), key=lambda i: lengths[i]):
+            if bucket and (len(bucket) + 1) * lengths[index] > max_batch_tokens:
+                buckets.append(bucket)
+                bucket = []
+            bucket.append(index)
+        if bucket:
+            buckets.append(bucket)
+        return buckets
+
+    def _generate_batch(self, texts: list, target_lang_code: str) -> list:
+        """Переводит пакет текстов одним вызовом движка генерации.
+
+        Args:
+            texts: Тексты на русском языке.
+            target_lang_code: Код целевого языка NLLB (например, 'eng_Latn').
+
+        Returns:
+            list: Переводы в порядке входных текстов.
+        """
+        return self.backend.generate(
+            texts,
+            target_lang_code,
+            num_beams=self.generation_params["num_beams"],
+            max_length=self.generation_params["max_length"]
+        )
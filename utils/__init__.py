@@ -1,7 +1,33 @@
 """
-Утилиты для работы с GPU и мониторинга памяти.
+Утилиты: работа с GPU, мониторинг памяти, размещение моделей, метрики, профилирование и обработка текста.
+
+Модули, которым нужны torch и config (gpu_info, profiling), импортируются при
+первом обращении, чтобы легкие модули (например, метрики) можно было
+использовать без них.
 """
 
-from utils.gpu_info import print_memory_usage, clear_cache
+import importlib
+from utils.metrics import REGISTRY, stage_timer, start_exporters, stop_exporters
+from utils.residency import ResidencyManager
+from utils.text import split_sentences, split_clauses, split_into_chunks
+
+_LAZY_EXPORTS = {
+    'print_memory_usage': 'utils.gpu_info',
+    'clear_cache': 'utils.gpu_info',
+    'TurnProfiler': 'utils.profiling',
+}
+
+__all__ = [
+    'print_memory_usage', 'clear_cache', 'split_sentences', 'split_clauses', 'split_into_chunks',
+    'REGISTRY', 'stage_timer', 'start_exporters', 'stop_exporters', 'ResidencyManager',
+    'TurnProfiler'
+]
+
 
-__all__ = ['print_memory_usage', 'clear_cache']
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'utils' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
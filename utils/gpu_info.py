@@ -4,6 +4,7 @@
 
 import torch
 from config import DEVICE
+from utils.metrics import REGISTRY, VRAM_BYTES
 
 
 def _get_memory_usage():
@@ -18,16 +19,31 @@ def _get_memory_usage():
     allocated = torch.cuda.memory_allocated() / 1024 ** 3
     reserved = torch.cuda.memory_reserved() / 1024 ** 3
     total = torch.cuda.get_device_properties(0).total_memory / 1024 ** 3
+    # Память всего устройства, включая выделенную не через PyTorch (например, CTranslate2)
+    free_device, total_device = torch.cuda.mem_get_info()
 
     return {
         'allocated_gb': allocated,
         'reserved_gb': reserved,
         'total_gb': total,
         'free_gb': total - reserved,
-        'usage_percent': (reserved / total) * 100
+        'usage_percent': (reserved / total) * 100,
+        'device_used_gb': (total_device - free_device) / 1024 ** 3
     }
 
 
+def update_memory_metrics():
+    """Обновляет измерители памяти GPU в реестре метрик (вызывается перед экспортом)."""
+    if not torch.cuda.is_available():
+        return
+    VRAM_BYTES.set(torch.cuda.memory_allocated(), kind="allocated")
+    VRAM_BYTES.set(torch.cuda.memory_reserved(), kind="reserved")
+    VRAM_BYTES.set(torch.cuda.get_device_properties(0).total_memory, kind="total")
+
+
+REGISTRY.add_collector(update_memory_metrics)
+
+
 def print_memory_usage():
     """Выводит информацию об использовании памяти GPU."""
     if DEVICE != "cuda":
@@ -0,0 +1,467 @@
+"""
+Реестр метрик (счетчики, измерители, гистограммы) с экспортом в формате Prometheus.
+"""
+
+import abc
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Границы корзин гистограмм задержки по умолчанию, в секундах
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: dict = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric(abc.ABC):
+    """Базовый класс метрики с набором меток."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}, получено {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def label_sets(self) -> list:
+        """Возвращает наборы значений меток, для которых есть данные."""
+        with self._lock:
+            return sorted(self._values)
+
+    @abc.abstractmethod
+    def samples(self) -> list:
+        """Возвращает строки (суффикс, значения меток, значение, доп. метки) для экспорта."""
+
+
+class Counter(_Metric):
+    """Монотонно растущий счетчик."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Увеличивает счетчик.
+
+        Args:
+            amount: Приращение (неотрицательное).
+            **labels: Значения меток.
+
+        Raises:
+            ValueError: Если приращение отрицательное.
+        """
+        if amount < 0:
+            raise ValueError("Счетчик можно только увеличивать")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Возвращает текущее значение счетчика."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [("_total", key, value, None) for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Измеритель: значение, которое может как расти, так и уменьшаться."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        """Устанавливает значение."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Увеличивает значение."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """Уменьшает значение."""
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        """Возвращает текущее значение."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list:
+        with self._lock:
+            return [("", key, value, None) for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Гистограмма наблюдений с накопительными корзинами, суммой и числом наблюдений."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        """Добавляет наблюдение."""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][index] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Контекстный менеджер, добавляющий время выполнения блока как наблюдение."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def summary(self, **labels) -> dict:
+        """Возвращает число наблюдений, сумму и оценки квантилей p50/p95/p99 по корзинам."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {"count": 0, "sum": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+            counts = list(state["counts"])
+            total = state["count"]
+            result = {"count": total, "sum": state["sum"]}
+
+        bounds = self.buckets + (math.inf,)
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            rank = q * total
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                if cumulative >= rank:
+                    result[name] = bound if bound != math.inf else self.buckets[-1]
+                    break
+        return result
+
+    def samples(self) -> list:
+        rows = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), state["counts"]):
+                    cumulative += count
+                    rows.append(("_bucket", key, cumulative, {"le": _format_value(bound)}))
+                rows.append(("_sum", key, state["sum"], None))
+                rows.append(("_count", key, state["count"], None))
+        return rows
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса.
+
+    Помимо метрик поддерживает сборщики - функции, которые вызываются перед
+    экспортом и обновляют измерители, значение которых дешевле прочитать по
+    запросу (память GPU, глубина очередей).
+    """
+
+    def __init__(self, namespace: str = ""):
+        """Инициализирует пустой реестр.
+
+        Args:
+            namespace: Префикс имен метрик (например, 'speech_translator').
+        """
+        self.namespace = namespace
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, documentation: str, labelnames: tuple, **kwargs):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        with self._lock:
+            existing = self._metrics.get(full_name)
+            if existing is not None:
+                if not isinstance(existing, metric_class) or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"Метрика {full_name} уже зарегистрирована с другим типом или метками")
+                return existing
+            metric = metric_class(full_name, documentation, labelnames, **kwargs)
+            self._metrics[full_name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        """Регистрирует счетчик (или возвращает уже зарегистрированный)."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        """Регистрирует измеритель (или возвращает уже зарегистрированный)."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """Регистрирует гистограмму (или возвращает уже зарегистрированную)."""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, collector):
+        """Добавляет функцию, вызываемую перед каждым экспортом."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def remove_collector(self, collector):
+        """Удаляет ранее добавленную функцию-сборщик."""
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self):
+        """Вызывает сборщики. Ошибка сборщика не прерывает экспорт остальных метрик."""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"⚠ Ошибка сборщика метрик: {e}")
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        self.collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, key, value, extra in metric.samples():
+                labels = _format_labels(metric.labelnames, key, extra)
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str):
+        """Атомарно записывает метрики в файл (например, для textfile-коллектора node_exporter)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def print_summary(self):
+        """Выводит сводку гистограмм и ненулевых счетчиков в консоль."""
+        self.collect()
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        print("\n" + "=" * 60)
+        print("МЕТРИКИ")
+        print("=" * 60)
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                for key in metric.label_sets():
+                    summary = metric.summary(**dict(zip(metric.labelnames, key)))
+                    labels = _format_labels(metric.labelnames, key)
+                    mean = summary["sum"] / summary["count"] if summary["count"] else 0.0
+                    print(f"{metric.name}{labels}: n={summary['count']} среднее={mean:.3f} "
+                          f"p50≤{summary['p50']:g} p95≤{summary['p95']:g} p99≤{summary['p99']:g}")
+            else:
+                for suffix, key, value, _ in metric.samples():
+                    if value:
+                        print(f"{metric.name}{suffix}{_format_labels(metric.labelnames, key)}: {_format_value(value)}")
+        print("=" * 60)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Запускает HTTP-эндпоинт /metrics в фоновом потоке.
+
+    Args:
+        registry: Экспортируемый реестр.
+        port: Порт.
+        host: Адрес (по умолчанию только локальный).
+
+    Returns:
+        ThreadingHTTPServer: Запущенный сервер (остановка - server.shutdown()).
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_file_writer(registry: MetricsRegistry, path: str, interval: float = 15.0) -> threading.Event:
+    """Периодически записывает метрики в файл в фоновом потоке.
+
+    Args:
+        registry: Экспортируемый реестр.
+        path: Путь к файлу .prom.
+        interval: Период записи в секундах.
+
+    Returns:
+        threading.Event: Событие остановки (после set() выполняется последняя запись).
+    """
+    stop_event = threading.Event()
+
+    def _run():
+        while True:
+            stopped = stop_event.wait(interval)
+            try:
+                registry.write_file(path)
+            except OSError as e:
+                print(f"⚠ Не удалось записать метрики в {path}: {e}")
+            if stopped:
+                break
+
+    threading.Thread(target=_run, name="metrics-file", daemon=True).start()
+    return stop_event
+
+
+REGISTRY = MetricsRegistry(namespace="speech_translator")
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "stage_latency_seconds", "Длительность этапа обработки фразы", ("stage",)
+)
+TURN_LATENCY = REGISTRY.histogram(
+    "turn_latency_seconds", "Время от конца записи фразы до конца воспроизведения перевода"
+)
+FIRST_AUDIO_LATENCY = REGISTRY.histogram(
+    "first_audio_latency_seconds", "Время от конца записи фразы до начала воспроизведения перевода"
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests", "Обращения к кэшам результатов", ("cache", "result")
+)
+FAILURES = REGISTRY.counter(
+    "failures", "Ошибки обработки по этапам", ("stage",)
+)
+TRUNCATIONS = REGISTRY.counter(
+    "truncations", "Принудительные обрезки входа или выхода по достижении лимита длины", ("component",)
+)
+CPU_FALLBACKS = REGISTRY.counter(
+    "cpu_fallbacks", "Переключения компонента с GPU на CPU после ошибки CUDA", ("component",)
+)
+VRAM_BYTES = REGISTRY.gauge(
+    "vram_bytes", "Память GPU, выделенная и зарезервированная PyTorch", ("kind",)
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "queue_depth", "Глубина очереди перед этапом конвейера", ("stage",)
+)
+
+
+class StageTimer:
+    """Результат stage_timer: длительность измеренного этапа в секундах."""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Измеряет этап и записывает длительность в гистограмму STAGE_LATENCY.
+
+    Длительность доступна и вызывающему коду через атрибут elapsed. Если блок
+    завершился исключением, засчитывается ошибка этапа.
+
+    Args:
+        stage: Название этапа (метка stage).
+
+    Yields:
+        StageTimer: Объект, в атрибут elapsed которого записывается длительность.
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+    try:
+        yield timer
+    except Exception:
+        FAILURES.inc(stage=stage)
+        raise
+    finally:
+        timer.elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(timer.elapsed, stage=stage)
+
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def start_exporters(port: int = 0, file_path: str = "", file_interval: float = 15.0, host: str = "127.0.0.1"):
+    """Запускает настроенные экспортеры REGISTRY (повторный вызов ничего не делает).
+
+    Args:
+        port: Порт HTTP-эндпоинта /metrics (0 - не запускать).
+        file_path: Файл для периодической записи метрик ('' - не записывать).
+        file_interval: Период записи файла в секундах.
+        host: Адрес HTTP-эндпоинта.
+    """
+    with _exporters_lock:
+        if port and "http" not in _exporters:
+            try:
+                _exporters["http"] = start_http_server(REGISTRY, port, host)
+                print(f"✓ Метрики доступны по адресу http://{host}:{port}/metrics")
+            except OSError as e:
+                print(f"⚠ Не удалось запустить HTTP-эндпоинт метрик на порту {port}: {e}")
+        if file_path and "file" not in _exporters:
+            _exporters["file"] = start_file_writer(REGISTRY, file_path, file_interval)
+            print(f"✓ Метрики записываются в {file_path} каждые {file_interval:g} сек")
+
+
+def stop_exporters():
+    """Останавливает экспортеры, запущенные start_exporters (файл записывается последний раз)."""
+    with _exporters_lock:
+        server = _exporters.pop("http", None)
+        if server is not None:
+            server.shutdown()
+        stop_event = _exporters.pop("file", None)
+        if stop_event is not None:
+            stop_event.set()
@@ -0,0 +1,163 @@
+"""
+Профилирование отдельных фраз: трассы torch.profiler и профили cProfile в ротируемой папке.
+"""
+
+import cProfile
+import glob
+import os
+import random
+import time
+from contextlib import contextmanager
+from config import PROFILE_MODE, PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_MIN_TURN_S, PROFILE_KEEP
+from utils.metrics import REGISTRY
+
+PROFILED_TURNS = REGISTRY.counter(
+    "profiled_turns_total", "Профилированные фразы: сохраненные и отброшенные фильтром", ("result",)
+)
+
+MODES = ("torch", "python")
+
+
+class TurnProfiler:
+    """Профилирует фразы целиком и сохраняет по одной трассе на фразу.
+
+    Режимы:
+        torch - torch.profiler (операции CPU и CUDA), трасса Chrome в .json
+            (открывается в chrome://tracing или Perfetto);
+        python - cProfile, статистика в .pstats (python -m pstats, snakeviz).
+
+    Профилируется доля фраз sample_rate; трассы фраз быстрее min_turn_s
+    отбрасываются, поэтому в папке остаются только медленные фразы. В папке
+    хранятся трассы последних keep фраз, более старые удаляются.
+    """
+
+    def __init__(self, modes=PROFILE_MODE, output_dir: str = PROFILE_DIR, sample_rate: float = PROFILE_SAMPLE_RATE,
+                 min_turn_s: float = PROFILE_MIN_TURN_S, keep: int = PROFILE_KEEP):
+        """Инициализирует профилировщик.
+
+        Args:
+            modes: Режимы через запятую или списком ('torch', 'python'); пусто - выключен.
+            output_dir: Папка для трасс.
+            sample_rate: Доля профилируемых фраз (0..1).
+            min_turn_s: Сохранять трассы только фраз не быстрее этого значения в секундах.
+            keep: Сколько последних трасс фраз хранить в папке.
+        """
+        if isinstance(modes, str):
+            modes = [mode.strip().lower() for mode in modes.split(",") if mode.strip()]
+        self.modes = []
+        for mode in modes:
+            if mode not in MODES:
+                print(f"⚠ Неизвестный режим профилирования: {mode}. Используйте {', '.join(MODES)}")
+            elif mode not in self.modes:
+                self.modes.append(mode)
+
+        self._torch_profiler = None
+        if "torch" in self.modes:
+            try:
+                import torch.profiler
+                self._torch_profiler = torch.profiler
+            except ImportError:
+                print("⚠ torch.profiler недоступен, режим torch отключен")
+                self.modes.remove("torch")
+
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.min_turn_s = min_turn_s
+        self.keep = max(1, keep)
+        self.turns = 0
+        if self.enabled:
+            os.makedirs(output_dir, exist_ok=True)
+            print(f"ℹ Профилирование фраз ({', '.join(self.modes)}): {output_dir}, доля {sample_rate:g}, "
+                  f"не быстрее {min_turn_s:g} сек, хранится {self.keep}")
+
+    @property
+    def enabled(self) -> bool:
+        """Включен ли хотя бы один режим профилирования."""
+        return bool(self.modes)
+
+    @contextmanager
+    def turn(self, label: str = "turn"):
+        """Профилирует блок как одну фразу и сохраняет трассу, если она прошла фильтры.
+
+        Args:
+            label: Метка фразы в имени файла трассы.
+
+        Yields:
+            dict: Сведения о фразе; после выхода содержит 'elapsed' и 'files'
+                (пути сохраненных трасс, пустой список, если трасса отброшена).
+        """
+        self.turns += 1
+        info = {"turn": self.turns, "elapsed": 0.0, "files": []}
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield info
+            return
+
+        torch_profile = None
+        if self._torch_profiler is not None:
+            activities = [self._torch_profiler.ProfilerActivity.CPU]
+            if _cuda_available():
+                activities.append(self._torch_profiler.ProfilerActivity.CUDA)
+            torch_profile = self._torch_profiler.profile(activities=activities)
+            torch_profile.start()
+        python_profile = None
+        if "python" in self.modes:
+            python_profile = cProfile.Profile()
+            python_profile.enable()
+
+        start = time.time()
+        try:
+            yield info
+        finally:
+            if python_profile is not None:
+                python_profile.disable()
+            if torch_profile is not None:
+                torch_profile.stop()
+            info["elapsed"] = time.time() - start
+
+            if info["elapsed"] < self.min_turn_s:
+                PROFILED_TURNS.inc(result="discarded")
+            else:
+                info["files"] = self._save(label, info, torch_profile, python_profile)
+
+    def _save(self, label: str, info: dict, torch_profile, python_profile) -> list:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.output_dir, f"{label}_{stamp}_{info['turn']:05d}_{info['elapsed']:.2f}s")
+        files = []
+        try:
+            if torch_profile is not None:
+                torch_profile.export_chrome_trace(f"{base}.json")
+                files.append(f"{base}.json")
+            if python_profile is not None:
+                python_profile.dump_stats(f"{base}.pstats")
+                files.append(f"{base}.pstats")
+        except Exception as e:
+            print(f"⚠ Не удалось сохранить трассу фразы: {e}")
+            PROFILED_TURNS.inc(result="failed")
+            return files
+
+        PROFILED_TURNS.inc(result="saved")
+        print(f"ℹ Трасса фразы #{info['turn']} ({info['elapsed']:.2f} сек): {', '.join(files)}")
+        self._rotate()
+        return files
+
+    def _rotate(self):
+        """Удаляет трассы самых старых фраз сверх keep."""
+        traces = {}
+        for path in glob.glob(os.path.join(self.output_dir, "*.json")) + \
+                glob.glob(os.path.join(self.output_dir, "*.pstats")):
+            traces.setdefault(os.path.splitext(path)[0], []).append(path)
+        stale = sorted(traces, key=lambda base: min(os.path.getmtime(path) for path in traces[base]))
+        for base in stale[:max(0, len(stale) - self.keep)]:
+            for path in traces[base]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def _cuda_available() -> bool:
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
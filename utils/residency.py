@@ -0,0 +1,350 @@
+"""
+Управление размещением моделей: выгрузка простаивающих моделей из VRAM в память CPU.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from utils.metrics import REGISTRY
+
+MODEL_SWAPS = REGISTRY.counter(
+    "model_swaps_total", "Перемещения моделей между GPU и CPU", ("model", "direction")
+)
+MODEL_SWAP_LATENCY = REGISTRY.histogram(
+    "model_swap_seconds", "Длительность перемещения модели между GPU и CPU", ("model", "direction"),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+RESIDENT_MODELS = REGISTRY.gauge(
+    "model_resident", "Находится ли модель в VRAM (1) или в памяти CPU (0)", ("model",)
+)
+
+# Число параметров моделей Whisper (для оценки объема VRAM до первого измерения)
+WHISPER_PARAMETERS = {
+    "tiny": 39e6,
+    "base": 74e6,
+    "small": 244e6,
+    "medium": 769e6,
+    "large": 1550e6,
+}
+
+
+class _Model:
+    __slots__ = ("name", "offload", "load", "size_gb", "resident", "loading", "in_use", "last_used")
+
+    def __init__(self, name: str, offload, load, size_gb: float, resident: bool):
+        self.name = name
+        self.offload = offload
+        self.load = load
+        self.size_gb = size_gb
+        self.resident = resident
+        self.loading = False
+        self.in_use = 0
+        self.last_used = 0.0
+
+
+class ResidencyManager:
+    """Держит в VRAM только те модели, которые помещаются в заданный бюджет.
+
+    Перед этапом его модель захватывается через use(): если она выгружена,
+    из VRAM вытесняются давно не использовавшиеся свободные модели, пока
+    новая не поместится в бюджет, после чего модель загружается обратно.
+    prefetch() выполняет то же в фоновом потоке, чтобы модель следующего
+    этапа загружалась, пока работает текущий; место под модель резервируется
+    под блокировкой, а сама загрузка идет без нее.
+
+    Объем занятой памяти считается по размерам зарегистрированных моделей.
+    Если задана memory_fn, размер модели уточняется по изменению занятой
+    памяти при ее загрузке; без нее (или на CPU) бюджет моделируется, что
+    позволяет проверять логику без GPU.
+    """
+
+    def __init__(self, budget_gb: float, memory_fn=None, prefetch: bool = True):
+        """Инициализирует менеджер.
+
+        Args:
+            budget_gb: Бюджет VRAM для моделей в гигабайтах.
+            memory_fn: Функция без аргументов, возвращающая занятую память устройства
+                в гигабайтах (или None, если измерение недоступно).
+            prefetch: Выполнять ли prefetch в фоновом потоке (иначе он игнорируется).
+        """
+        self.budget_gb = budget_gb
+        self.memory_fn = memory_fn
+        self._models = {}
+        self._lock = threading.RLock()
+        self._loading = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="residency") if prefetch else None
+
+    def register(self, name: str, offload, load, size_gb: float, resident: bool = True):
+        """Регистрирует модель.
+
+        Args:
+            name: Название модели.
+            offload: Функция, переносящая модель в память CPU.
+            load: Функция, возвращающая модель на GPU.
+            size_gb: Оценка объема модели в VRAM в гигабайтах.
+            resident: Находится ли модель в VRAM в момент регистрации.
+        """
+        with self._lock:
+            self._models[name] = _Model(name, offload, load, size_gb, resident)
+            RESIDENT_MODELS.set(1 if resident else 0, model=name)
+
+    def resident_gb(self) -> float:
+        """Возвращает суммарный объем моделей, находящихся в VRAM или загружаемых в нее."""
+        with self._lock:
+            return sum(model.size_gb for model in self._models.values() if model.resident or model.loading)
+
+    def resident(self) -> list:
+        """Возвращает названия моделей, находящихся в VRAM."""
+        with self._lock:
+            return [name for name, model in self._models.items() if model.resident]
+
+    def enforce_budget(self):
+        """Выгружает свободные модели, пока суммарный объем не уложится в бюджет."""
+        with self._lock:
+            self._make_room(0.0, exclude=None)
+
+    @contextmanager
+    def use(self, name: str, prefetch: str = None):
+        """Захватывает модель на время этапа: загружает ее в VRAM и запрещает вытеснение.
+
+        Args:
+            name: Название модели.
+            prefetch: Модель следующего этапа, которую нужно загрузить в фоне.
+        """
+        self.acquire(name)
+        try:
+            if prefetch:
+                self.prefetch(prefetch)
+            yield
+        finally:
+            self.release(name)
+
+    def acquire(self, name: str):
+        """Загружает модель в VRAM (если нужно) и отмечает ее как используемую."""
+        while True:
+            self._wait_loading(name)
+            with self._lock:
+                model = self._models[name]
+                if model.loading:
+                    # Предзагрузка началась между ожиданием и захватом блокировки
+                    continue
+                model.in_use += 1
+                model.last_used = time.time()
+                if not model.resident:
+                    try:
+                        self._load(model)
+                    except Exception:
+                        # Иначе модель навсегда считалась бы используемой и не вытеснялась
+                        model.in_use -= 1
+                        raise
+                return
+
+    def release(self, name: str):
+        """Снимает отметку использования модели."""
+        with self._lock:
+            model = self._models[name]
+            model.in_use = max(0, model.in_use - 1)
+            model.last_used = time.time()
+
+    def prefetch(self, name: str):
+        """Загружает модель в VRAM в фоновом потоке, если она выгружена.
+
+        Returns:
+            Future загрузки или None, если загрузка не нужна.
+        """
+        if self._executor is None:
+            return None
+        with self._lock:
+            model = self._models.get(name)
+            if model is None or model.resident or name in self._loading:
+                return None
+            future = self._executor.submit(self._prefetch, name)
+            self._loading[name] = future
+            return future
+
+    def shutdown(self):
+        """Останавливает фоновый поток предзагрузки."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _prefetch(self, name: str):
+        """Загружает модель в фоне; сама загрузка выполняется без блокировки менеджера."""
+        try:
+            with self._lock:
+                model = self._models[name]
+                if model.resident:
+                    return
+                pinned_gb = sum(
+                    other.size_gb for other in self._models.values()
+                    if (other.resident and other.in_use) or other.loading
+                )
+                if pinned_gb + model.size_gb > self.budget_gb:
+                    print(f"ℹ Предзагрузка {name} отложена: используемые модели занимают бюджет VRAM")
+                    return
+                before = self._begin_load(model)
+
+            start = time.time()
+            try:
+                model.load()
+            except Exception:
+                with self._lock:
+                    model.loading = False
+                raise
+            elapsed = time.time() - start
+
+            with self._lock:
+                self._finish_load(model, before, elapsed)
+        except Exception as e:
+            print(f"⚠ Не удалось предзагрузить модель {name}: {e}")
+        finally:
+            with self._lock:
+                self._loading.pop(name, None)
+
+    def _wait_loading(self, name: str):
+        with self._lock:
+            future = self._loading.get(name)
+        if future is not None:
+            future.result()
+
+    def _load(self, model: _Model):
+        """Загружает модель, предварительно освободив для нее место. Вызывается под блокировкой."""
+        before = self._begin_load(model)
+        start = time.time()
+        try:
+            model.load()
+        except Exception:
+            model.loading = False
+            raise
+        self._finish_load(model, before, time.time() - start)
+
+    def _begin_load(self, model: _Model):
+        """Освобождает место и резервирует его под загружаемую модель. Вызывается под блокировкой.
+
+        Returns:
+            Занятая память устройства до загрузки или None.
+        """
+        self._make_room(model.size_gb, exclude=model.name)
+        model.loading = True
+        return self._measure()
+
+    def _finish_load(self, model: _Model, before, elapsed: float):
+        """Отмечает модель загруженной. Вызывается под блокировкой."""
+        after = self._measure()
+        if before is not None and after is not None and after > before:
+            model.size_gb = after - before
+        model.loading = False
+        model.resident = True
+        RESIDENT_MODELS.set(1, model=model.name)
+        MODEL_SWAPS.inc(model=model.name, direction="to_gpu")
+        MODEL_SWAP_LATENCY.observe(elapsed, model=model.name, direction="to_gpu")
+        print(f"ℹ Модель {model.name} загружена в VRAM за {elapsed:.2f} сек "
+              f"({model.size_gb:.2f} GB, занято {self.resident_gb():.2f} из {self.budget_gb:.2f} GB)")
+
+    def _offload(self, model: _Model):
+        start = time.time()
+        model.offload()
+        elapsed = time.time() - start
+        model.resident = False
+        RESIDENT_MODELS.set(0, model=model.name)
+        MODEL_SWAPS.inc(model=model.name, direction="to_cpu")
+        MODEL_SWAP_LATENCY.observe(elapsed, model=model.name, direction="to_cpu")
+        print(f"ℹ Модель {model.name} выгружена в память CPU за {elapsed:.2f} сек")
+
+    def _make_room(self, needed_gb: float, exclude: str = None) -> bool:
+        """Вытесняет свободные модели в порядке давности использования. Вызывается под блокировкой.
+
+        Returns:
+            bool: Уложились ли в бюджет. Используемые модели не вытесняются,
+                поэтому при их нехватке бюджет может быть превышен.
+        """
+        candidates = sorted(
+            (model for model in self._models.values()
+             if model.resident and model.in_use == 0 and model.name != exclude),
+            key=lambda model: model.last_used
+        )
+        for model in candidates:
+            if self.resident_gb() + needed_gb <= self.budget_gb:
+                return True
+            self._offload(model)
+        fits = self.resident_gb() + needed_gb <= self.budget_gb
+        if not fits:
+            print(f"⚠ Бюджет VRAM {self.budget_gb:.2f} GB превышен: используемые модели "
+                  f"занимают {self.resident_gb() + needed_gb:.2f} GB")
+        return fits
+
+    def _measure(self):
+        if self.memory_fn is None:
+            return None
+        try:
+            return self.memory_fn()
+        except Exception:
+            return None
+
+
+def torch_module_size_gb(module) -> float:
+    """Оценивает объем модели PyTorch по ее параметрам и буферам в гигабайтах."""
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors) / 1024 ** 3
+
+
+def device_memory_gb():
+    """Возвращает занятую память GPU (включая память CTranslate2) или None без GPU."""
+    from utils.gpu_info import _get_memory_usage
+    memory = _get_memory_usage()
+    return memory["device_used_gb"] if memory else None
+
+
+def create_residency_manager(components: dict, budget_gb: float, device: str = "cuda",
+                             prefetch: bool = True) -> ResidencyManager:
+    """Создает менеджер для загруженных компонентов системы и приводит VRAM в рамки бюджета.
+
+    Args:
+        components: Компоненты по названиям ('recognizer', 'translator', 'synthesizer').
+        budget_gb: Бюджет VRAM в гигабайтах.
+        device: Устройство, на котором работают модели.
+        prefetch: Загружать ли модель следующего этапа в фоне.
+
+    Returns:
+        ResidencyManager: Менеджер с зарегистрированными моделями.
+    """
+    import torch
+
+    manager = ResidencyManager(budget_gb, memory_fn=device_memory_gb, prefetch=prefetch)
+
+    def release_memory():
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    recognizer = components.get("recognizer")
+    if recognizer is not None:
+        whisper = recognizer.model.model
+
+        def offload_whisper():
+            whisper.unload_model(to_cpu=True)
+
+        size_name = next((key for key in WHISPER_PARAMETERS if recognizer.model_size.startswith(key)), "large")
+        size_gb = WHISPER_PARAMETERS[size_name] * 2 / 1024 ** 3
+        manager.register("recognizer", offload_whisper, whisper.load_model, size_gb)
+
+    translator = components.get("translator")
+    if translator is not None:
+        backend = translator.backend
+        manager.register("translator", backend.offload, backend.load, backend.size_gb())
+
+    synthesizer = components.get("synthesizer")
+    if synthesizer is not None:
+        module = synthesizer.model
+
+        def offload_module():
+            module.to("cpu")
+            release_memory()
+
+        def load_module():
+            module.to(device)
+
+        manager.register("synthesizer", offload_module, load_module, torch_module_size_gb(module))
+
+    print(f"✓ Бюджет VRAM для моделей: {budget_gb:.2f} GB (модели занимают ~{manager.resident_gb():.2f} GB)")
+    manager.enforce_budget()
+    return manager
@@ -0,0 +1,123 @@
+"""
+Утилиты для разбиения текста на предложения и фрагменты.
+"""
+
+import re
+
+_SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+_CLAUSE_BREAK = re.compile(r'(?<=[,;:])\s+|\s+(?=[—–]\s)')
+
+
+def split_sentences(text: str) -> list:
+    """Разбивает текст на предложения по знакам конца предложения.
+
+    Args:
+        text: Исходный текст.
+
+    Returns:
+        list: Непустые предложения в исходном порядке.
+    """
+    if not text:
+        return []
+    return [part.strip() for part in _SENTENCE_END.split(text.strip()) if part.strip()]
+
+
+def split_clauses(sentence: str) -> list:
+    """Разбивает предложение на клаузы по запятым, точкам с запятой, двоеточиям и тире.
+
+    Args:
+        sentence: Предложение.
+
+    Returns:
+        list: Непустые клаузы в исходном порядке.
+    """
+    return [clause.strip() for clause in _CLAUSE_BREAK.split(sentence) if clause.strip()]
+
+
+def _split_long(sentence: str, max_chars: int) -> list:
+    """Делит слишком длинное предложение по границам клауз, а затем по словам."""
+    pieces = []
+    for clause in split_clauses(sentence):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+            continue
+        current = ""
+        for word in clause.split():
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            pieces.append(current)
+    return pieces
+
+
+def group_sentences(text: str, max_sentences: int, max_chars: int) -> list:
+    """Группирует соседние предложения в окна ограниченного размера.
+
+    Каждое окно содержит не более max_sentences идущих подряд предложений и
+    не более max_chars символов, так что предложения внутри окна служат
+    друг другу контекстом. Предложения длиннее max_chars делятся по клаузам.
+    Весь текст сохраняется, порядок не меняется.
+
+    Args:
+        text: Исходный текст.
+        max_sentences: Максимальное число предложений в окне.
+        max_chars: Максимальная длина окна в символах.
+
+    Returns:
+        list: Окна текста в исходном порядке.
+    """
+    windows = []
+    current = []
+    current_len = 0
+    for sentence in split_sentences(text):
+        units = [sentence] if len(sentence) <= max_chars else _split_long(sentence, max_chars)
+        for unit in units:
+            if current and (len(current) >= max_sentences or current_len + 1 + len(unit) > max_chars):
+                windows.append(" ".join(current))
+                current = []
+                current_len = 0
+            current.append(unit)
+            current_len += len(unit) + (1 if current_len else 0)
+    if current:
+        windows.append(" ".join(current))
+    return windows
+
+
+def split_into_chunks(text: str, max_chars: int) -> list:
+    """Разбивает текст на фрагменты не длиннее max_chars по границам предложений и клауз.
+
+    Первый фрагмент - это первое предложение (или его первая клауза), чтобы
+    его можно было обработать как можно раньше. Остальные предложения
+    объединяются в фрагменты до max_chars символов.
+
+    Args:
+        text: Исходный текст.
+        max_chars: Максимальная длина фрагмента в символах.
+
+    Returns:
+        list: Фрагменты текста в исходном порядке.
+    """
+    units = []
+    for sentence in split_sentences(text):
+        if len(sentence) <= max_chars:
+            units.append(sentence)
+        else:
+            units.extend(_split_long(sentence, max_chars))
+
+    if not units:
+        return []
+
+    chunks = [units[0]]
+    current = ""
+    for unit in units[1:]:
+        if current and len(current) + 1 + len(unit) > max_chars:
+            chunks.append(current)
+            current = unit
+        else:
+            current = f"{current} {unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks